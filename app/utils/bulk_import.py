@@ -0,0 +1,143 @@
+"""Bulk order upload: validate and price a whole CSV/XLSX order sheet at once.
+
+Keying a large order into the tracker form costs one rerun per line. An
+uploaded sheet is instead checked in a handful of vectorized steps: one join
+against the inventory index (unknown items), column-wise comparisons
+(quantities, fulfilled greater than ordered) and one membership test per
+distinct invoice number against the persistent invoice index (duplicate
+invoices, reported once per invoice). As in the tracker form, a line must
+order at least one unit. Valid sheets are priced and summarised per invoice in the same
+pass, ready to be committed together with ``commit_queue.submit_orders``.
+
+A sheet needs Item, QuantityOrdered and QuantityFulfilled columns. It may also
+carry InvoiceNumber, OrderDate and Customer columns, in which case it can hold
+several orders; blank or missing values are taken from the order details
+entered in the tracker.
+"""
+import io
+
+import numpy as np
+import pandas as pd
+
+from app.utils.invoice_index import normalize_invoice
+from app.utils.item_search import normalize
+from app.utils.order_tables import build_order_tables
+from app.utils.product_matcher import load_product_matcher
+from app.utils.schema import parse_order_dates
+
+REQUIRED_COLUMNS = ['Item', 'QuantityOrdered', 'QuantityFulfilled']
+ORDER_COLUMNS = ['InvoiceNumber', 'OrderDate', 'Customer']
+LINE_COLUMNS = ['InvoiceNumber', 'OrderDate', 'Customer', 'Item', 'QuantityOrdered', 'QuantityFulfilled',
+                'Price', 'OrderValue', 'ValueActualized', 'RevenueLost']
+
+
+def _column_key(name):
+    return ''.join(str(name).split()).lower()
+
+
+def read_order_sheet(upload):
+    """Read an uploaded .csv or .xlsx order sheet, mapping headers such as "Quantity Ordered" to the schema names."""
+    data = upload.getvalue() if hasattr(upload, 'getvalue') else upload.read()
+    name = getattr(upload, 'name', '')
+    if name.lower().endswith(('.xlsx', '.xlsm')):
+        sheet = pd.read_excel(io.BytesIO(data), dtype=str, engine='openpyxl')
+    else:
+        sheet = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+    canonical = {_column_key(column): column for column in REQUIRED_COLUMNS + ORDER_COLUMNS}
+    return sheet.rename(columns=lambda column: canonical.get(_column_key(column), column))
+
+
+def validate_order_sheet(sheet, inventory_index, invoice_index, defaults=None):
+    """Validate and price an order sheet.
+
+    ``defaults`` maps InvoiceNumber/OrderDate/Customer to the values used where
+    the sheet leaves them blank. Returns ``(lines, problems)``: the priced line
+    items (LINE_COLUMNS) and a frame with one row per problem (Row, the
+    spreadsheet row number, Item and Problem). ``lines`` is only usable when
+    ``problems`` is empty.
+    """
+    defaults = defaults or {}
+    missing = [column for column in REQUIRED_COLUMNS if column not in sheet]
+    if missing:
+        problem = pd.DataFrame({'Row': [1], 'Item': [''], 'Problem': [f"Missing column(s): {', '.join(missing)}"]})
+        return pd.DataFrame(columns=LINE_COLUMNS), problem
+
+    sheet = sheet.reset_index(drop=True)
+    lines = pd.DataFrame(index=sheet.index)
+    for column in ORDER_COLUMNS:
+        values = sheet[column].astype(str).str.strip() if column in sheet else pd.Series('', index=sheet.index)
+        default = defaults.get(column)
+        lines[column] = values.where(values.ne('') & values.ne('nan'), '' if default is None else str(default))
+    lines['Item'] = sheet['Item'].fillna('').astype(str).str.strip()
+    ordered = pd.to_numeric(sheet['QuantityOrdered'], errors='coerce')
+    fulfilled = pd.to_numeric(sheet['QuantityFulfilled'], errors='coerce')
+
+    checks = []
+    blank = lines['Item'].eq('')
+    checks.append((blank, "No item"))
+    known = inventory_index.lookup(lines['Item'])['Known'].to_numpy()
+    if not known.all():
+        # Accept differences in case and spacing only
+        by_key = {normalize(item): item for item in inventory_index.items}
+        lines.loc[~known, 'Item'] = [by_key.get(normalize(item), item) for item in lines.loc[~known, 'Item']]
+        known = inventory_index.lookup(lines['Item'])['Known'].to_numpy()
+    unknown = ~known & ~blank.to_numpy()
+    bad_ordered = ordered.isna() | (ordered <= 0) | (ordered % 1 != 0)
+    bad_fulfilled = fulfilled.isna() | (fulfilled < 0) | (fulfilled % 1 != 0)
+    checks.append((bad_ordered, "Quantity ordered is not a whole number of 1 or more"))
+    checks.append((bad_fulfilled, "Quantity fulfilled is not a whole number of 0 or more"))
+    checks.append((~bad_ordered & ~bad_fulfilled & (fulfilled > ordered), "Fulfilled quantity exceeds the ordered quantity"))
+
+    dates = parse_order_dates(lines['OrderDate'].replace('', None))
+    checks.append((dates.isna(), "No valid order date"))
+    checks.append((lines['Customer'].eq(''), "No customer"))
+    checks.append((lines['InvoiceNumber'].eq(''), "No invoice number"))
+
+    # Invoice-level problems are reported once per invoice, at its first row
+    invoices = lines['InvoiceNumber'].map(normalize_invoice)
+    first_rows = invoices[invoices.ne('')].drop_duplicates()
+    existing = first_rows[[invoice in invoice_index for invoice in first_rows]]
+    per_invoice = pd.DataFrame({'invoice': invoices, 'date': dates, 'customer': lines['Customer']})
+    spread = per_invoice[invoices.ne('')].groupby('invoice', sort=False)[['date', 'customer']].nunique()
+    mixed = first_rows[first_rows.isin(spread.index[(spread['date'] > 1) | (spread['customer'] > 1)])]
+
+    frames = [pd.DataFrame(columns=['Row', 'Item', 'Problem'])]
+    for found, message in [(existing, "Invoice number {} already exists"),
+                           (mixed, "Invoice {} has more than one order date or customer")]:
+        if len(found):
+            frames.append(pd.DataFrame({'Row': found.index.to_numpy() + 2, 'Item': '',
+                                        'Problem': [message.format(invoice) for invoice in found]}))
+    if unknown.any():
+        names = lines.loc[unknown, 'Item']
+        suggestions = load_product_matcher().best(names.unique(), min_score=0.5).set_index('Name')['Item']
+        frames.append(pd.DataFrame({
+            'Row': np.flatnonzero(unknown) + 2,
+            'Item': names.to_numpy(),
+            'Problem': [
+                "Item not in inventory" + (f" (closest: {suggestion})" if isinstance(suggestion, str) else "")
+                for suggestion in suggestions.reindex(names).to_numpy()
+            ],
+        }))
+    for mask, message in checks:
+        mask = np.asarray(mask, dtype=bool)
+        if mask.any():
+            frames.append(pd.DataFrame({'Row': np.flatnonzero(mask) + 2, 'Item': lines.loc[mask, 'Item'].to_numpy(),
+                                        'Problem': message}))
+    # Row numbers as shown in a spreadsheet: the header is row 1
+    problems = pd.concat(frames, ignore_index=True).sort_values('Row', kind='stable', ignore_index=True)
+
+    lines['OrderDate'] = dates.dt.date
+    lines['QuantityOrdered'] = ordered.fillna(0).astype(int)
+    lines['QuantityFulfilled'] = fulfilled.fillna(0).astype(int)
+    return inventory_index.price_lines(lines)[LINE_COLUMNS], problems
+
+
+def sheet_orders(lines):
+    """Split validated lines into ``(order_lines, order_row)`` pairs, one per invoice, with the order KPIs.
+
+    The order rows are those ``order_tables.build_order_tables`` derives, so
+    they match what a refresh of data_tables.csv would write.
+    """
+    rows = build_order_tables(lines).to_dict('records')
+    return [(order_lines.reset_index(drop=True), row)
+            for (_, order_lines), row in zip(lines.groupby('InvoiceNumber', sort=True), rows)]
@@ -0,0 +1,109 @@
+"""Chart data preparation: aggregate and downsample before a frame reaches Altair.
+
+Altair serialises every row of the frame it is given into the Vega-Lite spec
+sent to the browser, and aggregates such as ``sum(...)`` or ``month(Date)``
+in an encoding are evaluated there, over all of those rows. The helpers below
+do that work on the server instead, so a chart only ever ships a bounded
+number of rows however long the order history grows:
+
+* ``time_aggregate`` and ``top_categories`` group and sum on the server, with
+  the smallest categories folded into an "Other" row;
+* ``downsample_series`` thins line and bar series to at most ``MAX_POINTS``
+  per series with Largest-Triangle-Three-Buckets (LTTB), which keeps the
+  peaks and troughs that a plain stride would drop;
+* ``sample_points`` bounds scatter plots with a deterministic random sample.
+"""
+import numpy as np
+import pandas as pd
+
+from app.utils.rollups import bucket_start
+
+MAX_POINTS = 500  # per series
+MAX_CATEGORIES = 20
+OTHER = 'Other'
+
+
+def _numeric(values):
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(float)
+    return values.to_numpy(dtype=float)
+
+
+def lttb(x, y, threshold):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps out of (x, y), in order.
+
+    ``x`` must be sorted. The first and last points are always kept.
+    """
+    n = len(x)
+    if n <= threshold:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1][:max(threshold, 0)], dtype=np.int64)
+    x, y = _numeric(x), _numeric(y)
+    # threshold - 2 buckets over the points between the first and the last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    selected = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x, next_y = x[end:edges[bucket + 2]].mean(), y[end:edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        # Twice the area of the triangle (selected point, candidate, next bucket's average)
+        area = np.abs((x[selected] - next_x) * (y[start:end] - y[selected])
+                      - (x[selected] - x[start:end]) * (next_y - y[selected]))
+        selected = start + int(np.argmax(area))
+        keep[bucket + 1] = selected
+    return keep
+
+
+def downsample_series(df, x, y, by=None, max_points=MAX_POINTS):
+    """At most ``max_points`` rows per series (per value of ``by``), chosen by LTTB on ``y`` against ``x``."""
+    df = df.sort_values(x, kind='stable')
+    if by is None:
+        return df.iloc[lttb(df[x], df[y].fillna(0), max_points)]
+    parts = [
+        group.iloc[lttb(group[x], group[y].fillna(0), max_points)]
+        for _, group in df.groupby(by, sort=False, observed=True)
+    ]
+    return pd.concat(parts) if parts else df
+
+
+def sample_points(df, max_points=MAX_POINTS, seed=0):
+    """A deterministic random sample of at most ``max_points`` rows, in the original order."""
+    if len(df) <= max_points:
+        return df
+    rng = np.random.default_rng(seed)
+    return df.iloc[np.sort(rng.choice(len(df), size=max_points, replace=False))]
+
+
+def top_categories(df, column, value, limit=MAX_CATEGORIES, other=OTHER):
+    """Sum ``value`` per ``column``; keep the ``limit`` largest and fold the rest into one ``other`` row.
+
+    Returns rows sorted by ``value``, descending, with ``other`` last.
+    """
+    totals = df.groupby(column, observed=True)[value].sum().sort_values(ascending=False)
+    result = totals.iloc[:limit].reset_index()
+    result[column] = result[column].astype(object)
+    if len(totals) > limit:
+        result.loc[len(result)] = {column: other, value: totals.iloc[limit:].sum()}
+    return result
+
+
+def time_aggregate(df, date, value, interval='Monthly', by=None, limit=MAX_CATEGORIES):
+    """Sum ``value`` per Daily/Weekly/Monthly/Quarterly bucket of ``date`` (and per ``by``, top ``limit`` kept).
+
+    Returns columns Interval (bucket start), ``by`` (if given) and ``value``.
+    """
+    df = df.dropna(subset=[date])
+    frame = pd.DataFrame({'Interval': pd.to_datetime(bucket_start(df[date], interval)), value: df[value].to_numpy()})
+    keys = ['Interval']
+    if by is not None:
+        top = set(top_categories(df, by, value, limit)[by]) - {OTHER}
+        categories = df[by].astype(object).to_numpy()
+        frame[by] = np.where(pd.Series(categories).isin(top).to_numpy(), categories, OTHER)
+        keys.append(by)
+    return frame.groupby(keys, as_index=False, sort=True)[value].sum()
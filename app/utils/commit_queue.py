@@ -0,0 +1,213 @@
+"""Single-writer commit queue for order saves.
+
+Every clerk's session used to do its own read-modify-write of data.csv and
+data_tables.csv, so two saves at the same moment could lose rows or leave the
+files out of step. Sessions now hand their order to ``submit_order`` and a
+single background thread per server process does all the writing:
+
+* everything queued while the previous batch was being written is committed
+  together as one batch, under an exclusive file lock so that other server
+  processes cannot interleave their own writes;
+* invoice numbers are checked against the persistent invoice index and the
+  rest of the batch inside the lock, so the same invoice cannot be saved twice;
+* if writing data.csv, data_tables.csv or the invoice index fails, all three
+  are truncated back to where they were (or, for a file that had to be
+  rewritten because the batch added columns, restored from a copy taken
+  before the commit), so a batch is stored completely or not at all.
+
+``submit_order`` returns a ``concurrent.futures.Future`` that resolves to an
+acknowledgement dict once the batch containing the order has been committed.
+Callbacks registered with ``add_commit_listener`` are then called with the
+line items of the batch (for example to refit the forecasts of those items).
+"""
+import itertools
+import os
+import queue
+import shutil
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import pandas as pd
+
+from app.utils.data_access import DATA_DIR, ORDERS_PATH, ORDER_TABLES_PATH
+from app.utils.invoice_index import INVOICE_INDEX_PATH, load_invoice_index, normalize_invoice
+from app.utils.order_store import append_rows, read_header
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process queue serialises writes
+    fcntl = None
+
+LOCK_PATH = f"{DATA_DIR}/.orders.lock"
+MAX_BATCH = 500
+
+
+@contextmanager
+def file_lock(path=LOCK_PATH):
+    """Hold an exclusive lock on ``path`` for the duration of the block."""
+    with open(path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _snapshot(path, columns=None):
+    """Return the (size, header, backup) needed to roll a write back, or None if the file is missing.
+
+    Writing rows with ``columns`` the header lacks rewrites the whole file
+    (see ``order_store.append_rows``), which truncating cannot undo, so the
+    file is copied to ``backup`` first; otherwise ``backup`` is None.
+    """
+    try:
+        size, header = os.path.getsize(path), read_header(path)
+    except FileNotFoundError:
+        return None
+    backup = None
+    if header is not None and columns is not None and not set(columns) <= set(header):
+        backup = f"{path}.rollback"
+        shutil.copy2(path, backup)
+    return size, header, backup
+
+
+def _rollback(path, snapshot):
+    if snapshot is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    size, header, backup = snapshot
+    if backup is not None:
+        os.replace(backup, path)
+    elif os.path.exists(path):
+        os.truncate(path, size)
+
+
+def _discard(snapshot):
+    if snapshot is not None and snapshot[2] is not None and os.path.exists(snapshot[2]):
+        os.remove(snapshot[2])
+
+
+class CommitQueue:
+    """Serialises order saves from all sessions into batched, all-or-nothing commits."""
+
+    def __init__(self, orders_path=ORDERS_PATH, tables_path=ORDER_TABLES_PATH, lock_path=LOCK_PATH,
+                 invoice_index_path=INVOICE_INDEX_PATH):
+        self.orders_path = orders_path
+        self.tables_path = tables_path
+        self.lock_path = lock_path
+        self.invoice_index = load_invoice_index(invoice_index_path, orders_path)
+        self._queue = queue.Queue()
+        self._batch_ids = itertools.count(1)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._listeners = []
+
+    def submit(self, order_lines, order_row):
+        """Queue one order (line items plus its order-level row) and return a Future for its ack."""
+        return self.submit_many([(order_lines, order_row)])
+
+    def submit_many(self, orders):
+        """Queue several ``(order_lines, order_row)`` orders that are committed all together or not at all.
+
+        The Future resolves to one ack for the group; if any of its invoice
+        numbers already exists, none of the orders is written.
+        """
+        future = Future()
+        self._ensure_running()
+        self._queue.put((list(orders), future))
+        return future
+
+    def add_listener(self, listener):
+        """Call ``listener(order_lines)`` with the line items of every committed batch. Idempotent."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def _ensure_running(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="order-commit-queue", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                acks = self._commit(batch)
+            except Exception as e:
+                acks = [{"committed": False, "error": f"Unable to write. Error: {e}"} for _ in batch]
+            for (orders, future), ack in zip(batch, acks):
+                invoice_numbers = [order_row["InvoiceNumber"] for _, order_row in orders]
+                if len(invoice_numbers) == 1:
+                    future.set_result({"invoice_number": invoice_numbers[0], **ack})
+                else:
+                    future.set_result({"invoice_numbers": invoice_numbers, **ack})
+
+    def _commit(self, batch):
+        batch_id = next(self._batch_ids)
+        with file_lock(self.lock_path):
+            seen = set()
+            acks, lines, rows = [], [], []
+            for orders, _ in batch:
+                invoice_numbers = [normalize_invoice(order_row["InvoiceNumber"]) for _, order_row in orders]
+                duplicates = [number for number in invoice_numbers if number in seen or number in self.invoice_index]
+                if duplicates or len(set(invoice_numbers)) < len(invoice_numbers):
+                    acks.append({"committed": False, "error": "Invoice Number already exists!"})
+                    continue
+                seen.update(invoice_numbers)
+                lines += [order_lines for order_lines, _ in orders]
+                rows += [order_row for _, order_row in orders]
+                acks.append({"committed": True, "batch": batch_id, "lines": sum(len(order_lines) for order_lines, _ in orders)})
+            if not rows:
+                return acks
+
+            committed_lines = pd.concat(lines, ignore_index=True)
+            committed_rows = pd.DataFrame(rows)
+            snapshots = {
+                self.orders_path: _snapshot(self.orders_path, committed_lines.columns),
+                self.tables_path: _snapshot(self.tables_path, committed_rows.columns),
+                self.invoice_index.path: _snapshot(self.invoice_index.path),
+            }
+            try:
+                append_rows(self.orders_path, committed_lines)
+                append_rows(self.tables_path, committed_rows)
+                self.invoice_index.add(row["InvoiceNumber"] for row in rows)
+            except Exception:
+                for path, snapshot in snapshots.items():
+                    _rollback(path, snapshot)
+                raise
+            finally:
+                for snapshot in snapshots.values():
+                    _discard(snapshot)
+        for listener in list(self._listeners):
+            try:
+                listener(committed_lines)
+            except Exception:
+                pass  # the batch is already stored; a listener must not turn it into an error
+        return acks
+
+
+_default_queue = CommitQueue()
+
+
+def submit_order(order_lines, order_row):
+    """Queue an order on the process-wide commit queue; returns a Future resolving to its ack."""
+    return _default_queue.submit(order_lines, order_row)
+
+
+def submit_orders(orders):
+    """Queue a group of orders to be committed atomically; returns a Future resolving to one ack."""
+    return _default_queue.submit_many(orders)
+
+
+def add_commit_listener(listener):
+    """Register ``listener(order_lines)`` on the process-wide commit queue."""
+    _default_queue.add_listener(listener)
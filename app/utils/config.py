@@ -0,0 +1,25 @@
+"""Access to config/config.yaml."""
+import os
+
+import yaml
+
+from app.utils.data_access import cached
+
+CONFIG_PATH = "config/config.yaml"
+
+
+def _read_config(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
+
+
+def load_config(path=CONFIG_PATH):
+    """Parsed configuration, re-read only when the file changes. Empty if there is no config file."""
+    return cached("config", path, _read_config)
+
+
+def setting(section, key, default=None, path=CONFIG_PATH):
+    """``config[section][key]``, or ``default`` when either is missing."""
+    return (load_config(path).get(section) or {}).get(key, default)
@@ -0,0 +1,334 @@
+"""Shared, process-wide cache for the data files read by every page.
+
+Streamlit re-executes a page script on every widget interaction, so parsing the
+order history and the 11k-row inventory on each rerun dominates the cost of a
+click. Pages load their data through the functions below instead of calling
+``pd.read_csv`` directly. Parsed, typed frames are kept in memory for the life
+of the server process (so they are shared by all sessions) and a file is only
+parsed again once its modification time or size changes. The order files
+are append-only (see ``app.utils.order_store``), so when one of them has only
+grown, just the appended bytes are parsed and added to the cached frame.
+
+The order frames are typed by the schemas in ``app.utils.schema`` and kept
+sorted by OrderDate (unparseable dates last), so a date range can be cut out
+with ``filter_date_range`` by binary search. A columnar (Parquet) copy of each
+order file is kept under ``CACHE_DIR`` so that a cold start does not have to
+parse the CSV again.
+
+Cached frames are shared between sessions: treat them as read-only and take a
+copy before mutating one.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app.utils.lazy import lazy_import
+from app.utils.preprocess import load_and_clean_inventory
+from app.utils.profiler import stage
+from app.utils.schema import LINE_ITEMS, ORDER_TABLE, STORED_LINE_COLUMNS, apply_schema, concat_typed, read_dtypes
+
+pa = lazy_import("pyarrow")  # only needed for the Parquet sidecars
+pq = lazy_import("pyarrow.parquet")
+
+DATA_DIR = "app/assets/data"
+ORDERS_PATH = f"{DATA_DIR}/data.csv"
+ORDER_TABLES_PATH = f"{DATA_DIR}/data_tables.csv"
+CUSTOMERS_PATH = f"{DATA_DIR}/data_customers.csv"
+INVENTORY_PATH = f"{DATA_DIR}/inventory/inventory.csv"
+CACHE_DIR = f"{DATA_DIR}/.cache"
+SCHEMA_VERSION = 2  # bump when a schema in app.utils.schema changes
+
+_lock = threading.RLock()
+_entries = {}  # (kind, path) -> (signature, value, edges)
+_EDGE_BYTES = 64
+_stats = {"hits": 0, "misses": 0}
+
+
+def file_signature(path):
+    """Return a cheap version stamp for a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _file_edges(path, size):
+    """Return the first line and the last few bytes before ``size``, used to recognise an append."""
+    with open(path, 'rb') as f:
+        head = f.readline()
+        f.seek(max(size - _EDGE_BYTES, 0))
+        return head, f.read(min(size, _EDGE_BYTES))
+
+
+def _read_appended(path, signature, edges):
+    """Return ``(new_size, bytes)`` appended since ``signature``, or None if the file was not just appended to."""
+    old_size = signature[1]
+    with open(path, 'rb') as f:
+        if f.readline() != edges[0]:
+            return None
+        f.seek(max(old_size - _EDGE_BYTES, 0))
+        if f.read(min(old_size, _EDGE_BYTES)) != edges[1]:
+            return None
+        data = f.read()
+    # Only take complete lines; a writer may still be mid-append
+    end = data.rfind(b'\n') + 1
+    return old_size + end, data[:end]
+
+
+def cached(kind, path, builder, extend=None):
+    """Return ``builder(path)`` for the current version of ``path``.
+
+    The builder runs at most once per file version; later calls with the same
+    ``kind`` and ``path`` are served from memory until the file changes. If
+    ``extend`` is given and the file has only been appended to, the cached
+    value is updated with ``extend(value, appended_bytes)`` instead.
+    """
+    signature = file_signature(path)
+    key = (kind, path)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] == signature:
+            _stats["hits"] += 1
+            return entry[1]
+        _stats["misses"] += 1
+        appended = None
+        if (extend is not None and entry is not None and entry[2] is not None
+                and signature is not None and signature[1] > entry[0][1]):
+            appended = _read_appended(path, entry[0], entry[2])
+        name = kind if isinstance(kind, str) else kind[0]
+        if appended is not None:
+            size, data = appended
+            with stage(f"extend {name}"):
+                value = extend(entry[1], data) if data else entry[1]
+        else:
+            with stage(f"build {name}"):
+                value = builder(path)
+            size = signature[1] if signature is not None else 0
+        after = file_signature(path)
+        if after is None or after[1] != size:
+            # The file changed while it was being read; rebuild on the next call
+            _entries.pop(key, None)
+            return value
+        edges = _file_edges(path, size) if extend is not None else None
+        _entries[key] = (after, value, edges)
+        return value
+
+
+def invalidate(path=None):
+    """Drop cached entries for ``path``, or every entry if no path is given."""
+    with _lock:
+        for key in list(_entries):
+            if path is None or key[1] == path:
+                del _entries[key]
+
+
+def cache_stats():
+    """Return hit/miss counters and the number of cached entries."""
+    with _lock:
+        return {**_stats, "entries": len(_entries)}
+
+
+def _sort_by_date(df):
+    # Stable sort: rows on the same day keep file order, and an already sorted
+    # frame with a few appended rows is merged in close to linear time
+    return df.sort_values('OrderDate', kind='stable', na_position='last', ignore_index=True)
+
+
+def _csv_header(path):
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def _projection(header, columns):
+    """Columns of ``header`` to load; OrderDate is always kept for sorting."""
+    if columns is None:
+        return list(header)
+    return [column for column in header if column in columns or column == 'OrderDate']
+
+
+def read_typed_csv(source, schema, header=None, columns=None):
+    """Read an order CSV with the declared ``schema`` applied.
+
+    ``source`` is a path, or header-less bytes (appended rows) when ``header``
+    is given. ``columns`` restricts the columns parsed.
+    """
+    if header is None:
+        header = _csv_header(source)
+        options = {}
+    else:
+        source = io.BytesIO(source)
+        options = {'header': None, 'names': list(header)}
+    usecols = _projection(header, columns)
+    df = pd.read_csv(source, usecols=usecols, dtype=read_dtypes(schema, usecols), **options)
+    return apply_schema(df[usecols], schema)
+
+
+def parse_appended_rows(data, header, schema, columns=None):
+    """Parse header-less CSV bytes appended to an order file."""
+    return read_typed_csv(data, schema, header=header, columns=columns)
+
+
+# Columnar sidecar: a Parquet copy of each parsed order file under CACHE_DIR.
+# A cold start memory-maps it (only the requested columns) instead of parsing
+# the CSV, and parses just the rows appended to the CSV since it was written.
+# The signature of the CSV it was built from is stored in the Parquet file's
+# own metadata, so replacing the file swaps data and signature in one step.
+# The sidecar is best effort: if it is missing, stale or unwritable, the CSV
+# is read instead and the sidecar is rewritten in a background thread.
+
+_SIDECAR_KEY = b'angel.sidecar'
+
+
+def _sidecar_path(path):
+    # Keyed on the absolute path: same-named files in other directories get their own sidecar
+    digest = hashlib.sha1(os.path.realpath(path).encode()).hexdigest()[:16]
+    return f"{CACHE_DIR}/{os.path.basename(path)}.{digest}.parquet"
+
+
+def _open_sidecar(path):
+    """``(source, meta)``: the sidecar of ``path`` memory-mapped and the signature stored in it, or None."""
+    try:
+        source = pa.memory_map(_sidecar_path(path))
+        meta = json.loads((pq.read_schema(source).metadata or {})[_SIDECAR_KEY])
+    except (OSError, KeyError, ValueError):
+        return None
+    if meta.get("schema_version") != SCHEMA_VERSION:
+        return None
+    source.seek(0)
+    return source, meta
+
+
+def _write_sidecar(path, df, signature):
+    parquet_path = _sidecar_path(path)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    head, tail = _file_edges(path, signature[1])
+    meta = {
+        "schema_version": SCHEMA_VERSION,
+        "mtime_ns": signature[0],
+        "size": signature[1],
+        "header": _csv_header(path),
+        "head": head.hex(),
+        "tail": tail.hex(),
+    }
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**table.schema.metadata, _SIDECAR_KEY: json.dumps(meta).encode()})
+    tmp_path = f"{parquet_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, parquet_path)
+
+
+_sidecar_refreshes = set()
+
+
+def _refresh_sidecar(path, schema):
+    """Rewrite the sidecar for ``path`` in the background from a full parse of the CSV."""
+    def refresh():
+        try:
+            signature = file_signature(path)
+            df = _sort_by_date(read_typed_csv(path, schema))
+            if file_signature(path) == signature:
+                _write_sidecar(path, df, signature)
+        except Exception:
+            pass  # the sidecar is only an accelerator; the CSV stays authoritative
+        finally:
+            with _lock:
+                _sidecar_refreshes.discard(path)
+
+    with _lock:
+        if path in _sidecar_refreshes:
+            return
+        _sidecar_refreshes.add(path)
+    threading.Thread(target=refresh, name="sidecar-refresh", daemon=True).start()
+
+
+def _load_typed(path, schema, columns=None):
+    """Load an order file from its sidecar when possible, else from the CSV."""
+    signature = file_signature(path)
+    header = _csv_header(path)
+    sidecar = _open_sidecar(path)
+    df = None
+    if sidecar is not None and sidecar[1]["header"] == header:
+        source, meta = sidecar
+        if (meta["mtime_ns"], meta["size"]) == signature:
+            df = pd.read_parquet(source, columns=_projection(header, columns))
+            return df
+        if meta["size"] < signature[1]:
+            edges = (bytes.fromhex(meta["head"]), bytes.fromhex(meta["tail"]))
+            appended = _read_appended(path, (meta["mtime_ns"], meta["size"]), edges)
+            if appended is not None:
+                df = pd.read_parquet(source, columns=_projection(header, columns))
+                if appended[1]:
+                    df = concat_typed(df, parse_appended_rows(appended[1], header, schema, columns))
+    if df is None:
+        df = read_typed_csv(path, schema, columns=columns)
+    _refresh_sidecar(path, schema)
+    return _sort_by_date(df)
+
+
+def _extender(path, schema, columns):
+    def extend(df, data):
+        new_rows = parse_appended_rows(data, _csv_header(path), schema, columns)
+        if df.empty:
+            return _sort_by_date(new_rows)
+        return _sort_by_date(concat_typed(df, new_rows))
+    return extend
+
+
+def date_bounds(df, start_date, end_date):
+    """Positions ``(start, end)`` of the rows of a date-sorted frame with start_date <= OrderDate <= end_date."""
+    dates = df['OrderDate'].to_numpy()
+    start = np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date)), side='left')
+    end = np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date)), side='right')
+    return int(start), int(end)
+
+
+def filter_date_range(df, start_date, end_date):
+    """Rows of a date-sorted frame with start_date <= OrderDate <= end_date.
+
+    Uses binary search on the sorted OrderDate column, so the cost is
+    O(log n) plus the size of the result, which is a slice of ``df`` rather
+    than a copy. ``df`` must be sorted by OrderDate, as the loaders here
+    return it.
+    """
+    start, end = date_bounds(df, start_date, end_date)
+    return df.iloc[start:end]
+
+
+def _load_order_file(kind, path, schema, columns):
+    key = kind if columns is None else (kind, tuple(columns))
+    return cached(key, path, lambda p: _load_typed(p, schema, columns), _extender(path, schema, columns))
+
+
+def load_orders(path=ORDERS_PATH, columns=None):
+    """Order line items (data.csv), typed per ``schema.LINE_ITEMS`` and sorted by OrderDate.
+
+    ``columns`` limits the columns loaded (OrderDate is always included). By
+    default the per-line revenue columns are left out; derive them with
+    ``schema.line_values`` or ``schema.with_line_revenue``.
+    """
+    return _load_order_file("orders", path, LINE_ITEMS, STORED_LINE_COLUMNS if columns is None else columns)
+
+
+def load_order_tables(path=ORDER_TABLES_PATH, columns=None):
+    """Order-level KPI rows (data_tables.csv), typed and sorted by OrderDate.
+
+    Empty if the file does not exist yet.
+    """
+    if file_signature(path) is None:
+        return pd.DataFrame(columns=['OrderDate', 'InvoiceNumber', 'Customer'])
+    return _load_order_file("order_tables", path, ORDER_TABLE, columns)
+
+
+def load_customers(path=CUSTOMERS_PATH):
+    """Customer list (data_customers.csv)."""
+    return cached("customers", path, pd.read_csv)
+
+
+def load_inventory(path=INVENTORY_PATH):
+    """Inventory with the Price column cleaned to floats."""
+    return cached("inventory", path, load_and_clean_inventory)
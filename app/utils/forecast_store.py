@@ -0,0 +1,184 @@
+"""Forecast store: cached per-item forecasts and incremental refits.
+
+Every item's forecast rows in ``forecasts.parquet`` record the model version
+and the data watermark they were fitted on: the number of order lines for the
+item, their total ordered quantity and the date of its last order. An item's
+forecast is stale when new lines were saved for it since (its watermark
+moved), when it was fitted by another model version, or when the fit is older
+than ``MAX_AGE``.
+
+``refresh`` refits only the stale (or the given) items, warm-starting their
+ARIMA fits from the persisted parameters, and merges them into the store; the
+other items' rows are kept as they are. The commit queue calls
+``refresh_on_commit`` after every saved batch, so the items on a new order
+are refitted in the background within seconds, while pages only ever read
+the store through the shared cache.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app.utils.data_access import ORDERS_PATH, cached, file_signature, load_orders
+from app.utils.forecasting import (FORECASTS_PATH, HORIZON, MODEL_DIR, MODEL_VERSION, forecast_items,
+                                   load_params, save_params)
+from app.utils.inventory_index import load_inventory_index
+from app.utils.rollups import bucket_start
+
+MAX_AGE = pd.Timedelta(days=7)  # refit even without new orders, as the history window moves on
+WATERMARK = ['Lines', 'Quantity', 'LastOrder']
+
+_refresh_lock = threading.Lock()  # one refresh at a time per process
+_pending = set()  # items queued for the background refresh
+_pending_lock = threading.Lock()
+_worker = None
+
+
+def _empty_store():
+    return pd.DataFrame({
+        'Item': pd.Series(dtype=object),
+        'Week': pd.Series(dtype='datetime64[ns]'),
+        'Forecast': pd.Series(dtype=np.float32),
+        'Model': pd.Series(dtype=object),
+        'ModelVersion': pd.Series(dtype=object),
+        'Lines': pd.Series(dtype=np.int64),
+        'Quantity': pd.Series(dtype=float),
+        'LastOrder': pd.Series(dtype='datetime64[ns]'),
+        'FittedAt': pd.Series(dtype='datetime64[ns]'),
+    })
+
+
+def load_forecasts(path=FORECASTS_PATH):
+    """The forecast store, one row per (item, forecast week). Empty if no forecasts were written yet."""
+    return cached("forecasts", path, lambda p: pd.read_parquet(p) if os.path.exists(p) else _empty_store())
+
+
+def _watermarks(path):
+    lines = load_orders(path, columns=['Item', 'QuantityOrdered']).dropna(subset=['OrderDate'])
+    marks = lines.groupby('Item', observed=True).agg(
+        Lines=('QuantityOrdered', 'size'),
+        Quantity=('QuantityOrdered', 'sum'),
+        LastOrder=('OrderDate', 'max'),
+    )
+    marks.index = marks.index.astype(object)
+    return marks.astype({'Lines': np.int64, 'Quantity': float})
+
+
+def item_watermarks(path=ORDERS_PATH):
+    """Per-item data watermark (Lines, Quantity, LastOrder) of the current order history."""
+    return cached("forecast_watermarks", path, _watermarks)
+
+
+def forecast_status(store, watermarks, now=None):
+    """One row per forecast item: Model, FittedAt, Age, NewLines since the fit and Stale."""
+    now = pd.Timestamp.now() if now is None else now
+    fitted = store.drop_duplicates('Item').set_index('Item')
+    current = watermarks.reindex(fitted.index)
+    current['Lines'] = current['Lines'].fillna(0)
+    current['Quantity'] = current['Quantity'].fillna(0)
+    moved = ((current['Lines'] != fitted['Lines']) | (current['Quantity'] != fitted['Quantity'])
+             | (current['LastOrder'].ne(fitted['LastOrder']) & current['LastOrder'].notna()))
+    age = now - fitted['FittedAt']
+    status = pd.DataFrame({
+        'Model': fitted['Model'],
+        'FittedAt': fitted['FittedAt'],
+        'Age': age,
+        'NewLines': (current['Lines'] - fitted['Lines']).clip(lower=0).astype(np.int64),
+        'Stale': moved | (fitted['ModelVersion'] != MODEL_VERSION) | (age > MAX_AGE),
+    })
+    status.index.name = 'Item'
+    return status.reset_index()
+
+
+def stale_items(items, store, watermarks, now=None):
+    """Items of ``items`` whose forecast is missing or stale."""
+    status = forecast_status(store, watermarks, now)
+    fresh = set(status.loc[~status['Stale'], 'Item'])
+    return [item for item in items if item not in fresh]
+
+
+def refresh(items=None, horizon=HORIZON, workers=None, model_dir=MODEL_DIR, path=FORECASTS_PATH):
+    """Refit ``items`` (default: every stale inventory item) and merge them into the store.
+
+    Returns the new forecast rows.
+    """
+    with _refresh_lock:
+        inventory_items = pd.Index(load_inventory_index().items)
+        store = load_forecasts(path)
+        marks = item_watermarks()
+        if items is None:
+            items = stale_items(inventory_items, store, marks)
+        else:
+            items = list(inventory_items[inventory_items.isin(list(items))])
+        if not items:
+            return _empty_store()
+
+        # The whole history window, so refitted items line up with the rest of the store
+        lines = load_orders(columns=['Item', 'QuantityOrdered'])
+        start, end = lines['OrderDate'].min(), lines['OrderDate'].max()
+        if pd.isna(start):
+            start = end = None
+        if end is not None and not store.empty:
+            # The store's forecasts start the week after the history it was fitted on. When the
+            # history has moved into a later week, every stored item is refitted with the new
+            # window, so that all forecast Weeks stay aligned.
+            stored_end = store['Week'].min() - pd.Timedelta(days=7)
+            if pd.Timestamp(bucket_start([end], 'Weekly')[0]) != stored_end:
+                stored_items = set(store['Item'])
+                items = list(inventory_items[inventory_items.isin(stored_items.union(items))])
+        result, params = forecast_items(lines, items, horizon, workers, load_params(model_dir), start, end)
+        save_params(params, model_dir)
+
+        current = marks.reindex(result['Item'])
+        result['ModelVersion'] = MODEL_VERSION
+        result['Lines'] = current['Lines'].fillna(0).to_numpy(dtype=np.int64)
+        result['Quantity'] = current['Quantity'].fillna(0).to_numpy(dtype=float)
+        result['LastOrder'] = current['LastOrder'].to_numpy()
+        result['FittedAt'] = pd.Timestamp.now()
+
+        kept = store[~store['Item'].isin(items)]
+        combined = pd.concat([frame for frame in (kept, result) if not frame.empty], ignore_index=True)
+        combined.to_parquet(f"{path}.tmp", index=False)
+        os.replace(f"{path}.tmp", path)
+        return result
+
+
+def _drain():
+    global _worker
+    while True:
+        with _pending_lock:
+            if not _pending:
+                _worker = None
+                return
+            items = list(_pending)
+            _pending.clear()
+        try:
+            refresh(items)
+        except Exception:
+            pass  # the items stay stale and are picked up by the next refresh
+
+
+def refresh_async(items):
+    """Queue ``items`` for a background refresh.
+
+    Items queued while a refresh is running are refitted together in the next one.
+    """
+    global _worker
+    with _pending_lock:
+        _pending.update(items)
+        if _worker is None and _pending:
+            _worker = threading.Thread(target=_drain, name="forecast-refresh", daemon=True)
+            _worker.start()
+
+
+def refresh_pending():
+    """True while a background refresh is queued or running."""
+    with _pending_lock:
+        return _worker is not None
+
+
+def refresh_on_commit(order_lines, path=FORECASTS_PATH):
+    """Commit listener: refit the items of newly saved order lines, once a forecast store exists."""
+    if file_signature(path) is not None:
+        refresh_async(order_lines['Item'].astype(object).unique())
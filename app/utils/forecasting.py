@@ -0,0 +1,223 @@
+"""Batched weekly demand forecasting for every SKU in the inventory.
+
+The order history is turned into one items x weeks demand matrix (ordered
+quantities, so unfulfilled demand still counts) in a single vectorized pass.
+Series are then split by how much history they have:
+
+* dense series (enough weeks, mostly non-zero) are fitted with an ARIMA model,
+  in chunks spread over a process pool. Each fit is warm-started from the
+  parameters persisted by the previous run, so a nightly refresh only nudges
+  the models instead of optimising from scratch;
+* short, sparse and never-ordered series, which are the vast majority of the
+  11k SKUs, are forecast together by a vectorized Croston (SBA) model over
+  the whole matrix at once. Dense series whose ARIMA fit fails, or all dense
+  series when statsmodels is not installed, fall back to vectorized Holt
+  smoothing.
+
+Results are kept in the forecast store (``app.utils.forecast_store``), which
+refits only the items whose data changed. Run nightly with
+``python -m app.utils.forecasting`` (``--full`` refits every SKU).
+"""
+import argparse
+import importlib.util
+import os
+import pickle
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.utils.data_access import DATA_DIR
+from app.utils.inventory_index import load_inventory_index
+from app.utils.rollups import bucket_start
+
+# Only needed in the worker processes; check for it without importing it
+HAVE_STATSMODELS = importlib.util.find_spec("statsmodels") is not None
+
+MODEL_VERSION = "arima111-sba-v1"
+MODEL_DIR = "models/forecast"
+FORECASTS_PATH = f"{DATA_DIR}/forecasts.parquet"
+
+HORIZON = 12  # weeks
+ARIMA_ORDER = (1, 1, 1)
+MIN_DENSE_WEEKS = 26  # history needed before a series gets its own ARIMA fit
+MIN_DENSE_SHARE = 0.6  # share of those weeks with non-zero demand
+CHUNK_SIZE = 64  # series per process-pool task
+SBA_ALPHA = 0.1
+HOLT_ALPHA, HOLT_BETA = 0.3, 0.1
+
+
+def demand_matrix(lines, items, start=None, end=None):
+    """Weekly ordered quantity per item.
+
+    Returns ``(matrix, weeks)``: a float32 array of shape (len(items), n_weeks)
+    and the Monday starting each column. The weeks run from ``start`` to
+    ``end`` (default: the first and last order in ``lines``), so matrices built
+    for different subsets of items line up. Lines for items not in ``items``
+    are ignored.
+    """
+    lines = lines.dropna(subset=['OrderDate'])
+    if lines.empty and (start is None or end is None):
+        return np.zeros((len(items), 0), dtype=np.float32), pd.DatetimeIndex([])
+    week_starts = bucket_start(lines['OrderDate'], 'Weekly')
+    first = bucket_start([pd.Timestamp(start)], 'Weekly')[0] if start is not None else week_starts.min()
+    last = bucket_start([pd.Timestamp(end)], 'Weekly')[0] if end is not None else week_starts.max()
+    n_weeks = int((last - first).astype(int) // 7) + 1
+    columns = ((week_starts - first).astype(int) // 7).astype(np.int64)
+    rows = pd.Index(items).get_indexer(np.asarray(lines['Item'], dtype=object))
+    keep = (rows >= 0) & (columns >= 0) & (columns < n_weeks)
+    flat = rows[keep].astype(np.int64) * n_weeks + columns[keep]
+    quantities = np.nan_to_num(lines['QuantityOrdered'].to_numpy(dtype=float)[keep])  # missing quantities add 0
+    matrix = np.bincount(flat, weights=quantities, minlength=len(items) * n_weeks)
+    weeks = pd.date_range(pd.Timestamp(first), periods=n_weeks, freq='7D')
+    return matrix.reshape(len(items), n_weeks).astype(np.float32), weeks
+
+
+def dense_mask(matrix):
+    """Series with enough non-zero history for an individual ARIMA fit."""
+    if matrix.shape[1] < MIN_DENSE_WEEKS:
+        return np.zeros(matrix.shape[0], dtype=bool)
+    recent = matrix[:, -MIN_DENSE_WEEKS:]
+    return (recent > 0).mean(axis=1) >= MIN_DENSE_SHARE
+
+
+def croston_sba(matrix, alpha=SBA_ALPHA):
+    """Vectorized Croston forecast with the Syntetos-Boylan bias correction (one flat rate per series)."""
+    n_items = matrix.shape[0]
+    size = np.zeros(n_items)  # smoothed non-zero demand size
+    interval = np.ones(n_items)  # smoothed interval between demands
+    since_last = np.ones(n_items)
+    seen = np.zeros(n_items, dtype=bool)
+    for demand in matrix.T:
+        nonzero = demand > 0
+        first = nonzero & ~seen
+        update = nonzero & seen
+        size[first], interval[first] = demand[first], since_last[first]
+        size[update] += alpha * (demand[update] - size[update])
+        interval[update] += alpha * (since_last[update] - interval[update])
+        seen |= first
+        since_last = np.where(nonzero, 1, since_last + 1)
+    return np.where(seen, (1 - alpha / 2) * size / interval, 0.0)
+
+
+def holt(matrix, horizon, alpha=HOLT_ALPHA, beta=HOLT_BETA):
+    """Vectorized Holt linear-trend smoothing; returns (n_series, horizon) non-negative forecasts."""
+    if matrix.shape[1] < 2:
+        level = matrix[:, -1] if matrix.shape[1] else np.zeros(matrix.shape[0])
+        return np.repeat(level[:, None], horizon, axis=1)
+    level, trend = matrix[:, 0].astype(float), (matrix[:, 1] - matrix[:, 0]).astype(float)
+    for demand in matrix.T[1:]:
+        previous = level
+        level = alpha * demand + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous) + (1 - beta) * trend
+    steps = np.arange(1, horizon + 1)
+    return np.clip(level[:, None] + trend[:, None] * steps, 0, None)
+
+
+def _fit_arima_chunk(chunk, horizon):
+    """Fit one ARIMA per series in a worker process. Returns (position, forecast, params) or Nones on failure."""
+    from statsmodels.tsa.arima.model import ARIMA
+
+    results = []
+    for position, series, start_params in chunk:
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                fit = ARIMA(series, order=ARIMA_ORDER).fit(start_params=start_params)
+            results.append((position, np.clip(fit.forecast(horizon), 0, None), np.asarray(fit.params)))
+        except Exception:
+            results.append((position, None, None))
+    return results
+
+
+def load_params(model_dir=MODEL_DIR):
+    """Fitted ARIMA parameters from the last run, keyed by item."""
+    try:
+        with open(f"{model_dir}/{MODEL_VERSION}.pkl", 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_params(params, model_dir=MODEL_DIR):
+    os.makedirs(model_dir, exist_ok=True)
+    path = f"{model_dir}/{MODEL_VERSION}.pkl"
+    with open(f"{path}.tmp", 'wb') as f:
+        pickle.dump(params, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def forecast_matrix(matrix, items, horizon=HORIZON, workers=None, params=None):
+    """Forecast every row of ``matrix``.
+
+    Returns ``(forecasts, models, params)``: a (n_items, horizon) array, the
+    model used per item, and the updated ARIMA parameters keyed by item.
+    """
+    params = dict(params or {})
+    forecasts = np.repeat(croston_sba(matrix)[:, None], horizon, axis=1)
+    models = np.full(len(items), 'sba', dtype=object)
+
+    dense = np.flatnonzero(dense_mask(matrix))
+    if len(dense):
+        forecasts[dense] = holt(matrix[dense], horizon)
+        models[dense] = 'holt'
+    if len(dense) and HAVE_STATSMODELS:
+        tasks = [(position, matrix[position].astype(float), params.get(items[position])) for position in dense]
+        chunks = [tasks[i:i + CHUNK_SIZE] for i in range(0, len(tasks), CHUNK_SIZE)]
+        if len(chunks) == 1:
+            # A handful of refits (e.g. after one saved order) is cheaper than starting a pool
+            chunk_results = [_fit_arima_chunk(chunks[0], horizon)]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunk_results = list(pool.map(_fit_arima_chunk, chunks, [horizon] * len(chunks)))
+        for results in chunk_results:
+            for position, forecast, fitted in results:
+                if forecast is not None:
+                    forecasts[position] = forecast
+                    models[position] = 'arima'
+                    params[items[position]] = fitted
+    return forecasts, models, params
+
+
+def forecast_items(lines, items, horizon=HORIZON, workers=None, params=None, start=None, end=None):
+    """Weekly forecasts for ``items`` from the order ``lines``, as a long frame.
+
+    Columns: Item, Week (Monday of the forecast week), Forecast, Model.
+    Also returns the updated ARIMA parameters. ``start``/``end`` fix the
+    history window (see ``demand_matrix``).
+    """
+    items = list(items)
+    matrix, weeks = demand_matrix(lines, items, start, end)
+    forecasts, models, params = forecast_matrix(matrix, items, horizon, workers, params)
+    next_week = (weeks[-1] if len(weeks) else pd.Timestamp(bucket_start([pd.Timestamp.today()], 'Weekly')[0])) + pd.Timedelta(days=7)
+    horizon_weeks = pd.date_range(next_week, periods=horizon, freq='7D')
+    result = pd.DataFrame({
+        'Item': np.repeat(np.asarray(items, dtype=object), horizon),
+        'Week': np.tile(horizon_weeks.to_numpy(), len(items)),
+        'Forecast': forecasts.ravel().astype(np.float32),
+        'Model': np.repeat(models, horizon),
+    })
+    return result, params
+
+
+def run(horizon=HORIZON, workers=None, model_dir=MODEL_DIR, output_path=FORECASTS_PATH, full=False):
+    """Nightly job: refit the stale SKUs (every SKU with ``full``) and update the forecast store."""
+    from app.utils.forecast_store import refresh  # the store is built on this module
+
+    started = time.perf_counter()
+    items = load_inventory_index().items if full else None
+    result = refresh(items, horizon, workers, model_dir, output_path)
+    counts = result.drop_duplicates('Item')['Model'].value_counts().to_dict()
+    print(f"Forecast {result['Item'].nunique()} items ({counts}) in {time.perf_counter() - started:.1f}s -> {output_path}")
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Forecast weekly demand for every inventory SKU.")
+    parser.add_argument('--horizon', type=int, default=HORIZON, help="weeks to forecast")
+    parser.add_argument('--workers', type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument('--full', action='store_true', help="refit every SKU, not only the stale ones")
+    args = parser.parse_args()
+    run(horizon=args.horizon, workers=args.workers, full=args.full)
@@ -0,0 +1,69 @@
+"""Item-keyed index over the inventory for price and form lookups.
+
+Looking a price up with ``inventory_df[inventory_df['Item'] == item]`` scans
+all ~11k inventory rows for every item added to an order. ``InventoryIndex``
+maps each item name to its row once, so single lookups are a dict access and
+whole order sheets are priced with one vectorized ``get_indexer`` call. The
+index is built once per version of inventory.csv and shared by all sessions.
+"""
+import numpy as np
+import pandas as pd
+
+from app.utils.data_access import INVENTORY_PATH, cached, load_inventory
+
+
+class InventoryIndex:
+    """Constant-time price/form lookup by item name."""
+
+    def __init__(self, inventory_df):
+        # Duplicate names keep their first row, as the old `.values[0]` lookup did
+        unique = inventory_df.drop_duplicates('Item', keep='first')
+        self.items = pd.Index(unique['Item'])
+        self.prices = unique['Price'].to_numpy(dtype=float)
+        self.forms = unique['Form'].fillna('').to_numpy(dtype=object)
+        self._positions = {item: position for position, item in enumerate(self.items)}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self._positions
+
+    def price(self, item):
+        """Price of ``item``; raises KeyError for an unknown item."""
+        return float(self.prices[self._positions[item]])
+
+    def form(self, item):
+        """Dispensing form of ``item`` (Pcs, Tab, Btl, ...); raises KeyError for an unknown item."""
+        return self.forms[self._positions[item]]
+
+    def lookup(self, items):
+        """Return Form and Price for a sequence of items in one call.
+
+        The result is aligned with ``items``; unknown items get an empty Form,
+        a NaN Price and ``Known`` set to False.
+        """
+        positions = self.items.get_indexer(pd.Index(items))
+        known = positions >= 0
+        forms = np.full(len(positions), '', dtype=object)
+        prices = np.full(len(positions), np.nan)
+        forms[known] = self.forms[positions[known]]
+        prices[known] = self.prices[positions[known]]
+        return pd.DataFrame({'Item': list(items), 'Form': forms, 'Price': prices, 'Known': known})
+
+    def price_lines(self, lines):
+        """Price a frame of order lines (Item, QuantityOrdered, QuantityFulfilled) in one vectorized pass.
+
+        Returns a copy with Price, OrderValue, ValueActualized and RevenueLost filled in.
+        """
+        priced = lines.copy()
+        priced['Price'] = self.lookup(priced['Item']).Price.to_numpy()
+        priced['OrderValue'] = priced['QuantityOrdered'] * priced['Price']
+        priced['ValueActualized'] = priced['QuantityFulfilled'] * priced['Price']
+        priced['RevenueLost'] = priced['OrderValue'] - priced['ValueActualized']
+        return priced
+
+
+def load_inventory_index(path=INVENTORY_PATH):
+    """Shared ``InventoryIndex`` for the current version of inventory.csv."""
+    return cached("inventory_index", path, lambda p: InventoryIndex(load_inventory(p)))
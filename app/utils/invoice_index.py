@@ -0,0 +1,156 @@
+"""Persistent index of invoice numbers already in the order history.
+
+The tracker used to build ``set(df['InvoiceNumber'])`` from data.csv on every
+rerun just to reject duplicate invoices. The invoice numbers now live in a
+small append-only sidecar file (one per line) that the commit queue extends
+whenever it saves an order. Each process keeps the numbers in memory and picks
+up lines appended by other processes by reading only the new bytes, so
+checking an invoice is a set lookup that never touches the order history.
+
+The sidecar is built from data.csv once, when it does not exist yet. After
+hand edits to data.csv, call ``rebuild()`` to rebuild it.
+
+For very large histories the index can keep a Bloom filter in memory instead
+of the full set (``invoice_index.bloom_capacity`` in config/config.yaml). A negative answer from the filter is
+final. Only the rare positive answers are confirmed by scanning the sidecar.
+"""
+import hashlib
+import math
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app.utils.config import setting
+from app.utils.data_access import DATA_DIR, ORDERS_PATH
+
+INVOICE_INDEX_PATH = f"{DATA_DIR}/invoices.idx"
+
+
+def normalize_invoice(invoice_number):
+    """Canonical text form of an invoice number, as stored in the index."""
+    return str(invoice_number).strip()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(int(capacity), 1)
+        self.num_bits = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= np.uint8(1 << (position & 7))
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class InvoiceIndex:
+    """Set of saved invoice numbers, persisted in an append-only sidecar file."""
+
+    def __init__(self, path=INVOICE_INDEX_PATH, orders_path=ORDERS_PATH, bloom_capacity=None, bloom_error_rate=0.01):
+        self.path = path
+        self.orders_path = orders_path
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._offset = 0
+        if self.bloom_capacity:
+            self._members = BloomFilter(self.bloom_capacity, self.bloom_error_rate)
+        else:
+            self._members = set()
+
+    def rebuild(self):
+        """Rebuild the sidecar from the InvoiceNumber column of the order history."""
+        try:
+            invoices = pd.read_csv(self.orders_path, usecols=['InvoiceNumber'], dtype=str)['InvoiceNumber']
+            invoices = invoices.dropna().map(normalize_invoice).drop_duplicates()
+        except FileNotFoundError:
+            invoices = pd.Series([], dtype=str)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.writelines(f"{invoice}\n" for invoice in invoices)
+        os.replace(tmp_path, self.path)
+        with self._lock:
+            self._reset()
+
+    def refresh(self):
+        """Load invoice numbers appended to the sidecar since the last call."""
+        if not os.path.exists(self.path):
+            self.rebuild()
+        with self._lock:
+            size = os.path.getsize(self.path)
+            if size < self._offset:
+                # Truncated by a rolled-back commit or rebuilt: reload from the start
+                self._reset()
+            if size == self._offset:
+                return
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read(size - self._offset)
+            end = data.rfind(b'\n') + 1
+            for line in data[:end].decode().splitlines():
+                if line:
+                    self._members.add(line)
+            self._offset += end
+
+    def _scan_sidecar(self, invoice_number):
+        with open(self.path) as f:
+            return any(line.rstrip('\n') == invoice_number for line in f)
+
+    def __contains__(self, invoice_number):
+        invoice_number = normalize_invoice(invoice_number)
+        self.refresh()
+        if invoice_number not in self._members:
+            return False
+        if isinstance(self._members, set):
+            return True
+        return self._scan_sidecar(invoice_number)
+
+    def add(self, invoice_numbers):
+        """Persist new invoice numbers. Callers must hold the commit lock."""
+        lines = "".join(f"{normalize_invoice(invoice)}\n" for invoice in invoice_numbers)
+        if not lines:
+            return
+        self.refresh()
+        with open(self.path, 'a') as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self.refresh()
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def load_invoice_index(path=INVOICE_INDEX_PATH, orders_path=ORDERS_PATH, bloom_capacity=None, bloom_error_rate=None):
+    """Process-wide ``InvoiceIndex`` for ``path``, shared by all sessions.
+
+    The Bloom filter options default to ``invoice_index.bloom_capacity`` and
+    ``invoice_index.bloom_error_rate`` in config/config.yaml (no filter unless
+    a capacity is set).
+    """
+    if bloom_capacity is None:
+        bloom_capacity = setting('invoice_index', 'bloom_capacity')
+    if bloom_error_rate is None:
+        bloom_error_rate = setting('invoice_index', 'bloom_error_rate', 0.01)
+    key = (path, bloom_capacity, bloom_error_rate)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = InvoiceIndex(path, orders_path, bloom_capacity, bloom_error_rate)
+        return _indexes[key]
@@ -0,0 +1,397 @@
+"""Bulk import of sales-invoice PDFs into the order history.
+
+Invoices exported from the sales system (see ``SalesInvoice.pdf``) list their
+line items in a fixed ``Description Form Price Disc Tax Qty Total`` table that
+can run over several pages. The invoice number, date and customer are printed
+once, on the first page. ``ingest`` imports a directory of them:
+
+* pages are extracted independently across a process pool. Only a bounded
+  window of pages is in flight at a time, so a directory of hundreds of
+  invoices is streamed rather than loaded into memory;
+* each extracted page is written to a per-invoice checkpoint under
+  ``CHECKPOINT_DIR`` (keyed by the file's content hash), so an interrupted run
+  resumes where it stopped and never extracts a page twice;
+* a page whose extraction takes longer than ``PAGE_TIMEOUT`` marks its file as
+  an error, so one malformed PDF cannot stall the import;
+* once all pages of an invoice are in, its rows are normalized to the line-item
+  schema and validated: every table line must parse, quantities must be
+  positive, the line total must equal price x quantity, and the number of
+  rows must match the invoice's own
+  "Showing: n of n" count. A valid invoice goes to the commit queue as one
+  order, so the usual duplicate-invoice check and all-or-nothing write apply.
+  A rejected invoice is left uncommitted with its reasons in the checkpoint
+  and is validated again on the next run. Descriptions that are not inventory
+  item names are resolved with the product matcher when it is confident
+  (``app.utils.product_matcher``); the rest are imported as printed and
+  listed in the checkpoint for review.
+
+Rows are read from the PDF text layer with pypdf (installed with camelot),
+which is enough for these generated invoices and needs no Ghostscript or
+OpenCV rendering. Invoiced quantities are recorded as both ordered and
+fulfilled, and the price is the unit price actually charged (Total / Qty).
+
+Run with ``python -m app.utils.invoice_ingest <directory>``; pages call
+``ingest_async`` so the import runs in a background thread.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+import pandas as pd
+
+from app.utils.data_access import CACHE_DIR, DATA_DIR
+from app.utils.inventory_index import load_inventory_index
+from app.utils.kpis import order_metrics
+from app.utils.product_matcher import load_product_matcher
+
+INBOX_DIR = f"{DATA_DIR}/invoices"
+CHECKPOINT_DIR = f"{CACHE_DIR}/invoice_ingest"
+CHECKPOINT_VERSION = 1  # bump when the page parser changes, to re-extract
+PAGES_IN_FLIGHT = 4  # per worker
+PAGE_TIMEOUT = 120  # seconds to extract one page before its file is given up on
+COMMIT_TIMEOUT = 300  # seconds to wait for the commit queue to acknowledge an invoice
+
+_TABLE_HEADER = re.compile(r"^Description\s+Form\s+Price\s+Disc\s+Tax\s+Qty\s+Total")
+_NUMBER = r"\d[\d,]*(?:\.\d+)?"
+_ROW = re.compile(
+    rf"^(?P<item>.+?)\s+(?P<price>{_NUMBER})\s+(?P<disc>\S+)\s+(?P<tax>\S+)\s+(?P<qty>{_NUMBER})\s+(?P<total>{_NUMBER})$"
+)
+_INVOICE_NUMBER = re.compile(r"^#\s*(\S+)$")
+_INVOICE_DATE = re.compile(r"^(\d{2}-[A-Za-z]{3}-\d{4})\b")
+_SHOWING = re.compile(r"^Showing:\s*(\d+)\s+of\s+(\d+)")
+_TABLE_END = re.compile(r"^(Showing:|Sent\b|Subtotal:)")
+# Dispensing forms printed between the description and the price
+FORMS = {'Pack', 'Btl', 'Unit', 'Pcs', 'Single', 'Tab', 'Tube', 'Box', 'Sachet', 'Vial', 'Amp', 'Roll', 'Pair', 'Set'}
+
+_reader = (None, None)  # (path, PdfReader) last opened in this worker process
+_status_lock = threading.Lock()
+_status = {"running": False, "files": 0, "committed": 0, "duplicates": 0, "rejected": 0, "errors": 0}
+
+
+def _to_number(text):
+    return float(text.replace(',', ''))
+
+
+def _page_text(path, page_number):
+    global _reader
+    from pypdf import PdfReader
+
+    if _reader[0] != path:
+        _reader = (path, PdfReader(path))
+    return _reader[1].pages[page_number].extract_text() or ''
+
+
+def parse_page(text):
+    """Line-item rows and any invoice details printed on one page of text."""
+    rows, unparsed = [], []
+    details = {}
+    in_table = False
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    for position, line in enumerate(lines):
+        if _TABLE_HEADER.match(line):
+            in_table = True
+            continue
+        if in_table and _TABLE_END.match(line):
+            in_table = False
+        if in_table:
+            match = _ROW.match(line)
+            if match is None:
+                unparsed.append(line)
+                continue
+            item = match['item']
+            words = item.rsplit(' ', 1)
+            form = ''
+            if len(words) == 2 and words[1] in FORMS:
+                item, form = words
+            rows.append({
+                'Item': item.strip(),
+                'Form': form,
+                'ListPrice': _to_number(match['price']),
+                'Discount': match['disc'],
+                'Qty': _to_number(match['qty']),
+                'Total': _to_number(match['total']),
+            })
+            continue
+        if (showing := _SHOWING.match(line)) is not None:
+            details['expected_lines'] = int(showing[2])
+        elif (number := _INVOICE_NUMBER.match(line)) is not None and 'invoice_number' not in details:
+            details['invoice_number'] = number[1]
+        elif (date := _INVOICE_DATE.match(line)) is not None and 'order_date' not in details:
+            details['order_date'] = datetime.strptime(date[1], '%d-%b-%Y').date().isoformat()
+        elif line == 'To' and position + 1 < len(lines):
+            details['customer'] = lines[position + 1]
+    return {'rows': rows, 'unparsed': unparsed, 'details': details}
+
+
+def extract_page(path, page_number):
+    """Worker task: parse one page of an invoice PDF."""
+    return parse_page(_page_text(path, page_number))
+
+
+def _file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _page_count(path):
+    from pypdf import PdfReader
+
+    return len(PdfReader(path).pages)
+
+
+class Checkpoint:
+    """Extracted pages and commit state of one invoice file, persisted after every page."""
+
+    def __init__(self, path, checkpoint_dir=CHECKPOINT_DIR):
+        self.source = path
+        self.path = f"{checkpoint_dir}/{_file_hash(path)}.json"
+        self.state = None
+        try:
+            with open(self.path) as f:
+                self.state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+        if self.state is None or self.state.get('version') != CHECKPOINT_VERSION:
+            self.state = {'version': CHECKPOINT_VERSION, 'file': os.path.basename(path),
+                          'pages': _page_count(path), 'done': {}, 'status': 'pending'}
+            self.save()
+
+    def missing_pages(self):
+        return [page for page in range(self.state['pages']) if str(page) not in self.state['done']]
+
+    def add_page(self, page_number, result):
+        self.state['done'][str(page_number)] = result
+        self.save()
+
+    def pages(self):
+        return [self.state['done'][str(page)] for page in range(self.state['pages'])]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.tmp", 'w') as f:
+            json.dump(self.state, f)
+        os.replace(f"{self.path}.tmp", self.path)
+
+
+def build_order(pages):
+    """Normalize the extracted pages of one invoice into ``(order_lines, order_row, errors)``."""
+    details = {}
+    for page in pages:
+        details = {**page['details'], **details}  # the first page that prints a field wins
+    rows = [row for page in pages for row in page['rows']]
+    errors = [f"Unreadable line: {line}" for page in pages for line in page['unparsed']]
+    for field in ('invoice_number', 'order_date', 'customer'):
+        if field not in details:
+            errors.append(f"No {field.replace('_', ' ')} found")
+    if not rows:
+        errors.append("No line items found")
+    if 'expected_lines' in details and details['expected_lines'] != len(rows):
+        errors.append(f"Read {len(rows)} line items, the invoice lists {details['expected_lines']}")
+
+    lines = pd.DataFrame(rows, columns=['Item', 'Form', 'ListPrice', 'Discount', 'Qty', 'Total'])
+    errors += [f"Quantity is not positive: {item}" for item in lines.loc[~(lines['Qty'] > 0), 'Item']]
+    undiscounted = lines['Discount'] == '-'
+    mismatched = undiscounted & ((lines['ListPrice'] * lines['Qty'] - lines['Total']).abs() > 0.011)
+    errors += [f"Total does not match price x quantity: {item}" for item in lines.loc[mismatched, 'Item']]
+    if errors:
+        return None, None, errors
+
+    quantity = lines['Qty'].round().astype(int)
+    order_lines = pd.DataFrame({
+        'InvoiceNumber': details['invoice_number'],
+        'OrderDate': details['order_date'],
+        'Customer': details['customer'],
+        'Item': lines['Item'],
+        'QuantityOrdered': quantity,
+        'QuantityFulfilled': quantity,
+        'Price': (lines['Total'] / lines['Qty']).round(4),
+        'OrderValue': lines['Total'],
+        'ValueActualized': lines['Total'],
+        'RevenueLost': 0.0,
+    })
+    order_row = {
+        'OrderDate': details['order_date'],
+        'InvoiceNumber': details['invoice_number'],
+        'Customer': details['customer'],
+        **order_metrics(order_lines),
+    }
+    return order_lines, order_row, []
+
+
+def _record(key, count=1):
+    with _status_lock:
+        _status[key] += count
+
+
+def _commit_invoice(checkpoint, inventory_index, matcher):
+    from app.utils.commit_queue import submit_order  # starts the shared writer thread
+
+    order_lines, order_row, errors = build_order(checkpoint.pages())
+    if errors:
+        checkpoint.state.update(status='rejected', errors=errors)
+    else:
+        known = inventory_index.lookup(order_lines['Item'])['Known'].to_numpy()
+        # Map printed descriptions to inventory names where the match is confident
+        matches = matcher.best(order_lines.loc[~known, 'Item'].unique())
+        resolved = matches.dropna(subset=['Item'])
+        order_lines['Item'] = order_lines['Item'].replace(dict(zip(resolved['Name'], resolved['Item'])))
+        checkpoint.state['matched_items'] = {
+            name: [item, round(score, 3)] for name, item, score in resolved.itertuples(index=False)
+        }
+        checkpoint.state['unknown_items'] = matches.loc[matches['Item'].isna(), 'Name'].tolist()
+        try:
+            ack = submit_order(order_lines, order_row).result(timeout=COMMIT_TIMEOUT)
+        except TimeoutError:
+            # The commit may still land; the next run then finds the invoice as a duplicate
+            ack = {'committed': False, 'error': f"No acknowledgement from the commit queue within {COMMIT_TIMEOUT}s"}
+        if ack['committed']:
+            checkpoint.state.update(status='committed', invoice_number=ack['invoice_number'], errors=[])
+        elif 'batch' not in ack and 'already exists' in ack.get('error', ''):
+            checkpoint.state.update(status='duplicate', invoice_number=ack['invoice_number'], errors=[ack['error']])
+        else:
+            checkpoint.state.update(status='rejected', errors=[ack['error']])
+    checkpoint.save()
+    _record({'committed': 'committed', 'duplicate': 'duplicates'}.get(checkpoint.state['status'], 'rejected'))
+    return checkpoint.state
+
+
+def ingest(directory=INBOX_DIR, workers=None, checkpoint_dir=CHECKPOINT_DIR):
+    """Import every invoice PDF in ``directory``; returns the final checkpoint state of each file."""
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory) if name.lower().endswith('.pdf')
+    )
+    inventory_index = load_inventory_index()
+    matcher = load_product_matcher()
+    with _status_lock:
+        _status.update(files=len(paths), committed=0, duplicates=0, rejected=0, errors=0)
+
+    results = {}
+    checkpoints = {}
+    remaining = {}  # path -> pages still being extracted
+
+    def tasks():
+        for path in paths:
+            try:
+                checkpoint = Checkpoint(path, checkpoint_dir)
+            except Exception as e:
+                results[path] = {'file': os.path.basename(path), 'status': 'error', 'errors': [str(e)]}
+                _record('errors')
+                continue
+            if checkpoint.state['status'] in ('committed', 'duplicate'):
+                results[path] = checkpoint.state
+                _record('committed' if checkpoint.state['status'] == 'committed' else 'duplicates')
+                continue
+            checkpoints[path] = checkpoint
+            missing = checkpoint.missing_pages()
+            if not missing:
+                results[path] = _commit_invoice(checkpoint, inventory_index, matcher)
+                continue
+            remaining[path] = len(missing)
+            for page_number in missing:
+                yield path, page_number
+
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers)
+    hung = False
+    try:
+        window = PAGES_IN_FLIGHT * workers
+        pending = {}
+        started = {}  # when each page was first seen running
+        task_iter = tasks()
+        while True:
+            for path, page_number in task_iter:
+                pending[pool.submit(extract_page, path, page_number)] = (path, page_number)
+                if len(pending) >= window:
+                    break
+            if not pending:
+                break
+            done, _ = wait(pending, timeout=PAGE_TIMEOUT / 4, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future, (path, page_number) in list(pending.items()):
+                if future in done or future not in pending or not future.running():
+                    continue  # pages queued behind others are not timed yet
+                if now - started.setdefault(future, now) < PAGE_TIMEOUT:
+                    continue
+                # Extraction has hung: give up on the file and stop waiting for the page
+                del pending[future]
+                started.pop(future, None)
+                hung = True
+                if path not in results:
+                    results[path] = {'file': os.path.basename(path), 'status': 'error',
+                                     'errors': [f"Page {page_number + 1}: no result within {PAGE_TIMEOUT}s"]}
+                    checkpoints.pop(path, None)
+                    _record('errors')
+                # Its other pages may be queued behind the hung one and would never start
+                for other, (other_path, _) in list(pending.items()):
+                    if other_path == path and other not in done:
+                        other.cancel()
+                        del pending[other]
+                        started.pop(other, None)
+            for future in done:
+                path, page_number = pending.pop(future)
+                started.pop(future, None)
+                if path in results:
+                    continue  # another page of this file already failed
+                try:
+                    checkpoints[path].add_page(page_number, future.result())
+                except Exception as e:
+                    results[path] = {'file': os.path.basename(path), 'status': 'error',
+                                     'errors': [f"Page {page_number + 1}: {e}"]}
+                    _record('errors')
+                    continue
+                remaining[path] -= 1
+                if remaining[path] == 0:
+                    results[path] = _commit_invoice(checkpoints.pop(path), inventory_index, matcher)
+    finally:
+        # A worker stuck on a page cannot be stopped by shutdown, so its processes are ended instead
+        processes = list((pool._processes or {}).values()) if hung else []
+        pool.shutdown(wait=not hung, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+    return [results[path] for path in paths]
+
+
+def ingest_async(directory=INBOX_DIR, workers=None):
+    """Start ``ingest`` in a background thread unless one is already running. Returns False if it was."""
+    with _status_lock:
+        if _status['running']:
+            return False
+        _status['running'] = True
+
+    def run():
+        try:
+            ingest(directory, workers)
+        except Exception:
+            _record('errors')
+        finally:
+            with _status_lock:
+                _status['running'] = False
+
+    threading.Thread(target=run, name="invoice-ingest", daemon=True).start()
+    return True
+
+
+def ingest_status():
+    """Progress counters of the current (or last) import in this process."""
+    with _status_lock:
+        return dict(_status)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Import a directory of sales-invoice PDFs.")
+    parser.add_argument('directory', nargs='?', default=INBOX_DIR)
+    parser.add_argument('--workers', type=int, default=None, help="process pool size (default: CPU count)")
+    args = parser.parse_args()
+    for result in ingest(args.directory, args.workers):
+        matched = [f"Matched: {name} -> {item} ({score})" for name, (item, score) in result.get('matched_items', {}).items()]
+        unknown = [f"Not in inventory: {item}" for item in result.get('unknown_items', [])]
+        print(f"{result['file']}: {result['status']}", *result.get('errors', []), *matched, *unknown, sep='\n  ')
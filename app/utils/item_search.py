@@ -0,0 +1,98 @@
+"""Server-side search over inventory item names for the order form picker.
+
+The item selectbox used to receive all ~11k inventory names on every rerun.
+``ItemSearchIndex`` ranks items for a typed query so the picker only ships a
+short candidate list. It combines:
+
+* prefix matches on the whole name and on every word of it, so codes such as
+  ``00110-DR`` and words such as ``VARICOSE`` both match as you type
+  (sorted keys searched with ``bisect``, equivalent to walking a prefix trie);
+* trigram overlap for fuzzy/infix matches (typos, missing words, partial
+  strengths), scored with one ``np.bincount`` over the posting lists.
+
+The index is built once per version of inventory.csv and shared by all sessions.
+"""
+import bisect
+import re
+
+import numpy as np
+
+from app.utils.data_access import INVENTORY_PATH, cached
+from app.utils.inventory_index import load_inventory_index
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text):
+    """Upper-case and collapse whitespace, as item names are stored."""
+    return _SPACES.sub(' ', str(text)).strip().upper()
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ItemSearchIndex:
+    """Prefix plus trigram index over item names."""
+
+    def __init__(self, items):
+        self.items = np.asarray(list(items), dtype=object)
+        keys = [normalize(item) for item in self.items]
+
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self._name_keys = [keys[i] for i in order]
+        self._name_ids = np.asarray(order, dtype=np.int32)
+
+        words = sorted((word, item_id) for item_id, key in enumerate(keys) for word in set(key.split(' ')))
+        self._word_keys = [word for word, _ in words]
+        self._word_ids = np.asarray([item_id for _, item_id in words], dtype=np.int32)
+
+        postings = {}
+        for item_id, key in enumerate(keys):
+            for gram in trigrams(key):
+                postings.setdefault(gram, []).append(item_id)
+        self._postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.items)
+
+    @staticmethod
+    def _prefix_range(keys, prefix):
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + '\uffff')
+        return start, end
+
+    def search(self, query, limit=20):
+        """Return up to ``limit`` item names ranked by how well they match ``query``."""
+        query = normalize(query)
+        if not query or not len(self):
+            return []
+        scores = np.zeros(len(self), dtype=np.float32)
+
+        # Whole-name prefix scores highest, then the share of query words
+        # that are a prefix of some word in the name
+        start, end = self._prefix_range(self._name_keys, query)
+        scores[self._name_ids[start:end]] += 2.0
+        words = query.split(' ')
+        for word in words:
+            start, end = self._prefix_range(self._word_keys, word)
+            # Repeated ids in a fancy-indexed += are only counted once per item
+            scores[self._word_ids[start:end]] += 1.0 / len(words)
+
+        # Share of the query's trigrams found in the name
+        grams = [self._postings[gram] for gram in trigrams(query) if gram in self._postings]
+        if grams:
+            hits = np.bincount(np.concatenate(grams), minlength=len(self))
+            scores += hits / max(len(trigrams(query)), 1)
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        # Best score first; ties in alphabetical order
+        ranked = sorted(candidates, key=lambda item_id: (-scores[item_id], self.items[item_id]))
+        return [self.items[item_id] for item_id in ranked]
+
+
+def load_item_search_index(path=INVENTORY_PATH):
+    """Shared ``ItemSearchIndex`` for the current version of inventory.csv."""
+    return cached("item_search", path, lambda p: ItemSearchIndex(load_inventory_index(p).items))
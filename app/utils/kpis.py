@@ -0,0 +1,111 @@
+"""Fulfillment and revenue KPIs computed in one vectorized pass.
+
+The same metrics used to be written out three times (the tracker's
+``calculate_order_metrics``, ``prepare_fulfillment_metrics`` in utils and
+inline in the dashboard), each building a filtered copy of the frame for every
+count. Here every line is turned into a handful of NumPy arrays once. The
+per-line flags and values are summed (``np.bincount`` with weights for grouped
+output), and the metrics are derived from those sums. This works for the
+whole frame or for any grouping (customer, item, invoice or time bucket) in
+a single call.
+
+The metric names match the columns of data_tables.csv.
+"""
+import numpy as np
+import pandas as pd
+
+METRICS = [
+    "ItemCount", "percentage_fully_fulfilled", "percentage_partially_fulfilled",
+    "percentage_not_fulfilled", "quantity_fulfill_rate", "OrderValue",
+    "RevenueActualized", "RevenueLost", "percent_revenue_actualized",
+]
+
+
+def _line_columns(df):
+    """Per-line arrays that every metric is a ratio or sum of."""
+    ordered = df['QuantityOrdered'].to_numpy(dtype=float)
+    fulfilled = df['QuantityFulfilled'].to_numpy(dtype=float)
+    if 'OrderValue' in df and 'ValueActualized' in df:
+        order_value = df['OrderValue'].to_numpy(dtype=float)
+        value_actualized = df['ValueActualized'].to_numpy(dtype=float)
+    else:
+        price = df['Price'].to_numpy(dtype=float)
+        order_value = ordered * price
+        value_actualized = fulfilled * price
+    # Missing quantities or prices (NaN) add nothing to the sums, as in a pandas sum
+    return [
+        np.ones(len(ordered)),
+        fulfilled == ordered,
+        (fulfilled > 0) & (fulfilled < ordered),
+        fulfilled == 0,
+        np.nan_to_num(ordered),
+        np.nan_to_num(fulfilled),
+        np.nan_to_num(order_value),
+        np.nan_to_num(value_actualized),
+    ]
+
+
+def _ratio(numerator, denominator):
+    """numerator / denominator * 100, with 0 where the denominator is 0."""
+    numerator, denominator = np.asarray(numerator, dtype=float), np.asarray(denominator, dtype=float)
+    return np.divide(numerator * 100, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+
+
+def _metrics_from_sums(sums):
+    items, fully, partially, not_fulfilled, ordered, fulfilled, order_value, value_actualized = sums
+    return {
+        "ItemCount": items.astype(int),
+        "percentage_fully_fulfilled": _ratio(fully, items),
+        "percentage_partially_fulfilled": _ratio(partially, items),
+        "percentage_not_fulfilled": _ratio(not_fulfilled, items),
+        "quantity_fulfill_rate": _ratio(fulfilled, ordered),
+        "OrderValue": order_value,
+        "RevenueActualized": value_actualized,
+        "RevenueLost": order_value - value_actualized,
+        "percent_revenue_actualized": _ratio(value_actualized, order_value),
+    }
+
+
+def order_metrics(df):
+    """Aggregate fulfillment and revenue metrics over all lines of ``df``."""
+    sums = np.array([column.sum() for column in _line_columns(df)], dtype=float)
+    return {name: value.item() for name, value in _metrics_from_sums(sums).items()}
+
+
+def grouped_order_metrics(df, by):
+    """Metrics per group, one row per key, in a single pass.
+
+    ``by`` is a column name, a list of column names, or an array/Series of
+    keys aligned with ``df`` (for example bucketed order dates).
+    """
+    if isinstance(by, list):
+        codes, uniques = pd.MultiIndex.from_frame(df[by]).factorize(sort=True)
+    else:
+        keys = df[by] if isinstance(by, str) else pd.Series(by, index=df.index)
+        codes, uniques = pd.factorize(keys, sort=True)
+    valid = codes >= 0  # missing keys are dropped, as in groupby
+    size = len(uniques)
+    sums = np.vstack([
+        np.bincount(codes[valid], weights=column[valid].astype(float), minlength=size)
+        for column in _line_columns(df)
+    ])
+    result = pd.DataFrame(_metrics_from_sums(sums), index=uniques)
+    if isinstance(by, str):
+        result.index.name = by
+    return result
+
+
+def fulfillment_kpis(df):
+    """Dashboard KPI summary: fulfillment shares and revenue totals for ``df``."""
+    metrics = order_metrics(df)
+    return {
+        'item_count_total': metrics["ItemCount"],
+        'percent_fully_fulfilled': metrics["percentage_fully_fulfilled"],
+        'percent_partially_fulfilled': metrics["percentage_partially_fulfilled"],
+        'percent_not_fulfilled': metrics["percentage_not_fulfilled"],
+        'quantity_fulfill_rate': metrics["quantity_fulfill_rate"],
+        'total_order_value': metrics["OrderValue"],
+        'value_actualized': metrics["RevenueActualized"],
+        'revenue_lost': metrics["RevenueLost"],
+        'percent_revenue_actualized': metrics["percent_revenue_actualized"],
+    }
@@ -0,0 +1,50 @@
+"""Deferred imports of heavy libraries.
+
+Importing seaborn costs well over a second and matplotlib, altair and scipy a
+few hundred milliseconds each. A page that imports them at the top pays for
+that on its first render even when the chart that needs them is never shown.
+``lazy_import`` returns a stand-in module that performs the real import the
+first time one of its attributes is used::
+
+    plt = lazy_import("matplotlib.pyplot")
+    ...
+    fig, ax = plt.subplots()  # matplotlib is imported here
+
+Once a library has been imported, the stand-in forwards to it at the cost of
+a dictionary lookup.
+"""
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Module stand-in that imports ``name`` on first attribute access."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_name'] = name
+
+    def _load(self):
+        module = importlib.import_module(self.__dict__['_lazy_name'])
+        # Later lookups find the attributes directly instead of going through __getattr__
+        self.__dict__.update(module.__dict__)
+        return module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        loaded = 'loaded' if self.__dict__['_lazy_name'] in sys.modules else 'not loaded'
+        return f"<lazy module '{self.__dict__['_lazy_name']}' ({loaded})>"
+
+
+def lazy_import(name):
+    """``name`` as a module whose import is deferred until it is used (the module itself if already imported)."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
@@ -0,0 +1,93 @@
+"""Append-only writes for the order history files.
+
+Saving an order used to read all of data.csv and data_tables.csv, concatenate
+the new rows and write both files back out, so every save cost O(history).
+The functions here append just the new line items and the new order-level row
+to the end of the existing files, which keeps a save O(order size) however
+long the history grows. The cached loaders in ``app.utils.data_access`` notice
+the append and parse only the new bytes.
+
+A full rewrite happens only when the new rows carry a column the file does not
+have yet, and it goes through a temp file plus rename.
+"""
+import csv
+import io
+import os
+
+import pandas as pd
+
+from app.utils.data_access import ORDERS_PATH, ORDER_TABLES_PATH
+
+
+def read_header(path):
+    """Return the column names in the first line of a CSV, or None if the file is missing or empty."""
+    try:
+        with open(path, newline='') as f:
+            first_line = f.readline()
+    except FileNotFoundError:
+        return None
+    if not first_line.strip():
+        return None
+    return next(csv.reader([first_line]))
+
+
+def _to_csv_text(rows, header):
+    buffer = io.StringIO()
+    rows.to_csv(buffer, index=False, header=header)
+    return buffer.getvalue()
+
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+def _write_all(path, text, mode):
+    # One write call per batch so concurrent readers never see half a row
+    with open(path, mode, newline='') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def rewrite_with_rows(path, rows):
+    """Rewrite ``path`` with ``rows`` appended, widening the header if needed.
+
+    Existing values are copied through as text so nothing is re-formatted.
+    """
+    existing = pd.read_csv(path, dtype=str, keep_default_na=False)
+    combined = pd.concat([existing, rows], ignore_index=True)
+    tmp_path = f"{path}.tmp"
+    _write_all(tmp_path, _to_csv_text(combined, header=True), 'w')
+    os.replace(tmp_path, path)
+
+
+def append_rows(path, rows):
+    """Append ``rows`` to the CSV at ``path`` without reading the existing rows.
+
+    Columns are aligned to the file's header; header columns missing from
+    ``rows`` are left blank. A missing file is created with a header.
+    """
+    if rows.empty:
+        return
+    header = read_header(path)
+    if header is None:
+        _write_all(path, _to_csv_text(rows, header=True), 'w')
+        return
+    if not set(rows.columns) <= set(header):
+        rewrite_with_rows(path, rows)
+        return
+    text = _to_csv_text(rows.reindex(columns=header), header=False)
+    if not _ends_with_newline(path):
+        text = '\n' + text
+    _write_all(path, text, 'a')
+
+
+def save_order(order_lines, order_row, orders_path=ORDERS_PATH, tables_path=ORDER_TABLES_PATH):
+    """Append an order's line items to data.csv and its KPI row to data_tables.csv."""
+    append_rows(orders_path, order_lines)
+    append_rows(tables_path, pd.DataFrame([order_row]))
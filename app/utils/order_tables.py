@@ -0,0 +1,197 @@
+"""Rebuild data_tables.csv from the line items in data.csv.
+
+The order-level table is written one row per save, so it could never be
+regenerated and it drifted whenever data.csv was corrected by hand.
+``build_order_tables`` derives every order row from the line items in one
+grouped pass over InvoiceNumber (``kpis.grouped_order_metrics``), and
+``refresh`` brings data_tables.csv in line with data.csv:
+
+* each invoice's lines are summarised by a digest (a hash of two sums over
+  the lines' row hashes, plain and re-hashed, so it does not depend on the
+  order of the lines), and the digests used by the last refresh are kept under
+  ``CACHE_DIR``. Only invoices whose digest changed, or that are new, are
+  recomputed; a full rebuild (``full=True``, or no digests yet) recomputes
+  every invoice;
+* recomputed rows that match the table already are left alone. When the only
+  difference is missing invoices, their rows are appended. Otherwise the file
+  is rewritten through a temp file plus rename, copying the unchanged rows
+  through as text. A full rebuild also drops rows whose invoice has no lines;
+* the table holds one row per invoice. When an invoice has several rows (a
+  save that was repeated), the first is kept and the others are removed by
+  the rewrite; they are counted as ``duplicates``, not as ``dropped``.
+
+The files are read and compared without blocking saves. Only the write takes
+the commit queue's file lock: if data.csv or data_tables.csv changed since
+they were read, the refresh starts over, so it never overwrites a saved
+order. Run it with ``python -m app.utils.order_tables``
+(add ``--full`` to rebuild everything).
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.utils.commit_queue import LOCK_PATH, file_lock
+from app.utils.data_access import CACHE_DIR, ORDER_TABLES_PATH, ORDERS_PATH, file_signature, read_typed_csv
+from app.utils.kpis import METRICS, grouped_order_metrics
+from app.utils.order_store import append_rows, read_header
+from app.utils.schema import LINE_ITEMS, STORED_LINE_COLUMNS, parse_order_dates
+
+TABLE_COLUMNS = ['OrderDate', 'InvoiceNumber', 'Customer', *METRICS]
+DIGESTS_PATH = f"{CACHE_DIR}/order_tables.digests.parquet"
+
+
+def _keys(values):
+    """Invoice numbers as an object index (hash lookups on it are much faster than on arrow-backed strings)."""
+    return pd.Index(np.asarray(values, dtype=object).astype(str), dtype=object, name='InvoiceNumber')
+
+
+def build_order_tables(lines):
+    """One order-level row per InvoiceNumber of ``lines``: its first OrderDate and Customer plus the order metrics."""
+    metrics = grouped_order_metrics(lines, 'InvoiceNumber')
+    first = lines.groupby('InvoiceNumber', sort=True, observed=True)[['OrderDate', 'Customer']].first()
+    table = first.join(metrics).reset_index()
+    table['InvoiceNumber'] = _keys(table['InvoiceNumber'])
+    table['Customer'] = table['Customer'].astype(object)
+    table['OrderDate'] = pd.to_datetime(table['OrderDate']).dt.date
+    return table[TABLE_COLUMNS]
+
+
+def invoice_digests(lines):
+    """Per-invoice digest of its lines (order-independent), as a Series indexed by invoice number."""
+    row_hashes = pd.util.hash_pandas_object(lines[[c for c in STORED_LINE_COLUMNS if c in lines]], index=False)
+    row_hashes = row_hashes.to_numpy()
+    codes, invoices = pd.factorize(lines['InvoiceNumber'])
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]] & (sorted_codes >= 0))
+    if not len(starts):
+        return pd.Series(np.array([], dtype=np.uint64), index=_keys([]))
+    # Two sums, of the row hashes and of the hashes re-hashed: edits that cancel out in one do not in the other
+    sums = np.add.reduceat(row_hashes[order], starts)
+    mixed = np.add.reduceat(pd.util.hash_array(row_hashes)[order], starts)
+    digests = pd.util.hash_pandas_object(pd.DataFrame({'Sum': sums, 'Mixed': mixed}), index=False)
+    return pd.Series(digests.to_numpy(dtype=np.uint64), index=_keys(np.asarray(invoices)[sorted_codes[starts]]))
+
+
+def _load_digests(path):
+    try:
+        stored = pd.read_parquet(path)
+    except (FileNotFoundError, OSError, ValueError):
+        return None
+    return pd.Series(stored['Digest'].to_numpy(dtype=np.uint64), index=_keys(stored['InvoiceNumber']))
+
+
+def _save_digests(path, digests):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    digests.rename('Digest').reset_index().to_parquet(f"{path}.tmp", index=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def _same_rows(current, rebuilt):
+    """True where the text rows ``current`` (aligned with ``rebuilt``, NaN where absent) hold the same values."""
+    same = current['InvoiceNumber'].notna().to_numpy(copy=True)
+    dates = rebuilt['OrderDate'].to_numpy()
+    text_dates = current['OrderDate'].to_numpy(dtype=object)
+    same_date = text_dates == np.array([date.isoformat() for date in dates], dtype=object)
+    # Rows saved in the legacy date format are compared as dates
+    other = ~same_date & same
+    same_date[other] = parse_order_dates(pd.Series(text_dates[other])).dt.date.to_numpy() == dates[other]
+    same &= same_date
+    same &= current['Customer'].to_numpy(dtype=object) == rebuilt['Customer'].astype(str).to_numpy(dtype=object)
+    for metric in METRICS:
+        values = pd.to_numeric(current[metric], errors='coerce').to_numpy(dtype=float)
+        same &= np.isclose(values, rebuilt[metric].to_numpy(dtype=float), rtol=1e-9, atol=1e-6)
+    return same
+
+
+def _rewrite(path, existing, rebuilt, positions, keep):
+    """Write the ``keep`` rows of ``existing`` (text, as they are), with the ``rebuilt`` rows replacing the rows at
+    ``positions`` or, where that is -1, following them."""
+    header = read_header(path) or TABLE_COLUMNS
+    header = header + [column for column in TABLE_COLUMNS if column not in header]
+    keep = keep.copy()
+    keep[positions[positions >= 0]] = False
+    rows = existing[keep].reindex(columns=header)
+    rows['_position'] = np.flatnonzero(keep)
+    fresh = rebuilt.reindex(columns=header)
+    fresh['_position'] = np.where(positions >= 0, positions, len(existing))
+    combined = pd.concat([rows, fresh], ignore_index=True).sort_values('_position', kind='stable')
+    tmp_path = f"{path}.tmp"
+    combined.drop(columns='_position').to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _plan(full, orders_path, tables_path, digests_path):
+    """Read both files and work out the refresh: (counts, digests, rows to write or None if the table is current)."""
+    counts = {'invoices': 0, 'recomputed': 0, 'replaced': 0, 'appended': 0, 'dropped': 0, 'duplicates': 0}
+    lines = read_typed_csv(orders_path, LINE_ITEMS, columns=STORED_LINE_COLUMNS)
+    lines = lines[lines['InvoiceNumber'].notna()]
+    digests = invoice_digests(lines)
+    previous = None if full else _load_digests(digests_path)
+    if previous is None:
+        full, removed = True, digests.index[:0]
+        subset = lines
+    else:
+        changed = digests.index[digests.ne(previous.reindex(digests.index)).to_numpy()]
+        removed = previous.index.difference(digests.index)
+        subset = lines[lines['InvoiceNumber'].isin(changed)]
+    counts['invoices'] = len(digests)
+    if not full and subset.empty and removed.empty:
+        return counts, digests, None
+    rebuilt = build_order_tables(subset)
+    counts['recomputed'] = len(rebuilt)
+
+    if read_header(tables_path) is None:
+        existing = pd.DataFrame(columns=TABLE_COLUMNS)
+    else:
+        existing = pd.read_csv(tables_path, dtype=str, keep_default_na=False)
+    invoices = _keys(existing['InvoiceNumber'])
+    first = ~invoices.duplicated(keep='first')
+    keep = first & ~invoices.isin(removed)
+    if full:
+        keep &= invoices.isin(digests.index)
+    # Position of each rebuilt invoice's (first) row in the table, -1 for new invoices
+    positions = invoices[first].get_indexer(_keys(rebuilt['InvoiceNumber']))
+    positions = np.r_[np.flatnonzero(first), -1][positions]
+    current = existing.reindex(positions).reset_index(drop=True)
+    differs = ~_same_rows(current, rebuilt)
+    rebuilt, positions = rebuilt[differs], positions[differs]
+    counts['appended'] = int((positions < 0).sum())
+    counts['replaced'] = int((positions >= 0).sum())
+    counts['dropped'] = int((first & ~keep).sum())
+    counts['duplicates'] = int((~first).sum())
+    return counts, digests, (existing, rebuilt, positions, keep)
+
+
+def refresh(full=False, orders_path=ORDERS_PATH, tables_path=ORDER_TABLES_PATH, digests_path=DIGESTS_PATH,
+            lock_path=LOCK_PATH):
+    """Bring ``tables_path`` in line with the line items in ``orders_path``. Returns counts of what changed."""
+    while True:
+        signatures = file_signature(orders_path), file_signature(tables_path)
+        counts, digests, changes = _plan(full, orders_path, tables_path, digests_path)
+        with file_lock(lock_path):
+            if (file_signature(orders_path), file_signature(tables_path)) != signatures:
+                continue  # An order was saved since the files were read: plan again
+            if changes is not None:
+                existing, rebuilt, positions, keep = changes
+                if keep.all() and counts['replaced'] == 0:
+                    append_rows(tables_path, rebuilt)
+                else:
+                    _rewrite(tables_path, existing, rebuilt, positions, keep)
+            _save_digests(digests_path, digests)
+        return counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rebuild data_tables.csv from the line items in data.csv.")
+    parser.add_argument('--full', action='store_true', help="recompute every invoice, not only the changed ones")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    counts = refresh(full=args.full)
+    print(f"{counts['invoices']:,} invoices: {counts['recomputed']:,} recomputed, {counts['replaced']:,} rows "
+          f"replaced, {counts['appended']:,} appended, {counts['dropped']:,} dropped, "
+          f"{counts['duplicates']:,} duplicate rows removed "
+          f"in {time.perf_counter() - started:.1f}s -> {ORDER_TABLES_PATH}")
@@ -0,0 +1,153 @@
+"""Pareto (ABC) analysis over high-cardinality dimensions.
+
+Ranking 11k items by revenue lost used to mean grouping, fully sorting and
+charting every item on each rerun. ``pareto_table`` sums the metric per
+category with one ``np.bincount``. It then picks the ``top_n`` largest with
+``np.argpartition``, which is linear, and only sorts those few. The remaining
+tail is folded into a single "Other" row. The number of categories that make
+up 80% (class A) and 95% (classes A+B) of the total is found by widening the
+partial selection only as far as needed.
+
+``load_pareto`` caches each line's category code and metric value once per
+(dimension, metric) for the current version of data.csv, in date order. A
+date range is then a slice of those arrays (binary search on OrderDate), so
+any range costs one ``np.bincount`` over its lines, and the cache holds one
+entry per panel however many ranges are viewed.
+"""
+import numpy as np
+import pandas as pd
+
+from app.utils.data_access import ORDERS_PATH, cached, date_bounds, load_orders
+from app.utils.lazy import lazy_import
+from app.utils.schema import line_values
+
+alt = lazy_import("altair")  # only needed by pareto_chart
+
+TOP_N = 20
+CUTOFF = 80.0  # class A: the categories that make up this share of the total
+CLASS_B_CUTOFF = 95.0
+OTHER = 'Other'
+
+
+def _category_codes(keys):
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        return keys.cat.codes.to_numpy(), keys.cat.categories
+    return pd.factorize(keys)
+
+
+def _totals(codes, categories, values):
+    """Summed ``values`` per category of ``codes``, leaving out categories without lines."""
+    valid = codes >= 0
+    totals = np.bincount(codes[valid], weights=values[valid], minlength=len(categories))
+    used = np.bincount(codes[valid], minlength=len(categories)) > 0  # drop unobserved categories
+    return np.asarray(categories, dtype=object)[used], totals[used]
+
+
+def _category_totals(df, dimension, metric):
+    codes, categories = _category_codes(df[dimension])
+    values = np.nan_to_num(line_values(df, metric))  # revenue metrics are derived from the line's price
+    return _totals(codes, categories, values)
+
+
+def _top(totals, k):
+    """Positions of the ``k`` largest totals, largest first."""
+    k = min(k, len(totals))
+    if k == 0:
+        return np.array([], dtype=np.int64)
+    if k < len(totals):
+        top = np.argpartition(-totals, k - 1)[:k]
+    else:
+        top = np.arange(len(totals))
+    return top[np.argsort(-totals[top], kind='stable')]
+
+
+def _count_to_share(totals, share, start):
+    """Number of largest categories whose sum reaches ``share`` percent of the total."""
+    grand_total = totals.sum()
+    if grand_total <= 0:
+        return 0
+    k = max(start, 1)
+    while True:
+        cumulative = np.cumsum(totals[_top(totals, k)]) / grand_total * 100
+        reached = np.flatnonzero(cumulative >= share - 1e-9)
+        if len(reached) or k >= len(totals):
+            return int(reached[0]) + 1 if len(reached) else len(totals)
+        k *= 2
+
+
+def pareto_table(df, dimension, metric, top_n=TOP_N):
+    """Top ``top_n`` categories of ``dimension`` by summed ``metric`` plus an "Other" row.
+
+    Returns ``(table, summary)``. ``table`` has columns ``dimension``,
+    ``metric``, Share, CumulativePercentage and Class (A/B/C; blank for
+    Other). ``summary`` holds the number of categories, the class A and A+B
+    counts and the grand total.
+    """
+    return _pareto_from_totals(*_category_totals(df, dimension, metric), dimension, metric, top_n)
+
+
+def _pareto_from_totals(categories, totals, dimension, metric, top_n):
+    grand_total = totals.sum()
+    top = _top(totals, top_n)
+    count_a = _count_to_share(totals, CUTOFF, top_n)
+    count_ab = max(_count_to_share(totals, CLASS_B_CUTOFF, top_n), count_a)
+
+    values = totals[top]
+    labels = list(categories[top])
+    classes = np.where(np.arange(len(top)) < count_a, 'A', np.where(np.arange(len(top)) < count_ab, 'B', 'C')).tolist()
+    if len(totals) > len(top):
+        values = np.append(values, grand_total - values.sum())
+        labels.append(OTHER)
+        classes.append('')
+    share = values / grand_total * 100 if grand_total else np.zeros(len(values))
+    table = pd.DataFrame({
+        dimension: labels,
+        metric: values,
+        'Share': share,
+        'CumulativePercentage': np.cumsum(share),
+        'Class': classes,
+    })
+    summary = {
+        'categories': len(totals),
+        'class_a': count_a,
+        'class_ab': count_ab,
+        'total': float(grand_total),
+    }
+    return table, summary
+
+
+def _category_lines(dimension, metric, path):
+    """OrderDate, category codes, categories and ``metric`` values of every line of ``path``, in date order."""
+    def build(p):
+        orders = load_orders(p)
+        codes, categories = _category_codes(orders[dimension])
+        values = np.nan_to_num(line_values(orders, metric))
+        return orders[['OrderDate']], codes, categories, values
+
+    return cached(("pareto_lines", dimension, metric), path, build)
+
+
+def load_pareto(dimension, metric, start_date, end_date, top_n=TOP_N, path=ORDERS_PATH):
+    """``pareto_table`` of the order lines between the two dates, from the lines cached until data.csv changes."""
+    dates, codes, categories, values = _category_lines(dimension, metric, path)
+    start, end = date_bounds(dates, start_date, end_date)
+    return _pareto_from_totals(*_totals(codes[start:end], categories, values[start:end]), dimension, metric, top_n)
+
+
+def pareto_chart(table, dimension, metric, title=None):
+    """Bars of ``metric`` in rank order with the cumulative percentage line and the 80% cut-off."""
+    order = table[dimension].tolist()
+    base = alt.Chart(table).encode(x=alt.X(f'{dimension}:N', sort=order, title=dimension))
+    bar_chart = base.mark_bar(color='#F39C12').encode(
+        y=alt.Y(f'{metric}:Q', title=metric),
+        tooltip=[dimension, alt.Tooltip(f'{metric}:Q', format=',.2f'), 'Class'],
+    )
+    line_chart = base.mark_line(color='#2E86C1', interpolate='monotone', point=True).encode(
+        y=alt.Y('CumulativePercentage:Q', title='Cumulative %', scale=alt.Scale(domain=[0, 100])),
+        tooltip=[dimension, alt.Tooltip('CumulativePercentage:Q', format='.1f')],
+    )
+    cutoff_rule = alt.Chart(pd.DataFrame({'y': [CUTOFF]})).mark_rule(color='red', strokeDash=[5, 5]).encode(
+        y=alt.Y('y:Q', scale=alt.Scale(domain=[0, 100]), axis=None)
+    )
+    chart = alt.layer(bar_chart, alt.layer(line_chart, cutoff_rule)).resolve_scale(y='independent')
+    return chart.properties(title=title) if title else chart
@@ -6,7 +6,9 @@ def load_and_clean_inventory(inventory_path):
     inventory_df = pd.read_csv(inventory_path)
     
     # Clean the 'Price' column by removing 'GHS' and commas, and converting it to float
-    inventory_df['Price'] = inventory_df['Price'].replace({'GHS': '', ',': ''}, regex=True).astype(float)
+    # (plain substring replaces; no regex engine needed for fixed tokens)
+    price = inventory_df['Price'].astype(str).str.replace('GHS', '', regex=False).str.replace(',', '', regex=False)
+    inventory_df['Price'] = pd.to_numeric(price.str.strip(), errors='coerce')
 
     # Fill missing quantities and prices with 0
     inventory_df['Price'] = inventory_df['Price'].fillna(0)
@@ -0,0 +1,210 @@
+"""Versioned inventory prices, and the price of an item on any date.
+
+inventory.csv only holds today's prices, and a line's Price is whatever the
+inventory said when the order was entered, so old orders can be neither
+re-priced nor checked. The price history keeps one row per price version of
+an item, with the interval it was valid for::
+
+    Item, Price, ValidFrom, ValidTo      (ValidTo is NaT for current prices)
+
+``apply_snapshot`` folds a snapshot of inventory.csv into the history: items
+whose price changed get their current version closed and a new one opened,
+new items get a first version, and items missing from the snapshot have
+their version closed. Recording the same snapshot again changes nothing.
+Snapshots are dated by day (prices apply from the start of that day), so
+record them in date order with ``python -m app.utils.price_history``.
+
+``historical_prices`` attaches the price valid on each line's OrderDate to a
+whole frame of order lines in one vectorized pass. It is an as-of join like
+``pd.merge_asof(..., by='Item')``, but a binary search over the history
+sorted by item and date, so the lines need not be sorted. ``reprice`` uses it
+to give old lines their historical prices, from which the revenue columns
+are derived as usual (``schema.line_values``).
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.utils.commit_queue import file_lock
+from app.utils.data_access import DATA_DIR, INVENTORY_PATH, cached, load_inventory
+from app.utils.schema import DERIVED_LINE_COLUMNS
+
+PRICE_HISTORY_PATH = f"{DATA_DIR}/inventory/price_history.parquet"
+
+
+def _empty_history():
+    return pd.DataFrame({
+        'Item': pd.Series(dtype=object),
+        'Price': pd.Series(dtype=float),
+        'ValidFrom': pd.Series(dtype='datetime64[ns]'),
+        'ValidTo': pd.Series(dtype='datetime64[ns]'),
+    })
+
+
+def _snapshot_date(as_of):
+    return pd.Timestamp(as_of).normalize().as_unit('ns')
+
+
+def apply_snapshot(history, inventory, as_of):
+    """``history`` (None for a first snapshot) with the prices of ``inventory`` (Item, Price) applied from ``as_of`` on.
+
+    Returns a new frame sorted by Item and ValidFrom. Raises ValueError if
+    ``as_of`` is before the latest snapshot already in the history (the
+    latest date any version was opened or closed).
+    """
+    history = _empty_history() if history is None else history
+    as_of = _snapshot_date(as_of)
+    latest = pd.concat([history['ValidFrom'], history['ValidTo']]).max()
+    if pd.notna(latest) and latest > as_of:
+        raise ValueError(f"snapshot of {as_of.date()} is older than the price history "
+                         f"(latest snapshot {latest.date()})")
+    snapshot = inventory.drop_duplicates('Item', keep='first')
+    snapshot = pd.Series(pd.to_numeric(snapshot['Price'], errors='coerce').to_numpy(dtype=float),
+                         index=pd.Index(snapshot['Item'].astype(str), dtype=object))
+
+    history = history.copy()
+    open_rows = history['ValidTo'].isna().to_numpy()
+    current = history.loc[open_rows, 'Price'].set_axis(history.loc[open_rows, 'Item'].to_numpy())
+    listed = current.index.isin(snapshot.index)
+    new_price = snapshot.reindex(current.index).to_numpy()
+    # Still listed at the same price (NaN == NaN counts as the same): the version stays open
+    same_price = (new_price == current.to_numpy()) | (np.isnan(new_price) & np.isnan(current.to_numpy()))
+    unchanged = listed & same_price
+    closing = np.flatnonzero(open_rows)[~unchanged]
+    history.loc[history.index[closing], 'ValidTo'] = as_of
+
+    opened = snapshot[~snapshot.index.isin(current.index[unchanged])]
+    versions = pd.DataFrame({'Item': opened.index.to_numpy(), 'Price': opened.to_numpy(),
+                             'ValidFrom': as_of, 'ValidTo': pd.NaT}).astype(_empty_history().dtypes)
+    history = pd.concat([history, versions], ignore_index=True) if len(history) else versions
+    # Versions replaced on the day they were opened were never in effect
+    history = history[~(history['ValidTo'] <= history['ValidFrom'])]
+    return history.sort_values(['Item', 'ValidFrom'], kind='stable').reset_index(drop=True)
+
+
+def _read_history(path):
+    return pd.read_parquet(path) if os.path.exists(path) else _empty_history()
+
+
+def load_price_history(path=PRICE_HISTORY_PATH):
+    """The price history, one row per price version. Empty if no snapshot was recorded yet."""
+    return cached("price_history", path, _read_history)
+
+
+def record_snapshot(inventory_path=INVENTORY_PATH, as_of=None, path=PRICE_HISTORY_PATH):
+    """Apply the inventory file at ``inventory_path`` to the stored history (dated by its mtime by default).
+
+    Returns the number of versions opened and closed.
+    """
+    if as_of is None:
+        as_of = pd.Timestamp.fromtimestamp(os.path.getmtime(inventory_path))
+    as_of = _snapshot_date(as_of)
+    with file_lock(f"{path}.lock"):
+        previous = _read_history(path)
+        history = apply_snapshot(previous, load_inventory(inventory_path), as_of)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        history.to_parquet(f"{path}.tmp", index=False)
+        os.replace(f"{path}.tmp", path)
+    # Open versions only in the new history were opened, those only in the old one closed
+    changed = pd.concat([previous.assign(New=False), history.assign(New=True)], ignore_index=True)
+    changed = changed[changed['ValidTo'].isna()].drop_duplicates(['Item', 'Price', 'ValidFrom'], keep=False)
+    return int(changed['New'].sum()), int((~changed['New']).sum())
+
+
+class _VersionIndex:
+    """The history sorted by item and ValidFrom, with each item's first version, for as-of lookups."""
+
+    def __init__(self, history):
+        history = history.sort_values(['Item', 'ValidFrom'], kind='stable')
+        self.items = pd.Index(history['Item'].astype(str).unique(), dtype=object)
+        self.codes = self.items.get_indexer(history['Item'].astype(str))
+        self.prices = history['Price'].to_numpy(dtype=float)
+        self.valid_from = history['ValidFrom'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        valid_to = history['ValidTo'].to_numpy(dtype='datetime64[ns]')
+        self.valid_to = np.where(np.isnat(valid_to), np.iinfo(np.int64).max, valid_to.astype(np.int64))
+        self.first = np.searchsorted(self.codes, np.arange(len(self.items)))
+        # Dates as ranks, so (item, date) packs into one sortable int64 key
+        self.times = np.unique(self.valid_from)
+        self.keys = self._key(self.codes, np.searchsorted(self.times, self.valid_from, side='right'))
+
+    def _key(self, codes, ranks):
+        return codes.astype(np.int64) * (len(self.times) + 1) + ranks
+
+    def lookup(self, codes, dates, backfill):
+        """Price of item ``codes`` (-1: unknown) on ``dates`` (int64 ns); NaN where none applies."""
+        prices = np.full(len(codes), np.nan)
+        known = codes >= 0
+        if not len(self.prices):
+            return prices
+        codes, dates = codes[known], dates[known]
+        ranks = np.searchsorted(self.times, dates, side='right')  # versions starting on or before each date
+        positions = np.searchsorted(self.keys, self._key(codes, ranks), side='right') - 1
+        found = positions >= 0
+        found[found] = self.codes[positions[found]] == codes[found]
+        if backfill:
+            # Lines older than an item's first version get that version's price
+            positions = np.where(found, positions, self.first[codes])
+            found = np.ones(len(codes), dtype=bool)
+        else:
+            positions = np.where(found, positions, 0)
+        # Past ValidTo, the item had been dropped from the inventory by then
+        found &= dates < self.valid_to[positions]
+        prices[known] = np.where(found, self.prices[positions], np.nan)
+        return prices
+
+
+def _version_index(path):
+    return _VersionIndex(_read_history(path))
+
+
+def historical_prices(lines, history=None, date_column='OrderDate', backfill=True):
+    """Price of each line's Item on its ``date_column``, as a float array aligned with ``lines``.
+
+    ``history`` defaults to the stored price history. With ``backfill``,
+    lines dated before an item's first recorded version get that first
+    price (the history starts with the first snapshot, orders go further
+    back). Lines of unknown items, of items not in the inventory on that
+    date, or without a date get NaN.
+    """
+    if history is None:
+        index = cached("price_history_index", PRICE_HISTORY_PATH, _version_index)
+    else:
+        index = _VersionIndex(history)
+    items = lines['Item']
+    if isinstance(items.dtype, pd.CategoricalDtype):
+        # One lookup per distinct item instead of per line
+        category_codes = index.items.get_indexer(items.cat.categories.astype(str))
+        codes = np.where(items.cat.codes.to_numpy() >= 0, category_codes[items.cat.codes.to_numpy()], -1)
+    else:
+        codes = index.items.get_indexer(items.astype(str))
+    dates = pd.to_datetime(lines[date_column]).to_numpy(dtype='datetime64[ns]')
+    codes = np.where(np.isnat(dates), -1, codes)
+    return index.lookup(codes, dates.astype(np.int64), backfill)
+
+
+def reprice(lines, history=None, backfill=True):
+    """A copy of ``lines`` with Price set to the historical price, where one is known (the entered price otherwise).
+
+    Revenue columns stored on ``lines`` are dropped, so that
+    ``schema.line_values`` derives them from the new prices.
+    """
+    prices = historical_prices(lines, history, backfill=backfill)
+    repriced = lines.drop(columns=[column for column in DERIVED_LINE_COLUMNS if column in lines])
+    entered = repriced['Price'].to_numpy(dtype=float)
+    repriced['Price'] = np.where(np.isnan(prices), entered, prices)
+    return repriced
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Record inventory snapshots in the price history, oldest first.")
+    parser.add_argument('snapshots', nargs='*', default=[INVENTORY_PATH],
+                        help="inventory CSV files (default: the current inventory.csv)")
+    parser.add_argument('--as-of', help="date the prices took effect (default: each file's modification date)")
+    args = parser.parse_args()
+    for snapshot in args.snapshots:
+        opened, closed = record_snapshot(snapshot, args.as_of)
+        print(f"{snapshot}: {opened:,} price versions opened, {closed:,} closed")
+    history = _read_history(PRICE_HISTORY_PATH)
+    print(f"{len(history):,} versions of {history['Item'].nunique():,} items -> {PRICE_HISTORY_PATH}")
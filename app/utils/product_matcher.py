@@ -0,0 +1,147 @@
+"""Resolve free-text product names to inventory items.
+
+Names read from imported invoices ("ACLOVIR (ACICLOVIR TABS BP 400MG) 56'S",
+"DUROL TONIC 300ML (ADULT)") rarely match the inventory's ``Item`` strings
+exactly. ``ProductMatcher`` embeds every name as a TF-IDF weighted, L2
+normalised vector of its character trigrams and whole words (so strengths such
+as ``400MG`` and pack sizes count as tokens), and scores a batch of names
+against all inventory items with one sparse matrix product over the item
+vectors' posting lists. Only items sharing a feature with a name are ever
+touched, which keeps exact cosine search over the ~11k items at thousands of
+names per second. The cosine similarity is reported as the match confidence.
+
+The number of candidates returned per name defaults to ``ann.num_neighbors``
+in config/config.yaml, and ``ann.min_score`` is the confidence below which
+``best`` reports no match. The matcher is built once per version of
+inventory.csv and shared by all sessions.
+
+Match a file of names (one per line) from the command line with
+``python -m app.utils.product_matcher names.txt``.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from app.utils.config import setting
+from app.utils.data_access import INVENTORY_PATH, cached
+from app.utils.inventory_index import load_inventory_index
+from app.utils.item_search import normalize
+from app.utils.lazy import lazy_import
+
+sparse = lazy_import("scipy.sparse")  # only needed once names are matched
+
+NGRAM = 3
+BATCH_SIZE = 256  # names scored per sparse product; bounds the dense-ish score matrix
+DEFAULT_MIN_SCORE = 0.8
+
+
+def features(name):
+    """Character trigrams of the padded, normalized name plus its whole words."""
+    key = normalize(name)
+    padded = f" {key} "
+    grams = {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+    return grams | {f"w:{word}" for word in key.split(' ') if word}
+
+
+def _normalize_rows(matrix, norms):
+    scale = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    return sparse.diags(scale.astype(np.float32)) @ matrix
+
+
+class ProductMatcher:
+    """Exact cosine nearest neighbours over TF-IDF character n-gram embeddings of item names."""
+
+    def __init__(self, items):
+        self.items = np.asarray(list(items), dtype=object)
+        self.vocabulary = {}
+        rows, columns = [], []
+        for row, item in enumerate(self.items):
+            for feature in features(item):
+                columns.append(self.vocabulary.setdefault(feature, len(self.vocabulary)))
+                rows.append(row)
+        n_items, n_features = len(self.items), len(self.vocabulary)
+        document_frequency = np.bincount(columns, minlength=n_features)
+        self.idf = (np.log((n_items + 1) / (document_frequency + 1)) + 1).astype(np.float32)
+        # Features of a query that no item has still count towards the query's norm
+        self.unseen_idf = np.float32(np.log(n_items + 1) + 1)
+        weights = self.idf[np.asarray(columns, dtype=np.int64)]
+        matrix = sparse.csr_matrix((weights, (rows, columns)), shape=(n_items, n_features))
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        self._item_vectors_t = _normalize_rows(matrix, norms).T.tocsr()
+
+    def __len__(self):
+        return len(self.items)
+
+    def embed(self, names):
+        """Unit-length sparse vectors (one row per name) in the item feature space."""
+        rows, columns, norms = [], [], np.zeros(len(names), dtype=np.float32)
+        for row, name in enumerate(names):
+            unseen = 0
+            for feature in features(name):
+                column = self.vocabulary.get(feature)
+                if column is None:
+                    unseen += 1
+                else:
+                    rows.append(row)
+                    columns.append(column)
+            norms[row] = unseen * self.unseen_idf ** 2
+        columns = np.asarray(columns, dtype=np.int64)
+        weights = self.idf[columns]
+        np.add.at(norms, np.asarray(rows, dtype=np.int64), weights ** 2)
+        matrix = sparse.csr_matrix((weights, (rows, columns)), shape=(len(names), len(self.vocabulary)))
+        return _normalize_rows(matrix, np.sqrt(norms))
+
+    def match(self, names, k=None):
+        """Top ``k`` inventory items for each name, best first.
+
+        Returns a long frame with Name, Rank (1 = best), Item and Score (cosine
+        similarity, 0 to 1). Names sharing no feature with any item get no rows.
+        """
+        k = int(k or setting('ann', 'num_neighbors', 1))
+        names = list(names)
+        found = {'Name': [], 'Rank': [], 'Item': [], 'Score': []}
+        for start in range(0, len(names), BATCH_SIZE):
+            batch = names[start:start + BATCH_SIZE]
+            scores = (self.embed(batch) @ self._item_vectors_t).tocsr()
+            for row, name in enumerate(batch):
+                begin, end = scores.indptr[row], scores.indptr[row + 1]
+                if begin == end:
+                    continue
+                values, item_ids = scores.data[begin:end], scores.indices[begin:end]
+                if len(values) > k:
+                    top = np.argpartition(-values, k - 1)[:k]
+                    values, item_ids = values[top], item_ids[top]
+                order = np.argsort(-values, kind='stable')
+                found['Name'] += [name] * len(order)
+                found['Rank'] += range(1, len(order) + 1)
+                found['Item'] += list(self.items[item_ids[order]])
+                found['Score'] += list(np.minimum(values[order], 1.0))
+        return pd.DataFrame(found).astype({'Rank': int, 'Score': float})
+
+    def best(self, names, min_score=None):
+        """Best item per name, aligned with ``names``; Item is missing where Score < ``min_score``."""
+        min_score = setting('ann', 'min_score', DEFAULT_MIN_SCORE) if min_score is None else min_score
+        names = list(names)
+        top = self.match(names, k=1).set_index('Name')
+        top = top[~top.index.duplicated()]
+        result = pd.DataFrame({'Name': names})
+        result['Item'] = top['Item'].reindex(names).to_numpy()
+        result['Score'] = top['Score'].reindex(names).fillna(0.0).to_numpy()
+        result.loc[result['Score'] < min_score, 'Item'] = None
+        return result
+
+
+def load_product_matcher(path=INVENTORY_PATH):
+    """Shared ``ProductMatcher`` for the current version of inventory.csv."""
+    return cached("product_matcher", path, lambda p: ProductMatcher(load_inventory_index(p).items))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Match product names (one per line) to inventory items.")
+    parser.add_argument('names', help="text file with one product name per line")
+    parser.add_argument('-k', type=int, default=None, help="candidates per name (default: ann.num_neighbors)")
+    args = parser.parse_args()
+    with open(args.names) as f:
+        names = [line.strip() for line in f if line.strip()]
+    print(load_product_matcher().match(names, args.k).to_csv(index=False), end='')
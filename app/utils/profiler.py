@@ -0,0 +1,239 @@
+"""Per-rerun timing of named page stages.
+
+Every widget interaction reruns a page script from the top, and nothing showed
+where that time went: parsing a CSV, the KPI math, building an Altair spec or
+rendering a matplotlib figure. Pages wrap their entry point in ``traced`` (or
+``start_trace``/``end_trace`` for script-style pages) and the expensive steps
+inside it in ``stage``. Each rerun then yields one trace: the wall time of
+every stage, nested stages named by their path ("Dashboard/pareto items"), and
+the change in traced Python memory across each stage. Cache builds in
+``data_access.cached`` are recorded as stages too, so a slow rerun caused by a
+file being parsed again shows up as such.
+
+Profiling is off unless it is asked for, and ``stage`` then costs one
+attribute lookup:
+
+* ``ANGEL_PROFILE=1`` (or ``ANGEL_PROFILE=<path>``) appends every trace as one
+  JSON line to ``logs/profile.jsonl`` (or ``<path>``);
+* opening a page with ``?diagnostics=1`` in the URL shows a diagnostics panel
+  in the sidebar with the latest trace and each stage's change against its
+  median over this session's earlier reruns.
+
+Memory deltas come from ``tracemalloc``, which slows every allocation in the
+process while it runs, so it is only started when ``ANGEL_PROFILE`` is set;
+traces requested with ``?diagnostics=1`` alone record timings only. It
+measures the whole process, so reruns of other sessions at the same time are
+counted as well.
+"""
+import contextlib
+import datetime
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+TRACE_ENV = "ANGEL_PROFILE"
+DEFAULT_TRACE_PATH = "logs/profile.jsonl"
+DIAGNOSTICS_PARAM = "diagnostics"
+HISTORY = 50  # traces kept per session for the diagnostics panel
+_SESSION_KEY = "_profiler_traces"
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+def trace_path():
+    """Where traces are appended, from the ANGEL_PROFILE environment variable; None when off."""
+    value = os.environ.get(TRACE_ENV, '').strip()
+    if value.lower() in ('', '0', 'false', 'no', 'off'):
+        return None
+    if value.lower() in ('1', 'true', 'yes', 'on'):
+        return DEFAULT_TRACE_PATH
+    return value
+
+
+def diagnostics_requested():
+    """True when the page was opened with ``?diagnostics=1``."""
+    try:
+        import streamlit as st
+        return st.query_params.get(DIAGNOSTICS_PARAM, '') not in ('', '0', 'false')
+    except Exception:
+        return False  # not running inside a Streamlit script
+
+
+class Trace:
+    """Stage timings of one rerun of one page (or fragment)."""
+
+    def __init__(self, page, memory=False):
+        self.page = page
+        self.memory = memory  # record tracemalloc deltas
+        self.timestamp = datetime.datetime.now().isoformat(timespec='seconds')
+        self.stages = []
+        self._path = []
+        self._start = time.perf_counter()
+
+    def open(self, name):
+        self._path.append(name)
+        return {
+            'stage': '/'.join([self.page] + self._path),
+            'depth': len(self._path),
+            'start_ms': (time.perf_counter() - self._start) * 1000,
+            'memory': tracemalloc.get_traced_memory()[0] if self.memory else None,
+        }
+
+    def close(self, entry):
+        self._path.pop()
+        entry['ms'] = (time.perf_counter() - self._start) * 1000 - entry['start_ms']
+        before = entry.pop('memory')
+        entry['memory_kb'] = None if before is None else (tracemalloc.get_traced_memory()[0] - before) / 1024
+        self.stages.append(entry)
+
+    def record(self):
+        stages = sorted(self.stages, key=lambda entry: entry['start_ms'])
+        return {
+            'timestamp': self.timestamp,
+            'page': self.page,
+            'total_ms': round((time.perf_counter() - self._start) * 1000, 3),
+            'peak_kb': round(tracemalloc.get_traced_memory()[1] / 1024, 1) if self.memory else None,
+            'stages': [
+                {'stage': entry['stage'], 'depth': entry['depth'], 'ms': round(entry['ms'], 3),
+                 'memory_kb': None if entry['memory_kb'] is None else round(entry['memory_kb'], 1)}
+                for entry in stages
+            ],
+        }
+
+
+def current_trace():
+    """The trace of the rerun running on this thread, if it is being profiled."""
+    return getattr(_local, 'trace', None)
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Time the enclosed block as stage ``name`` of the current trace; a no-op when not profiling."""
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        yield
+        return
+    entry = trace.open(name)
+    try:
+        yield
+    finally:
+        trace.close(entry)
+
+
+def start_trace(page):
+    """Start profiling this rerun of ``page`` if profiling is on. Returns the trace or None.
+
+    Replaces any trace left unfinished on this thread by a rerun that raised.
+    Memory is traced only when ``ANGEL_PROFILE`` is set, never because of the
+    ``?diagnostics=1`` query parameter a visitor can add.
+    """
+    _local.trace = None
+    memory = trace_path() is not None
+    if not memory and not diagnostics_requested():
+        return None
+    if memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+    _local.trace = Trace(page, memory)
+    return _local.trace
+
+
+def end_trace():
+    """Finish the current trace: append it to the trace file and to this session's history."""
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        return None
+    _local.trace = None
+    record = trace.record()
+    path = trace_path()
+    if path is not None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _write_lock, open(path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+    try:
+        import streamlit as st
+        history = st.session_state.setdefault(_SESSION_KEY, [])
+        history.append(record)
+        del history[:-HISTORY]
+    except Exception:
+        pass  # not running inside a Streamlit script
+    return record
+
+
+def traced(name):
+    """Decorator: profile each call as a trace of its own, or as a stage when a trace is already running.
+
+    Put it under ``@st.fragment`` so that a fragment rerun gets its own trace.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, 'trace', None) is not None:
+                with stage(name):
+                    return function(*args, **kwargs)
+            started = start_trace(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                if started is not None:
+                    end_trace()
+        return wrapper
+    return decorator
+
+
+def stage_changes(history):
+    """Each stage of the latest trace against its median over the earlier traces of the same page.
+
+    Returns a frame with Stage, Last (ms), Median (ms), Change (%) and
+    Memory (KB), in the order the stages ran.
+    """
+    import pandas as pd
+
+    latest = history[-1]
+    earlier = [
+        (entry['stage'], entry['ms'])
+        for record in history[:-1] if record['page'] == latest['page']
+        for entry in record['stages']
+    ]
+    medians = pd.DataFrame(earlier, columns=['stage', 'ms']).groupby('stage')['ms'].median()
+    table = pd.DataFrame([
+        {'Stage': '  ' * (entry['depth'] - 1) + entry['stage'].rsplit('/', 1)[-1],
+         'Last (ms)': entry['ms'], 'Median (ms)': medians.get(entry['stage']),
+         'Memory (KB)': entry['memory_kb']}
+        for entry in latest['stages']
+    ], columns=['Stage', 'Last (ms)', 'Median (ms)', 'Memory (KB)'])
+    median = pd.to_numeric(table['Median (ms)'], errors='coerce')
+    table.insert(3, 'Change (%)', (table['Last (ms)'] - median) / median * 100)
+    return table
+
+
+def diagnostics_panel():
+    """Sidebar panel with this session's latest page trace; shown only with ``?diagnostics=1``."""
+    if not diagnostics_requested():
+        return
+    import pandas as pd
+    import streamlit as st
+
+    history = st.session_state.get(_SESSION_KEY, [])
+    with st.sidebar.expander("Diagnostics", expanded=True):
+        if not history:
+            st.caption("No profiled reruns yet.")
+            return
+        latest = history[-1]
+        memory = '' if latest['peak_kb'] is None else f", peak traced memory {latest['peak_kb'] / 1024:,.1f} MB"
+        st.caption(f"{latest['page']}: {latest['total_ms']:,.0f} ms{memory}")
+        st.dataframe(stage_changes(history), hide_index=True, use_container_width=True,
+                     column_config={column: st.column_config.NumberColumn(format="%.1f")
+                                    for column in ['Last (ms)', 'Median (ms)', 'Change (%)', 'Memory (KB)']})
+        st.caption("Recent reruns")
+        st.dataframe(pd.DataFrame([
+            {'Time': record['timestamp'], 'Page': record['page'], 'Total (ms)': record['total_ms']}
+            for record in reversed(history)
+        ]), hide_index=True, use_container_width=True)
@@ -0,0 +1,113 @@
+"""Pre-aggregated daily/weekly/monthly/quarterly trend rollups.
+
+The dashboard's trend panels used to bucket every order date with a per-row
+``to_period(...).apply(lambda r: r.start_time)`` and group the whole history
+again on each rerun. ``TrendRollups`` keeps, for every interval, one row per
+(bucket, customer) holding the sum of each order-level metric. The panels then
+read a handful of precomputed rows whenever the interval, customer or metric
+changes.
+
+The rollups are cached alongside data_tables.csv. When orders are appended to
+that file, only the new rows are bucketed and folded into the existing sums.
+"""
+import numpy as np
+import pandas as pd
+
+from app.utils.data_access import ORDER_TABLES_PATH, cached, load_order_tables, parse_appended_rows
+from app.utils.kpis import METRICS
+from app.utils.schema import ORDER_TABLE
+
+INTERVALS = ['Daily', 'Weekly', 'Monthly', 'Quarterly']
+
+
+def bucket_start(dates, interval):
+    """Vectorized start of the Daily/Weekly (Monday)/Monthly/Quarterly bucket of each date."""
+    days = np.asarray(dates, dtype='datetime64[D]')
+    if interval == 'Daily':
+        return days
+    if interval == 'Weekly':
+        # 1970-01-01 was a Thursday; shift so that Monday is weekday 0
+        weekday = (days.astype(np.int64) + 3) % 7
+        return days - weekday.astype('timedelta64[D]')
+    months = days.astype('datetime64[M]')
+    if interval == 'Quarterly':
+        months = months - (months.astype(np.int64) % 3).astype('timedelta64[M]')
+    return months.astype('datetime64[D]')
+
+
+class TrendRollups:
+    """Per-interval (bucket, customer) sums of the order-level metrics. Immutable once built."""
+
+    def __init__(self, columns, tables=None, customers=()):
+        self.columns = list(columns)
+        self.metrics = [metric for metric in METRICS if metric in self.columns]
+        self.tables = tables or {
+            interval: pd.DataFrame(columns=['Interval', 'Customer', *self.metrics]) for interval in INTERVALS
+        }
+        self.customers = list(customers)
+
+    @classmethod
+    def from_frame(cls, order_tables):
+        return cls(order_tables.columns).with_rows(order_tables)
+
+    def with_rows(self, rows):
+        """Return new rollups with ``rows`` (order-level rows) folded in."""
+        rows = rows.dropna(subset=['OrderDate'])
+        if rows.empty:
+            return self
+        values = {metric: pd.to_numeric(rows[metric], errors='coerce').to_numpy(dtype=float) for metric in self.metrics}
+        tables = {}
+        for interval in INTERVALS:
+            new = pd.DataFrame({
+                'Interval': pd.to_datetime(bucket_start(rows['OrderDate'], interval)),
+                'Customer': rows['Customer'].to_numpy(),
+                **values,
+            })
+            frames = [table for table in (self.tables[interval], new) if not table.empty]
+            combined = pd.concat(frames, ignore_index=True)
+            tables[interval] = combined.groupby(['Interval', 'Customer'], as_index=False, sort=True)[self.metrics].sum()
+        customers = pd.unique(pd.concat([pd.Series(self.customers, dtype=object), rows['Customer'].astype(object)]))
+        return TrendRollups(self.columns, tables, customers)
+
+    def series(self, interval, metrics, customer=None, start=None, end=None):
+        """Return one row per bucket with the summed ``metrics`` of the orders between ``start`` and ``end``.
+
+        ``customer`` None means all customers. Buckets that lie wholly inside
+        the range are read from the interval's rollup; the (at most two)
+        buckets cut by ``start`` or ``end`` are summed from the daily rollup
+        over the days inside the range only.
+        """
+        metrics = list(metrics)
+        table, daily = self.tables[interval], self.tables['Daily']
+        if customer is not None:
+            table = table[table['Customer'] == customer]
+            daily = daily[daily['Customer'] == customer]
+        edges = []
+        inside = np.ones(len(table), dtype=bool)
+        in_range = np.ones(len(daily), dtype=bool)
+        if start is not None:
+            first = pd.Timestamp(bucket_start([pd.Timestamp(start)], interval)[0])
+            edges.append(first)
+            inside &= (table['Interval'] > first).to_numpy()
+            in_range &= (daily['Interval'] >= pd.Timestamp(start).normalize()).to_numpy()
+        if end is not None:
+            last = pd.Timestamp(bucket_start([pd.Timestamp(end)], interval)[0])
+            edges.append(last)
+            inside &= (table['Interval'] < last).to_numpy()
+            in_range &= (daily['Interval'] <= pd.Timestamp(end).normalize()).to_numpy()
+        daily = daily[in_range]
+        daily_buckets = pd.to_datetime(bucket_start(daily['Interval'], interval))
+        partial = daily[daily_buckets.isin(edges)].assign(Interval=daily_buckets[daily_buckets.isin(edges)])
+        frames = [frame for frame in (table[inside], partial) if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=['Interval', *metrics])
+        return pd.concat(frames, ignore_index=True).groupby('Interval', as_index=False)[metrics].sum()
+
+
+def _extend_rollups(rollups, data):
+    return rollups.with_rows(parse_appended_rows(data, rollups.columns, ORDER_TABLE))
+
+
+def load_trend_rollups(path=ORDER_TABLES_PATH):
+    """Shared ``TrendRollups`` for the current contents of data_tables.csv."""
+    return cached("trend_rollups", path, lambda p: TrendRollups.from_frame(load_order_tables(p)), _extend_rollups)
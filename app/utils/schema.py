@@ -0,0 +1,156 @@
+"""Declared column types for the order files.
+
+data.csv mixes date formats (``19-11-24`` from the early entries, ISO dates
+from the tracker), so loaders used to fall back to ``pd.to_datetime`` format
+inference and recast money columns afterwards. The schemas below fix the type
+of every known column: dictionary-encoded (categorical) names, integer
+quantities, float money columns and dates parsed against an explicit list of
+formats. Quantities are nullable integers: a missing, unparseable or
+fractional quantity is kept as <NA> (fractional ones are logged), never
+turned into 0 or truncated.
+
+The per-line revenue columns of data.csv (OrderValue, ValueActualized,
+RevenueLost and their older duplicates "Expected Revenue", "Actual Revenue",
+"Revenue Lost" and "Percent Revenue Actualized") are all functions of the two
+quantities and the price. They stay in the file but are not loaded: the
+in-memory line-item frame keeps only ``STORED_LINE_COLUMNS`` (dictionary-
+encoded names and invoice numbers, Int32 quantities, one float price), and
+``line_values`` derives a revenue column when it is needed.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+logger = logging.getLogger(__name__)
+
+# Tried in order; a value is parsed by the first format that accepts it
+DATE_FORMATS = ['ISO8601', '%d-%m-%y']
+
+_MONEY = 'float64'
+
+LINE_ITEMS = {
+    'OrderDate': 'date',
+    'Customer': 'category',
+    'Item': 'category',
+    'QuantityOrdered': 'int32',
+    'QuantityFulfilled': 'int32',
+    'Price': _MONEY,
+    'InvoiceNumber': 'category',
+    'OrderValue': _MONEY,
+    'ValueActualized': _MONEY,
+    'RevenueLost': _MONEY,
+    'Expected Revenue': _MONEY,
+    'Actual Revenue': _MONEY,
+    'Revenue Lost': _MONEY,
+    'Percent Revenue Actualized': _MONEY,
+}
+
+# Derived from QuantityOrdered, QuantityFulfilled and Price rather than kept in memory
+DERIVED_LINE_COLUMNS = [
+    'OrderValue', 'ValueActualized', 'RevenueLost',
+    'Expected Revenue', 'Actual Revenue', 'Revenue Lost', 'Percent Revenue Actualized',
+]
+REVENUE_COLUMNS = DERIVED_LINE_COLUMNS[:3]
+STORED_LINE_COLUMNS = [column for column in LINE_ITEMS if column not in DERIVED_LINE_COLUMNS]
+
+ORDER_TABLE = {
+    'OrderDate': 'date',
+    'InvoiceNumber': 'str',
+    'Customer': 'category',
+    'ItemCount': 'int32',
+    'percentage_fully_fulfilled': 'float64',
+    'percentage_partially_fulfilled': 'float64',
+    'percentage_not_fulfilled': 'float64',
+    'quantity_fulfill_rate': 'float64',
+    'OrderValue': _MONEY,
+    'RevenueActualized': _MONEY,
+    'RevenueLost': _MONEY,
+    'percent_revenue_actualized': 'float64',
+}
+
+
+def parse_order_dates(values):
+    """Parse dates against ``DATE_FORMATS`` without per-value format inference."""
+    values = pd.Series(values)
+    parsed = pd.to_datetime(values, format=DATE_FORMATS[0], errors='coerce')
+    for date_format in DATE_FORMATS[1:]:
+        missing = parsed.isna() & values.notna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(values[missing], format=date_format, errors='coerce')
+    return parsed
+
+
+def line_values(df, column):
+    """A numeric line-item column as a float array; revenue columns missing from ``df`` are derived."""
+    if column in df:
+        return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+    if column not in DERIVED_LINE_COLUMNS:
+        raise KeyError(column)
+    ordered = df['QuantityOrdered'].to_numpy(dtype=float)
+    fulfilled = df['QuantityFulfilled'].to_numpy(dtype=float)
+    price = df['Price'].to_numpy(dtype=float)
+    if column in ('OrderValue', 'Expected Revenue'):
+        return ordered * price
+    if column in ('ValueActualized', 'Actual Revenue'):
+        return fulfilled * price
+    if column in ('RevenueLost', 'Revenue Lost'):
+        return (ordered - fulfilled) * price
+    order_value = ordered * price
+    return np.divide(fulfilled * price * 100, order_value, out=np.zeros(len(df)), where=order_value != 0)
+
+
+def with_line_revenue(df, columns=REVENUE_COLUMNS):
+    """``df`` with the derived revenue ``columns`` it lacks added, for display or export (a new frame)."""
+    missing = [column for column in columns if column not in df]
+    return df.assign(**{column: line_values(df, column) for column in missing}) if missing else df
+
+
+def read_dtypes(schema, columns):
+    """``dtype=`` argument for ``pd.read_csv``: text columns are kept as text, not type-sniffed.
+
+    Categoricals are read as text and encoded afterwards, which is markedly
+    faster than ``dtype='category'`` in the C parser.
+    """
+    return {column: str for column in columns if schema.get(column) in ('category', 'str', 'date')}
+
+
+def _whole_numbers(values, column, dtype):
+    """``values`` as a nullable integer column: missing, unparseable and fractional values become <NA>."""
+    numbers = pd.to_numeric(values, errors='coerce')
+    fractional = numbers.notna() & (numbers % 1 != 0)
+    if fractional.any():
+        logger.warning("%s: %d non-integral value(s) treated as missing, e.g. %s",
+                       column, fractional.sum(), numbers[fractional].iloc[0])
+        numbers = numbers.mask(fractional)
+    return numbers.astype(dtype)
+
+
+def apply_schema(df, schema):
+    """Cast the columns of a freshly read frame to their declared types, in place."""
+    for column in df.columns:
+        kind = schema.get(column)
+        if kind is None or kind == 'str':
+            continue
+        if kind == 'category':
+            df[column] = df[column].astype('category')
+        elif kind == 'date':
+            df[column] = parse_order_dates(df[column])
+        elif kind.startswith('int'):
+            df[column] = _whole_numbers(df[column], column, kind.capitalize())
+        else:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype(kind)
+    return df
+
+
+def concat_typed(df, new_rows):
+    """Concatenate two frames of the same schema, keeping categorical columns categorical."""
+    combined = pd.concat([df, new_rows], ignore_index=True)
+    for column in combined.columns:
+        if column in df and column in new_rows and isinstance(df[column].dtype, pd.CategoricalDtype):
+            combined[column] = pd.Categorical(union_categoricals(
+                [df[column].astype('category'), new_rows[column].astype('category')], ignore_order=True
+            ))
+    return combined
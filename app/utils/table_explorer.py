@@ -0,0 +1,293 @@
+"""Server-side filtering, sorting and paging of the order tables.
+
+``streamlit_extras.dataframe_explorer`` filtered the whole date range in
+pandas and ``st.dataframe`` then serialised every remaining row to the
+browser, on every rerun. ``TableIndex`` keeps per-column indexes over a
+loaded order frame instead, built lazily the first time a column is filtered
+or sorted and shared by all sessions until the file changes:
+
+* text columns (Customer, Item, InvoiceNumber, ...) are dictionary-encoded,
+  and the row positions of each value are kept together (a posting list), so
+  selecting a few customers touches only their rows;
+* numeric and date columns keep their sort order and sorted values, so a
+  range filter is two binary searches and sorting a filtered result is one
+  pass over the precomputed order.
+
+The date range is a slice of the date-sorted frame, so a query never looks at
+rows outside it, and only the page being shown is turned into a frame. The
+line items' revenue columns are not held in memory (see ``app.utils.schema``);
+they are derived when filtered or sorted on, and for the rows of the page.
+``table_explorer`` renders the filters, the sort and paging controls and that
+page.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from app.utils.data_access import ORDER_TABLES_PATH, ORDERS_PATH, cached, date_bounds, load_order_tables, load_orders
+from app.utils.schema import REVENUE_COLUMNS, line_values, with_line_revenue
+
+PAGE_SIZES = [25, 50, 100, 250]
+MAX_OPTIONS = 200  # text columns with more distinct values get a substring filter instead of a pick list
+SMALL_RESULT = 1 / 16  # results smaller than this share of the table are sorted directly
+
+# loader, path and the derived columns shown for each table
+_TABLES = {
+    'orders': (load_orders, ORDERS_PATH, REVENUE_COLUMNS),
+    'order_tables': (load_order_tables, ORDER_TABLES_PATH, []),
+}
+
+
+class Selection:
+    """Row positions matching a query: either the slice ``start:end`` or an array of positions, in display order."""
+
+    def __init__(self, start, end, positions=None):
+        self.start, self.end, self.positions = start, end, positions
+
+    def __len__(self):
+        return self.end - self.start if self.positions is None else len(self.positions)
+
+    def page(self, number, size):
+        """Positions of page ``number`` (0-based) of ``size`` rows."""
+        first = number * size
+        if self.positions is None:
+            return np.arange(self.start + first, min(self.start + first + size, self.end))
+        return self.positions[first:first + size]
+
+
+class TableIndex:
+    """Lazily built per-column indexes over a date-sorted frame. Treat as read-only.
+
+    ``derived`` names revenue columns that ``schema.line_values`` computes from
+    the frame; they can be filtered, sorted and shown like stored columns.
+    """
+
+    def __init__(self, df, derived=()):
+        self.df = df
+        self.derived = [column for column in derived if column not in df]
+        self.columns = list(df.columns) + self.derived
+        self._codes = {}
+        self._postings = {}
+        self._orders = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.df)
+
+    def kind(self, column):
+        """'number' (numeric or date columns) or 'text'."""
+        dtype = self.dtype(column)
+        if pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype):
+            return 'number'
+        return 'text'
+
+    def dtype(self, column):
+        return np.dtype(float) if column in self.derived else self.df[column].dtype
+
+    def _values(self, column):
+        if column in self.derived:
+            return line_values(self.df, column)
+        values = self.df[column]
+        if pd.api.types.is_datetime64_any_dtype(values.dtype):
+            # NaT sorts last, like NaN
+            return np.where(values.isna(), np.inf, values.to_numpy(dtype='datetime64[ns]').astype(np.int64))
+        return values.to_numpy(dtype=float)
+
+    def _encoded(self, column):
+        """``(codes, categories, ranks)``: codes per row, the distinct values, and each value's sort rank."""
+        with self._lock:
+            if column not in self._codes:
+                values = self.df[column]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    codes, categories = values.cat.codes.to_numpy(), values.cat.categories
+                else:
+                    codes, categories = pd.factorize(values)
+                categories = pd.Index(categories).astype(str)
+                ranks = np.empty(len(categories), dtype=np.int64)
+                ranks[np.argsort(categories.str.lower(), kind='stable')] = np.arange(len(categories))
+                self._codes[column] = (codes, categories, ranks)
+            return self._codes[column]
+
+    def _posting_lists(self, column):
+        """Row positions grouped by code (ascending within each code) and each code's offset."""
+        codes = self._encoded(column)[0]
+        with self._lock:
+            if column not in self._postings:
+                order = np.argsort(codes, kind='stable')
+                counts = np.bincount(codes[codes >= 0], minlength=len(self._codes[column][1]))
+                offsets = np.concatenate([[0], np.cumsum(counts)]) + np.count_nonzero(codes < 0)
+                self._postings[column] = (order, offsets)
+            return self._postings[column]
+
+    def _sort_keys(self, column):
+        if self.kind(column) == 'text':
+            codes, _, ranks = self._encoded(column)
+            return np.where(codes >= 0, ranks[codes], len(ranks))  # missing values last
+        return self._values(column)
+
+    def _sorted(self, column):
+        """``(order, sorted_keys)``: row positions in ascending order of ``column`` and the keys in that order."""
+        with self._lock:
+            cached_order = self._orders.get(column)
+        if cached_order is not None:
+            return cached_order
+        keys = self._sort_keys(column)
+        with self._lock:
+            if column not in self._orders:
+                order = np.argsort(keys, kind='stable')
+                self._orders[column] = (order, keys[order])
+            return self._orders[column]
+
+    def categories(self, column):
+        """Distinct values of a text column, sorted case-insensitively."""
+        _, categories, ranks = self._encoded(column)
+        return list(categories[np.argsort(ranks)])
+
+    def value_range(self, column):
+        """Smallest and largest value of a numeric or date column (NaN/NaT ignored); Timestamps for dates."""
+        if column in self.derived:
+            values = pd.Series(line_values(self.df, column))
+        elif pd.api.types.is_datetime64_any_dtype(self.dtype(column)):
+            values = self.df[column]
+        else:
+            values = pd.to_numeric(self.df[column], errors='coerce')
+        return values.min(), values.max()
+
+    def _matching_codes(self, column, values=None, contains=None):
+        _, categories, _ = self._encoded(column)
+        if contains is not None:
+            return np.flatnonzero(categories.str.contains(contains, case=False, regex=False))
+        return categories.get_indexer(pd.Index([str(value) for value in values]))
+
+    def _text_mask(self, column, start, end, codes):
+        codes = codes[codes >= 0]
+        if len(codes) > 64:
+            return np.isin(self._encoded(column)[0][start:end], codes)
+        order, offsets = self._posting_lists(column)
+        mask = np.zeros(end - start, dtype=bool)
+        for code in codes:
+            rows = order[offsets[code]:offsets[code + 1]]
+            rows = rows[np.searchsorted(rows, start):np.searchsorted(rows, end)]
+            mask[rows - start] = True
+        return mask
+
+    def _range_mask(self, column, start, end, low, high):
+        order, keys = self._sorted(column)
+        first, last = np.searchsorted(keys, low, side='left'), np.searchsorted(keys, high, side='right')
+        if (last - first) * 8 >= end - start:
+            # Not selective: comparing the slice directly is cheaper than scattering positions
+            values = self._values(column)[start:end]
+            return (values >= low) & (values <= high)
+        rows = order[first:last]
+        mask = np.zeros(end - start, dtype=bool)
+        mask[rows[(rows >= start) & (rows < end)] - start] = True
+        return mask
+
+    def _key(self, column, value):
+        if pd.api.types.is_datetime64_any_dtype(self.dtype(column)):
+            return pd.Timestamp(value).value
+        return float(value)
+
+    def query(self, start_date=None, end_date=None, filters=(), sort=None, descending=False):
+        """Rows between the two dates that pass every filter, in ``sort`` order (file order by default).
+
+        ``filters`` is a sequence of ``(column, op, value)`` with op 'in'
+        (value: list of values), 'contains' (value: case-insensitive
+        substring) or 'between' (value: ``(low, high)``, inclusive).
+        Returns a ``Selection``.
+        """
+        start, end = 0, len(self.df)
+        if start_date is not None and end_date is not None:
+            start, end = date_bounds(self.df, start_date, end_date)
+        mask = None
+        for column, op, value in filters:
+            if op == 'between':
+                low, high = value
+                part = self._range_mask(column, start, end, self._key(column, low), self._key(column, high))
+            elif op == 'contains':
+                part = self._text_mask(column, start, end, self._matching_codes(column, contains=value))
+            else:
+                part = self._text_mask(column, start, end, self._matching_codes(column, values=value))
+            mask = part if mask is None else mask & part
+        if mask is None and sort is None:
+            return Selection(start, end)
+        positions = np.arange(start, end) if mask is None else start + np.flatnonzero(mask)
+        if sort is not None and len(positions):
+            if len(positions) < len(self.df) * SMALL_RESULT:
+                keys = self._sort_keys(sort)[positions]
+                positions = positions[np.argsort(keys, kind='stable')]
+            else:
+                order = self._sorted(sort)[0]
+                member = np.zeros(len(self.df), dtype=bool)
+                member[positions] = True
+                positions = order[member[order]]
+            if descending:
+                positions = positions[::-1]
+        return Selection(start, end, positions)
+
+    def page(self, selection, number, size):
+        """Page ``number`` of ``selection`` as a frame (only those rows are materialised)."""
+        return with_line_revenue(self.df.iloc[selection.page(number, size)], self.derived)
+
+
+def load_table_index(kind='order_tables'):
+    """Shared ``TableIndex`` over the 'orders' (data.csv) or 'order_tables' (data_tables.csv) frame."""
+    loader, path, derived = _TABLES[kind]
+    return cached(("table_index", kind), path, lambda p: TableIndex(loader(p), derived))
+
+
+def _filter_widget(index, column, key):
+    """Widget for one filter column; returns a ``(column, op, value)`` filter or None."""
+    if index.kind(column) == 'number':
+        low, high = index.value_range(column)
+        if pd.isna(low) or low == high:
+            return None
+        if pd.api.types.is_datetime64_any_dtype(index.dtype(column)):
+            chosen = st.date_input(f"Values for {column}", value=(low.date(), high.date()), key=f"{key}_{column}")
+            if len(chosen) != 2 or tuple(chosen) == (low.date(), high.date()):
+                return None
+            # Up to the end of the last day chosen
+            end = pd.Timestamp(chosen[1]) + pd.Timedelta(days=1, nanoseconds=-1)
+            return (column, 'between', (pd.Timestamp(chosen[0]), end))
+        if pd.api.types.is_integer_dtype(index.dtype(column)):
+            low, high = int(low), int(high)
+        else:
+            low, high = float(low), float(high)
+        chosen = st.slider(f"Values for {column}", min_value=low, max_value=high, value=(low, high), key=f"{key}_{column}")
+        return None if chosen == (low, high) else (column, 'between', chosen)
+    categories = index.categories(column)
+    if len(categories) <= MAX_OPTIONS:
+        chosen = st.multiselect(f"Values for {column}", categories, key=f"{key}_{column}")
+        return (column, 'in', chosen) if chosen else None
+    text = st.text_input(f"{column} contains", key=f"{key}_{column}")
+    return (column, 'contains', text.strip()) if text.strip() else None
+
+
+def table_explorer(index, start_date=None, end_date=None, key="table"):
+    """Filter, sort and page through ``index`` between the two dates, sending only the visible page."""
+    columns = index.columns
+    filters = []
+    filter_columns = st.multiselect("Filter dataframe on", columns, key=f"{key}_filter_columns")
+    for column in filter_columns:
+        selected = _filter_widget(index, column, key)
+        if selected is not None:
+            filters.append(selected)
+
+    c1, c2, c3 = st.columns([3, 1, 1])
+    sort = c1.selectbox("Sort by", ["(date order)"] + columns, key=f"{key}_sort")
+    descending = c2.toggle("Descending", key=f"{key}_descending")
+    page_size = c3.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+
+    selection = index.query(start_date, end_date, filters, None if sort == "(date order)" else sort, descending)
+    pages = max(1, -(-len(selection) // page_size))
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = 1
+    page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, step=1, key=page_key)
+
+    st.dataframe(index.page(selection, page - 1, page_size), hide_index=True, use_container_width=True)
+    first = (page - 1) * page_size
+    st.caption(f"Rows {min(first + 1, len(selection)):,}–{min(first + page_size, len(selection)):,} "
+               f"of {len(selection):,}")
@@ -13,8 +13,7 @@ def calculate_kpis(order_df):
         order_df['Expected Revenue'] = order_df['QuantityOrdered'] * order_df['Price']
         order_df['Actual Revenue'] = order_df['QuantityFulfilled'] * order_df['Price']
         order_df['Revenue Lost'] = order_df['Expected Revenue'] - order_df['Actual Revenue']
-        order_df['Percent Revenue Actualized'] = (order_df['Actual Revenue'] / order_df['Expected Revenue']) * 100
-        order_df['Percent Revenue Actualized'].fillna(0, inplace=True)  # Handle NaN
+        order_df['Percent Revenue Actualized'] = ((order_df['Actual Revenue'] / order_df['Expected Revenue']) * 100).fillna(0)  # Handle NaN
     else:
         st.warning("Required columns for KPI calculation are missing!")
     return order_df
@@ -42,9 +41,9 @@ def initialize_session_state():
             "invoice_number": None
         }
 
-def append_order_entry(item, quantity_ordered, quantity_fulfilled, inventory_df):
-    """Append an order entry to the session state."""
-    price = inventory_df[inventory_df['Item'] == item]['Price'].values[0]
+def append_order_entry(item, quantity_ordered, quantity_fulfilled, inventory_index):
+    """Append an order entry to the session state (prices come from an InventoryIndex)."""
+    price = inventory_index.price(item)
     order_value = quantity_ordered * price  # Calculate OrderValue
     value_actualized = quantity_fulfilled * price  # Calculate ValueActualized
     revenue_lost = order_value - value_actualized
@@ -64,48 +63,27 @@ def append_order_entry(item, quantity_ordered, quantity_fulfilled, inventory_df)
 
 #For Dashboard
 import pandas as pd
-import altair as alt
+from app.utils.data_access import filter_date_range, load_orders
+from app.utils.kpis import fulfillment_kpis
+from app.utils.lazy import lazy_import
+from app.utils.pareto import pareto_chart, pareto_table
+
+alt = lazy_import("altair")
 
 
 def load_dataset(filepath):
-    """Load dataset and preprocess."""
-    df = pd.read_csv(filepath)
-    if df['OrderDate'].dtype != 'datetime64[ns]':
-        df['OrderDate'] = pd.to_datetime(df['OrderDate'], errors='coerce')
-    return df
+    """Load dataset and preprocess (cached until the file changes; do not mutate)."""
+    return load_orders(filepath)
 
 
 def validate_and_filter_dates(df, start_date, end_date):
-    """Filter dataset based on date range."""
-    return df[(df['OrderDate'] >= pd.Timestamp(start_date)) & (df['OrderDate'] <= pd.Timestamp(end_date))]
+    """Filter dataset based on date range (df sorted by OrderDate, as load_dataset returns it)."""
+    return filter_date_range(df, start_date, end_date)
 
 
 def prepare_fulfillment_metrics(df):
     """Calculate metrics for order fulfillment."""
-    item_count_total = int(df.Item.count())
-    fully_fulfilled_items = len(df[df['QuantityFulfilled'] == df['QuantityOrdered']])
-    partially_fulfilled_items = len(
-        df[(df['QuantityFulfilled'] > 0) & (df['QuantityFulfilled'] < df['QuantityOrdered'])]
-    )
-    items_not_fulfilled = len(df[df['QuantityFulfilled'] == 0])
-    quantity_fulfill_rate = (df['QuantityFulfilled'].sum() / df['QuantityOrdered'].sum()) * 100
-
-    total_order_value = float(df.OrderValue.sum())
-    value_actualized = float(df.ValueActualized.sum())
-    revenue_lost = float(df.RevenueLost.sum())
-    percent_revenue_actualized = (value_actualized / total_order_value) * 100 if total_order_value > 0 else 0
-
-    return {
-        'item_count_total': item_count_total,
-        'percent_fully_fulfilled': (fully_fulfilled_items / item_count_total) * 100,
-        'percent_partially_fulfilled': (partially_fulfilled_items / item_count_total) * 100,
-        'percent_not_fulfilled': (items_not_fulfilled / item_count_total) * 100,
-        'quantity_fulfill_rate': quantity_fulfill_rate,
-        'total_order_value': total_order_value,
-        'value_actualized': value_actualized,
-        'revenue_lost': revenue_lost,
-        'percent_revenue_actualized': percent_revenue_actualized,
-    }
+    return fulfillment_kpis(df)
 
 
 def make_donut(input_response, input_text, input_color):
@@ -136,16 +114,6 @@ def make_donut(input_response, input_text, input_color):
 
 
 def create_pareto_chart(df, group_by_column, value_column):
-    """Create a Pareto chart for analysis."""
-    grouped_df = df.groupby(group_by_column, as_index=False)[value_column].sum()
-    grouped_df = grouped_df.sort_values(value_column, ascending=False)
-    grouped_df['CumulativePercentage'] = grouped_df[value_column].cumsum() / grouped_df[value_column].sum() * 100
-
-    base = alt.Chart(grouped_df).encode(x=alt.X(f'{group_by_column}:N', sort='-y'))
-    bar_chart = base.mark_bar(color='#F39C12').encode(y=alt.Y(f'{value_column}:Q', title=value_column))
-    line_chart = base.mark_line(color='#2E86C1').encode(
-        y=alt.Y('CumulativePercentage:Q', title='Cumulative %'),
-        tooltip=[group_by_column, value_column, 'CumulativePercentage']
-    )
-
-    return alt.layer(bar_chart, line_chart).resolve_scale(y='independent')
+    """Create a Pareto chart for analysis (top categories plus an "Other" tail)."""
+    table, _ = pareto_table(df, group_by_column, value_column)
+    return pareto_chart(table, group_by_column, value_column)
@@ -0,0 +1,93 @@
+"""Import-time budgets for the app's pages.
+
+A page's first render pays for everything imported at its top. This script
+runs the top-level imports of each page in a fresh interpreter, after the
+libraries every page needs and the server has loaded anyway (``BASELINE``:
+streamlit, numpy and pandas), takes the best of
+``REPEATS`` runs, and compares the time with the page's budget in
+``BUDGETS``. It also lists the heavy plotting and scientific libraries each
+page ended up loading. The exit status is 1 if any page is over budget::
+
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --pages "pages/2_🧮_Data_Tables.py"
+
+Budgets are in milliseconds and leave headroom over the times measured when
+they were set; raise one only together with the change that needs it.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPEATS = 3
+BASELINE = ['streamlit', 'numpy', 'pandas']
+HEAVY = ['altair', 'plotly', 'seaborn', 'matplotlib', 'scipy', 'statsmodels', 'pypdf', 'streamlit_extras']
+BUDGETS = {
+    "👋_Home.py": 50,
+    "main_current.py": 100,
+    "pages/1_📊_Dashboard.py": 100,
+    "pages/2_🧮_Data_Tables.py": 100,
+    "pages/3_🎯_Fulfillment_Tracker.py": 150,
+    "pages/4_📈_Demand_Forecaster.py": 100,
+    "pages/5_🛠️_Settings.py": 50,
+    "pages/6_🤵_Account.py": 50,
+}
+
+_PROBE = """
+import json, sys, time
+{baseline}
+before = set(sys.modules)
+started = time.perf_counter()
+exec(compile({source!r}, {page!r}, 'exec'), {{'__name__': '__page__'}})
+elapsed = time.perf_counter() - started
+print(json.dumps({{'ms': elapsed * 1000, 'modules': sorted(set(sys.modules) - before)}}))
+"""
+
+
+def page_imports(page):
+    """Source of the module-level import statements of ``page``."""
+    with open(os.path.join(ROOT, page), encoding='utf-8') as f:
+        source = f.read()
+    tree = ast.parse(source)
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return '\n'.join(ast.get_source_segment(source, node) for node in imports)
+
+
+def measure(page):
+    """Best import time (ms) of ``page`` over ``REPEATS`` fresh interpreters, and the heavy libraries it loaded."""
+    baseline = '\n'.join(f"import {name}" for name in BASELINE)
+    probe = _PROBE.format(baseline=baseline, source=page_imports(page), page=page)
+    env = {**os.environ, 'PYTHONPATH': ROOT}
+    best, modules = None, []
+    for _ in range(REPEATS):
+        output = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, env=env, capture_output=True, text=True,
+                                check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if best is None or result['ms'] < best:
+            best, modules = result['ms'], result['modules']
+    heavy = sorted({name.split('.')[0] for name in modules if name.split('.')[0] in HEAVY})
+    return best, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of each page against its budget.")
+    parser.add_argument('--pages', nargs='+', default=list(BUDGETS), help="pages to measure (default: all)")
+    args = parser.parse_args()
+
+    over = []
+    print(f"{'page':<36} {'import (ms)':>12} {'budget':>8}  heavy libraries")
+    for page in args.pages:
+        elapsed, heavy = measure(page)
+        budget = BUDGETS.get(page)
+        flag = '' if budget is None or elapsed <= budget else '  OVER'
+        if flag:
+            over.append(page)
+        print(f"{page:<36} {elapsed:12.0f} {budget or '-':>8}  {', '.join(heavy) or '-'}{flag}")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == '__main__':
+    main()
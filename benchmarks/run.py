@@ -0,0 +1,280 @@
+"""Benchmark the hot paths of the app at increasing order-history sizes.
+
+Usage::
+
+    python -m benchmarks.run                          # 1e4, 1e5 and 1e6 lines
+    python -m benchmarks.run --sizes 1e4 1e7 -o after.json
+    python -m benchmarks.run --compare before.json    # adds a ratio column
+
+For each size a synthetic history (``benchmarks.synthetic``) is generated
+once and kept under ``benchmarks/data/``. Every benchmark is then run once to
+warm up and repeated until ``MIN_SECONDS`` have passed (at most
+``MAX_REPEATS`` times). The best time is reported, along with the peak traced
+memory of one more call. Results are printed as a table and can be saved as
+JSON, so that two runs (for example before and after a change) can be
+compared with ``--compare``.
+"""
+import argparse
+import atexit
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from app.utils.commit_queue import CommitQueue
+from app.utils.data_access import read_typed_csv
+from app.utils.kpis import grouped_order_metrics, order_metrics
+from app.utils.order_tables import build_order_tables
+from app.utils.price_history import historical_prices
+from app.utils.rollups import TrendRollups, bucket_start
+from app.utils.schema import LINE_ITEMS, ORDER_TABLE, STORED_LINE_COLUMNS
+from app.utils.utils import calculate_kpis, create_pareto_chart, prepare_fulfillment_metrics, validate_and_filter_dates
+from benchmarks.synthetic import price_history, write_history
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+MIN_SECONDS = 0.5
+MAX_REPEATS = 20
+ORDER_SIZE = 5  # lines per order saved by the "save order" benchmark
+
+BENCHMARKS = []
+
+
+def benchmark(name):
+    """Register ``setup(history)``, which returns the zero-argument function to time."""
+    def register(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+class History:
+    """The generated files for one size, and frames parsed from them on first use."""
+
+    def __init__(self, n_lines, seed):
+        self.n_lines = n_lines
+        self.lines_path, self.tables_path = write_history(
+            os.path.join(DATA_DIR, f"lines-{n_lines}-seed-{seed}"), n_lines, seed)
+        self._lines = self._tables = None
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            # The columns load_orders keeps in memory; revenue is derived from them
+            lines = read_typed_csv(self.lines_path, LINE_ITEMS, columns=STORED_LINE_COLUMNS)
+            self._lines = lines.sort_values('OrderDate', kind='stable')
+        return self._lines
+
+    @property
+    def tables(self):
+        if self._tables is None:
+            self._tables = read_typed_csv(self.tables_path, ORDER_TABLE).sort_values('OrderDate', kind='stable')
+        return self._tables
+
+    @property
+    def date_range(self):
+        """The last year of the history, as the dashboard's default range would select."""
+        end = self.lines['OrderDate'].max()
+        return (end - pd.Timedelta(days=365)).date(), end.date()
+
+
+@benchmark("parse data.csv")
+def _parse_lines(history):
+    return lambda: read_typed_csv(history.lines_path, LINE_ITEMS, columns=STORED_LINE_COLUMNS)
+
+
+@benchmark("parse data_tables.csv")
+def _parse_tables(history):
+    return lambda: read_typed_csv(history.tables_path, ORDER_TABLE)
+
+
+@benchmark("validate_and_filter_dates")
+def _filter_dates(history):
+    lines, (start, end) = history.lines, history.date_range
+    return lambda: validate_and_filter_dates(lines, start, end)
+
+
+@benchmark("prepare_fulfillment_metrics")
+def _fulfillment_metrics(history):
+    lines = history.lines
+    return lambda: prepare_fulfillment_metrics(lines)
+
+
+@benchmark("calculate_kpis")
+def _calculate_kpis(history):
+    # calculate_kpis adds columns in place, so each call gets a fresh copy (included in the time)
+    lines = history.lines[['QuantityOrdered', 'QuantityFulfilled', 'Price']]
+    return lambda: calculate_kpis(lines.copy())
+
+
+@benchmark("calculate_order_metrics")
+def _order_metrics(history):
+    lines = history.lines
+    return lambda: order_metrics(lines)
+
+
+@benchmark("order metrics per invoice")
+def _grouped_order_metrics(history):
+    lines = history.lines
+    return lambda: grouped_order_metrics(lines, 'InvoiceNumber')
+
+
+@benchmark("build order tables")
+def _build_order_tables(history):
+    lines = history.lines
+    return lambda: build_order_tables(lines)
+
+
+@benchmark("historical prices (as-of join)")
+def _historical_prices(history):
+    lines, prices = history.lines, price_history()
+    return lambda: historical_prices(lines, prices)
+
+
+@benchmark("create_pareto_chart")
+def _pareto_chart(history):
+    lines = history.lines
+    # to_dict builds the Vega-Lite spec that st.altair_chart would send
+    return lambda: create_pareto_chart(lines, 'Item', 'RevenueLost').to_dict()
+
+
+@benchmark("trend bucketing")
+def _trend_bucketing(history):
+    dates = history.tables['OrderDate']
+    return lambda: [bucket_start(dates, interval) for interval in ('Daily', 'Weekly', 'Monthly', 'Quarterly')]
+
+
+@benchmark("trend rollups")
+def _trend_rollups(history):
+    tables = history.tables
+    return lambda: TrendRollups.from_frame(tables).series('Monthly', ['OrderValue'])
+
+
+@benchmark("save order (add_data)")
+def _save_order(history):
+    # Appends to copies of the files through the same commit queue add_data uses
+    workdir = tempfile.mkdtemp(prefix='angel-bench-')
+    atexit.register(shutil.rmtree, workdir, True)
+    orders_path = shutil.copy(history.lines_path, os.path.join(workdir, 'data.csv'))
+    tables_path = shutil.copy(history.tables_path, os.path.join(workdir, 'data_tables.csv'))
+    commit_queue = CommitQueue(orders_path, tables_path, os.path.join(workdir, '.orders.lock'),
+                               os.path.join(workdir, 'invoices.idx'))
+    sample = history.lines.head(ORDER_SIZE)
+    counter = iter(range(1, 10 ** 9))
+
+    def save():
+        invoice_number = f"BENCH-{next(counter)}"
+        order_lines = pd.DataFrame({
+            'InvoiceNumber': invoice_number,
+            'OrderDate': datetime.date.today(),
+            'Customer': sample['Customer'].astype(str).to_numpy(),
+            'Item': sample['Item'].astype(str).to_numpy(),
+            'QuantityOrdered': sample['QuantityOrdered'].to_numpy(),
+            'QuantityFulfilled': sample['QuantityFulfilled'].to_numpy(),
+            'Price': sample['Price'].to_numpy(),
+        })
+        order_lines = calculate_kpis(order_lines)
+        order_row = {'OrderDate': datetime.date.today(), 'InvoiceNumber': invoice_number,
+                     'Customer': order_lines['Customer'].iloc[0], **order_metrics(order_lines)}
+        ack = commit_queue.submit(order_lines, order_row).result(timeout=60)
+        if not ack['committed']:
+            raise RuntimeError(ack['error'])
+
+    return save
+
+
+def measure(function, memory=True):
+    """Best and median seconds per call, and the peak traced memory (MB) of one call."""
+    function()  # warm-up: first-call imports and caches
+    times = []
+    started = time.perf_counter()
+    while len(times) < MAX_REPEATS and (not times or time.perf_counter() - started < MIN_SECONDS):
+        t0 = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - t0)
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return {'seconds': min(times), 'median_seconds': statistics.median(times), 'repeats': len(times),
+            'peak_mb': peak_mb}
+
+
+def run(sizes, seed=0, only=None, memory=True):
+    """Run every registered benchmark (or those named in ``only``) at each size; returns the result rows."""
+    results = []
+    for n_lines in sizes:
+        history = History(n_lines, seed)
+        for name, setup in BENCHMARKS:
+            if only and name not in only:
+                continue
+            result = {'size': n_lines, 'benchmark': name, **measure(setup(history), memory)}
+            results.append(result)
+            print(_format_row(result), flush=True)
+    return results
+
+
+def _format_row(result, baseline=None):
+    peak = '' if result['peak_mb'] is None else f"{result['peak_mb']:10.1f}"
+    row = f"{result['size']:>10,}  {result['benchmark']:<30} {result['seconds'] * 1000:12.2f} {peak:>10}"
+    if baseline is not None:
+        row += f" {result['seconds'] / baseline['seconds']:8.2f}x"
+    return row
+
+
+def report(results, baseline=None):
+    """Print the results as a table; with ``baseline`` results, add the time ratio against it."""
+    previous = {(row['size'], row['benchmark']): row for row in (baseline or [])}
+    header = f"{'lines':>10}  {'benchmark':<30} {'best (ms)':>12} {'peak (MB)':>10}"
+    print(header + (f" {'vs base':>9}" if baseline else ''))
+    for result in results:
+        print(_format_row(result, previous.get((result['size'], result['benchmark']))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths on synthetic order histories.")
+    parser.add_argument('--sizes', nargs='+', type=lambda value: int(float(value)), default=DEFAULT_SIZES,
+                        help="history sizes in lines, e.g. 1e4 1e5 (default: 1e4 1e5 1e6)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='+', help="benchmark names to run (default: all)")
+    parser.add_argument('--no-memory', action='store_true', help="skip the peak memory measurement")
+    parser.add_argument('-o', '--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')  # pandas deprecation noise from the code under test
+    results = run(args.sizes, args.seed, args.only, not args.no_memory)
+    print()
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    report(results, baseline)
+    if args.output:
+        meta = {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'seed': args.seed,
+        }
+        with open(args.output, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Synthetic order histories shaped like data.csv and data_tables.csv.
+
+The repo only ships a few dozen real order lines, far too few to show how the
+app scales. ``generate_lines`` builds a line-item history of any size with the
+properties that matter for performance:
+
+* items are drawn from the real inventory (names and prices) with a Zipf-like
+  popularity, so a few hundred items cover most lines and the tail is long;
+* customers are similarly skewed: a handful of large accounts, many small ones;
+* orders have a geometric number of lines (mean ``LINES_PER_ORDER``) and
+  share one date, customer and invoice number;
+* about 70% of lines are fully fulfilled, 20% partially and 10% not at all;
+* about 30% of dates use the legacy ``dd-mm-yy`` format, the rest ISO.
+
+``order_tables`` derives the matching order-level rows with the app's own
+``build_order_tables`` (dates in ISO form, as a refresh writes them), and
+``write_history`` writes both files. Everything is determined by ``n_lines`` and ``seed``.
+``price_history`` builds a versioned price history over the same period from
+successive inventory snapshots with drifting prices.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.utils.data_access import INVENTORY_PATH, load_inventory
+from app.utils.order_tables import build_order_tables
+from app.utils.price_history import apply_snapshot
+from app.utils.schema import parse_order_dates
+
+LINES_PER_ORDER = 4
+ITEM_SKEW = 1.1  # Zipf exponent of item popularity
+CUSTOMER_SKEW = 1.3
+LEGACY_DATE_SHARE = 0.3
+FULFILLMENT_SHARES = [0.7, 0.2, 0.1]  # fully, partially, not fulfilled
+START_DATE = '2019-01-01'
+HISTORY_DAYS = 6 * 365
+SNAPSHOT_DAYS = 90  # days between inventory snapshots in ``price_history``
+PRICE_CHANGE_SHARE = 0.2  # share of items repriced per snapshot
+DROPPED_SHARE = 0.01  # share of items missing from each snapshot
+LINE_HEADER = ['OrderDate', 'Customer', 'Item', 'QuantityOrdered', 'QuantityFulfilled', 'Price', 'InvoiceNumber',
+               'OrderValue', 'ValueActualized', 'RevenueLost', 'Expected Revenue', 'Actual Revenue', 'Revenue Lost',
+               'Percent Revenue Actualized']
+
+
+def _zipf_weights(n, skew):
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    return weights / weights.sum()
+
+
+def _catalogue(rng, inventory_path):
+    """Item names and prices, most popular first (a seeded shuffle of the inventory)."""
+    try:
+        inventory = load_inventory(inventory_path).drop_duplicates('Item')
+        items = inventory['Item'].astype(str).to_numpy()
+        prices = pd.to_numeric(inventory['Price'], errors='coerce').fillna(0).to_numpy(dtype=float)
+    except FileNotFoundError:
+        items = np.array([f"ITEM-{i:05d}" for i in range(10_000)], dtype=object)
+        prices = np.round(rng.lognormal(3.5, 1.0, len(items)), 2)
+    order = rng.permutation(len(items))
+    return items[order], prices[order]
+
+
+def generate_lines(n_lines, seed=0, inventory_path=INVENTORY_PATH):
+    """A synthetic line-item history of ``n_lines`` rows with the columns of data.csv (dates as text)."""
+    rng = np.random.default_rng(seed)
+    items, prices = _catalogue(rng, inventory_path)
+    n_customers = int(np.clip(n_lines // 500, 20, 5000))
+    customers = np.array([f"Customer {i:04d}" for i in range(n_customers)], dtype=object)
+
+    # Orders: a geometric number of lines each, in date order
+    sizes = rng.geometric(1 / LINES_PER_ORDER, size=2 * (n_lines // LINES_PER_ORDER) + 16)
+    sizes = sizes[:np.searchsorted(np.cumsum(sizes), n_lines) + 1]
+    sizes[-1] -= sizes.sum() - n_lines
+    n_orders = len(sizes)
+    order_of_line = np.repeat(np.arange(n_orders), sizes)
+    order_days = np.sort(rng.integers(0, HISTORY_DAYS, n_orders))
+    order_dates = np.datetime64(START_DATE) + order_days.astype('timedelta64[D]')
+    order_customers = customers[rng.choice(n_customers, n_orders, p=_zipf_weights(n_customers, CUSTOMER_SKEW))]
+    invoice_numbers = np.char.add('INV-', np.char.zfill(np.arange(1, n_orders + 1).astype(str), 7)).astype(object)
+
+    item_ids = rng.choice(len(items), n_lines, p=_zipf_weights(len(items), ITEM_SKEW))
+    ordered = rng.geometric(0.08, n_lines).astype(np.int64)
+    outcome = rng.choice(3, n_lines, p=FULFILLMENT_SHARES)
+    partial = 1 + np.floor((ordered - 1) * rng.uniform(0, 1, n_lines)).astype(np.int64)  # 1 .. ordered - 1
+    fulfilled = np.select([outcome == 0, outcome == 1], [ordered, partial], 0)
+    fulfilled[(outcome == 1) & (ordered == 1)] = 0  # one unit cannot be part-fulfilled
+    price = prices[item_ids]
+
+    dates = pd.Series(order_dates)
+    legacy = rng.uniform(0, 1, n_orders) < LEGACY_DATE_SHARE
+    date_text = np.where(legacy, dates.dt.strftime('%d-%m-%y'), dates.dt.strftime('%Y-%m-%d'))[order_of_line]
+
+    order_value = ordered * price
+    value_actualized = fulfilled * price
+    revenue_lost = order_value - value_actualized
+    return pd.DataFrame({
+        'OrderDate': date_text,
+        'Customer': order_customers[order_of_line],
+        'Item': items[item_ids],
+        'QuantityOrdered': ordered,
+        'QuantityFulfilled': fulfilled,
+        'Price': price,
+        'InvoiceNumber': invoice_numbers[order_of_line],
+        'OrderValue': order_value,
+        'ValueActualized': value_actualized,
+        'RevenueLost': revenue_lost,
+        'Expected Revenue': order_value,
+        'Actual Revenue': value_actualized,
+        'Revenue Lost': revenue_lost,
+        'Percent Revenue Actualized': np.divide(value_actualized * 100, order_value,
+                                                out=np.zeros(n_lines), where=order_value != 0),
+    }, columns=LINE_HEADER)
+
+
+def order_tables(lines):
+    """The order-level rows (data_tables.csv) of a line-item history, one per invoice, with ISO dates."""
+    return build_order_tables(lines.assign(OrderDate=parse_order_dates(lines['OrderDate'])))
+
+
+def price_history(seed=0, inventory_path=INVENTORY_PATH):
+    """A price history with one inventory snapshot every ``SNAPSHOT_DAYS`` over the synthetic order period."""
+    rng = np.random.default_rng(seed)
+    items, prices = _catalogue(rng, inventory_path)
+    history = None
+    for as_of in pd.date_range(START_DATE, periods=HISTORY_DAYS // SNAPSHOT_DAYS, freq=f"{SNAPSHOT_DAYS}D"):
+        changed = rng.random(len(prices)) < PRICE_CHANGE_SHARE
+        prices = np.where(changed, np.round(prices * rng.uniform(0.9, 1.3, len(prices)), 2), prices)
+        listed = rng.random(len(items)) >= DROPPED_SHARE
+        snapshot = pd.DataFrame({'Item': items[listed], 'Price': prices[listed]})
+        history = apply_snapshot(history, snapshot, as_of)
+    return history
+
+
+def write_history(directory, n_lines, seed=0):
+    """Write ``lines.csv`` and ``tables.csv`` for ``n_lines`` rows under ``directory``, unless already there.
+
+    Returns the two paths.
+    """
+    lines_path = os.path.join(directory, 'lines.csv')
+    tables_path = os.path.join(directory, 'tables.csv')
+    if not (os.path.exists(lines_path) and os.path.exists(tables_path)):
+        os.makedirs(directory, exist_ok=True)
+        lines = generate_lines(n_lines, seed)
+        order_tables(lines).to_csv(f"{tables_path}.tmp", index=False)
+        lines.to_csv(f"{lines_path}.tmp", index=False)
+        os.replace(f"{tables_path}.tmp", tables_path)
+        os.replace(f"{lines_path}.tmp", lines_path)
+    return lines_path, tables_path
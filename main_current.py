@@ -1,17 +1,22 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import seaborn as sns 
-import altair as alt
 from app.assets.styles.UI import *
-from matplotlib import pyplot as plt
+from app.utils.chart_data import sample_points, time_aggregate, top_categories
+from app.utils.data_access import filter_date_range, load_orders
+from app.utils.lazy import lazy_import
+from app.utils.profiler import diagnostics_panel, end_trace, stage, start_trace
+
+# Only the charts and the explorer below need these; they load when they render
+sns = lazy_import("seaborn")
+plt = lazy_import("matplotlib.pyplot")
+alt = lazy_import("altair")
 #pip install streamlit-extras
 #https://pypi.org/project/streamlit-extras/
-from streamlit_extras.dataframe_explorer import dataframe_explorer
+extras = lazy_import("streamlit_extras.dataframe_explorer")
 
 
 #page layout
 st.set_page_config(page_title="Analytics", page_icon="🌎", layout="wide")
+start_trace("Analytics")
 
 #streamlit theme=none
 theme_plotly = None 
@@ -21,8 +26,9 @@ with open('app/assets/styles/style.css')as f:
     st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html = True)
 
 UI()
-#load dataset
-df=pd.read_csv('app/assets/data/data.csv')
+#load dataset (cached, OrderDate parsed and sorted)
+with stage("load orders"):
+ df=load_orders()
 
 #Logo
 st.sidebar.image("app/assets/images/logo.png")
@@ -39,16 +45,18 @@ with st.sidebar:
  end_date=st.date_input(label="End Date")
 st.error("Business Metrics between[ "+str(start_date)+"] and ["+str(end_date)+"]")
 
-#compare date
-df2 = df[(df['OrderDate'] >= str(start_date)) & (df['OrderDate'] <= str(end_date))]
+#compare date (binary search on the sorted OrderDate column)
+with stage("filter"):
+ df2 = filter_date_range(df, start_date, end_date)
 
 #Toast for page refresh
 st.toast("Page has been refreshed")
 
 #dataframe
 with st.expander("Filter Excel Dataset"):
- filtered_df = dataframe_explorer(df2, case=False)
- st.dataframe(filtered_df, use_container_width=True)
+ with stage("data explorer"):
+  filtered_df = extras.dataframe_explorer(df2, case=False)
+  st.dataframe(filtered_df, use_container_width=True)
 
 st.subheader("Order Fulfillment")
 b1, b2=st.columns(2)
@@ -57,7 +65,8 @@ b1, b2=st.columns(2)
 with b1:  
  from app.modules.order_fulfillment_tracker.add_data import *
  st.subheader('Add New Record to Database', divider='rainbow',)
- add_data()
+ with stage("add data"):
+  add_data()
 
  
  #metric cards
@@ -80,30 +89,31 @@ with b1:
 a1,a2=st.columns(2)
 with a1:
  st.subheader('Customer Vs Fullfilment & Total Price', divider='rainbow',)
- source = df2
- chart = alt.Chart(source).mark_circle().encode(
-    x='Product',
-    y='TotalPrice',
-    color='Category',
- ).interactive()
- st.altair_chart(chart, theme="streamlit", use_container_width=True)
+ # Bounded sample of the rows rather than every order line
+ with stage("dot plot"):
+  source = sample_points(df2[['Product', 'TotalPrice', 'Category']])
+  chart = alt.Chart(source).mark_circle().encode(
+     x='Product',
+     y='TotalPrice',
+     color='Category',
+  ).interactive()
+  st.altair_chart(chart, theme="streamlit", use_container_width=True)
 
 
 with a2:
  st.subheader('Products & Unit Price', divider='rainbow',)
- energy_source = pd.DataFrame({
-    "Product": df2["Product"],
-    "UnitPrice ($)":  df2["UnitPrice"],
-    "Date": df2["OrderDate"]
-    })
- 
- #bar Graph
- bar_chart = alt.Chart(energy_source).mark_bar().encode(
-        x="month(Date):O",
-        y="sum(UnitPrice ($)):Q",
-        color="Product:N"
-    )
- st.altair_chart(bar_chart, use_container_width=True,theme=theme_plotly)
+ # Monthly sums per product, aggregated here; the chart adds up each calendar month across years as before
+ with stage("unit price chart"):
+  energy_source = time_aggregate(df2, "OrderDate", "UnitPrice", "Monthly", by="Product")
+  energy_source = energy_source.rename(columns={"Interval": "Date", "UnitPrice": "UnitPrice ($)"})
+
+  #bar Graph
+  bar_chart = alt.Chart(energy_source).mark_bar().encode(
+         x="month(Date):O",
+         y="sum(UnitPrice ($)):Q",
+         color="Product:N"
+     )
+  st.altair_chart(bar_chart, use_container_width=True,theme=theme_plotly)
  
  
  #select only numeric or number data
@@ -117,23 +127,25 @@ with p1:
  feature_y = st.selectbox('Select feature for y Quantitative Data', df2.select_dtypes("number").columns)
 
 # Display scatter plot
- fig, ax = plt.subplots()
- sns.scatterplot(data=df2, x=feature_x, y=feature_y, hue=df2.Product, ax=ax)
- st.pyplot(fig)
+ with stage("matplotlib scatter"):
+  fig, ax = plt.subplots()
+  sns.scatterplot(data=df2, x=feature_x, y=feature_y, hue=df2.Product, ax=ax)
+  st.pyplot(fig)
 
 
 with p2:
  st.subheader('Products & Qantities', divider='rainbow',)
- source = pd.DataFrame({
-        "Quantity ($)": df2["Quantity"],
-        "Product": df2["Product"]
-      })
- 
- bar_chart = alt.Chart(source).mark_bar().encode(
-        x="sum(Quantity ($)):Q",
-        y=alt.Y("Product:N", sort="-x")
-    )
- st.altair_chart(bar_chart, use_container_width=True,theme=theme_plotly)
+ with stage("quantity chart"):
+  source = top_categories(df2, "Product", "Quantity").rename(columns={"Quantity": "Quantity ($)"})
+
+  bar_chart = alt.Chart(source).mark_bar().encode(
+         x="Quantity ($):Q",
+         y=alt.Y("Product:N", sort=None)
+     )
+  st.altair_chart(bar_chart, use_container_width=True,theme=theme_plotly)
+
+end_trace()
+diagnostics_panel()
 
 
  
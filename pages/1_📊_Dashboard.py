@@ -1,14 +1,20 @@
 import streamlit as st
 import datetime
 import pandas as pd
-import plotly.express as px
-import seaborn as sns
-import altair as alt
-import plotly.graph_objects as go
-from numerize.numerize import numerize  # Import numerize for compact number formatting
 from app.assets.styles.UI import *  # Make sure this exists and contains UI()
-from matplotlib import pyplot as plt
-from streamlit_extras.dataframe_explorer import dataframe_explorer
+from app.utils.chart_data import MAX_POINTS, downsample_series
+from app.utils.data_access import filter_date_range, load_orders
+from app.utils.kpis import METRICS, fulfillment_kpis
+from app.utils.lazy import lazy_import
+from app.utils.pareto import load_pareto, pareto_chart
+from app.utils.profiler import diagnostics_panel, stage, traced
+from app.utils.rollups import INTERVALS, load_trend_rollups
+from app.utils.schema import line_values
+from app.utils.table_explorer import load_table_index, table_explorer
+
+# Loaded when the first chart or metric card renders, not on import
+alt = lazy_import("altair")
+numerize = lazy_import("numerize.numerize")  # compact number formatting
 
 
 st.set_page_config(page_title="Dashboard", page_icon="📊", layout="wide")
@@ -22,18 +28,121 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# Sections with their own widgets run as fragments: changing one of their
+# inputs reruns only that section, not the data loads, KPIs and charts above.
+@st.fragment
+@traced("data explorer")
+def data_explorer(start_date, end_date):
+    """Filterable, paged view of the orders in the selected date range (filtered server-side)."""
+    table_explorer(load_table_index('orders'), start_date, end_date, key="dashboard_explorer")
+
+
+@st.fragment
+@traced("visualize trends")
+def visualize_trends(start_date, end_date):
+    """Trend panel; reruns on its own when its customer, interval or metric changes."""
+    st.subheader('Visualize Trends', divider='rainbow')
+
+    # Precomputed per-interval rollups of data_tables.csv
+    rollups = load_trend_rollups()
+
+    # Customer selection
+    customer_options = ['All Customers'] + rollups.customers
+    selected_customer = st.selectbox('Select Customer:', customer_options)
+
+    # Interval selection
+    interval_options = INTERVALS
+    selected_interval = st.selectbox('Select Interval for Analysis:', interval_options)
+
+    # User selection for trend analysis
+    trend_options = METRICS
+    selected_trend = st.selectbox('Select Trend to Analyze:', trend_options)
+
+    # Read the pre-aggregated buckets for the date range and customer
+    interval = selected_interval
+    customer = None if selected_customer == 'All Customers' else selected_customer
+    trend_analysis = rollups.series(interval, [selected_trend], customer=customer, start=start_date, end=end_date)
+    # Daily buckets over a long range would ship thousands of bars: sum into coarser buckets instead
+    while len(trend_analysis) > MAX_POINTS and interval != INTERVALS[-1]:
+        interval = INTERVALS[INTERVALS.index(interval) + 1]
+        trend_analysis = rollups.series(interval, [selected_trend], customer=customer, start=start_date, end=end_date)
+    if interval != selected_interval:
+        st.caption(f"Too many {selected_interval.lower()} bars for this range; showing {interval.lower()} totals.")
+
+    # Plot bar chart using Altair
+    chart = alt.Chart(trend_analysis).mark_bar(color='#2E86C1').encode(
+        x=alt.X('Interval:T', title=interval),
+        y=alt.Y(selected_trend, title=selected_trend),
+        tooltip=['Interval', selected_trend]
+    ).properties(
+        title=f'{selected_trend} Over Time ({selected_customer}, {interval})',
+        width='container',
+        height=400
+    )
+
+    # Display the chart
+    with stage("render chart"):
+        st.altair_chart(chart, use_container_width=True)
+
+
+@st.fragment
+@traced("compare trends")
+def compare_trends():
+    """Metric comparison panel; reruns on its own when its selections change."""
+    st.subheader('Compare Trends', divider='rainbow')
+
+    # Precomputed per-interval rollups of data_tables.csv
+    rollups = load_trend_rollups()
+
+    # Customer selection (Single select instead of multi-select)
+    customer_list = ['All Customers'] + rollups.customers
+    selected_customer = st.selectbox("Select Customer:", customer_list, key="customer_selectbox")
+
+    # Metric selection (allowing multiple selections)
+    metrics = METRICS
+    selected_metrics = st.multiselect("Select Metrics to Plot:", metrics, default=["OrderValue"], key="metrics_multiselect")
+
+    # Interval selection
+    interval_options = INTERVALS
+    selected_interval = st.selectbox('Select Interval for Analysis:', interval_options, key="interval_selectbox")
+
+    # Read the pre-aggregated buckets for the customer and selected metrics
+    trend_analysis = rollups.series(
+        selected_interval, selected_metrics,
+        customer=None if selected_customer == "All Customers" else selected_customer,
+    )
+
+    # Melt data for easier visualization (long format)
+    trend_analysis_melted = trend_analysis.melt(id_vars=['Interval'], var_name='Metric', value_name='Value')
+    trend_analysis_melted = downsample_series(trend_analysis_melted, 'Interval', 'Value', by='Metric')
+
+    # Plotting the line chart
+    chart = alt.Chart(trend_analysis_melted).mark_line().encode(
+        x=alt.X('Interval:T', title=selected_interval),
+        y=alt.Y('Value:Q', title='Metric Value'),
+        color=alt.Color('Metric:N', title="Metrics"),
+        tooltip=['Interval:T', 'Metric:N', 'Value:Q']
+    ).properties(
+        title=f'Trend Comparison for Selected Metrics ({selected_interval} Interval)',
+        width='container',
+        height=400
+    )
+
+    # Display the chart
+    with stage("render chart"):
+        st.altair_chart(chart, use_container_width=True)
+
+
+@traced("Dashboard")
 def dashboard():
     # Load CSS Style
     with open('app/assets/styles/style.css') as f:
         st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
     
-    # Load dataset
-    df = pd.read_csv('app/assets/data/data.csv')
-
-    # Convert OrderDate to datetime if not already
-    if df['OrderDate'].dtype != 'datetime64[ns]':
-        df['OrderDate'] = pd.to_datetime(df['OrderDate'], errors='coerce')  # Handle invalid dates
+    # Load dataset (cached across reruns, OrderDate already parsed)
+    with stage("load orders"):
+        df = load_orders()
 
     # Sidebar date range filter
     with st.sidebar:
@@ -52,18 +161,13 @@ def dashboard():
     # Validate date inputs and filter data
     if start_date and end_date:
         try:
-            # Filter dataset based on date range
-            df2 = df[(df['OrderDate'] >= pd.Timestamp(start_date)) & (df['OrderDate'] <= pd.Timestamp(end_date))]
-
-            # Convert numeric columns to native Python types before using numerize
-            df2['OrderValue'] = df2['OrderValue'].astype(float)
-            df2['ValueActualized'] = df2['ValueActualized'].astype(float)
-            df2['RevenueLost'] = df2['RevenueLost'].astype(float)
+            # Filter dataset based on date range (binary search on the date-sorted frame)
+            with stage("filter"):
+                df2 = filter_date_range(df, start_date, end_date)
 
             # Display dataframe explorer
             with st.expander("Filter Excel Dataset"):
-                filtered_df = dataframe_explorer(df2, case=False)
-                st.dataframe(filtered_df, use_container_width=True)
+                data_explorer(start_date, end_date)
 
             # Main KPIs Section
             st.header("Main Dashboard", divider="rainbow")
@@ -75,27 +179,12 @@ def dashboard():
                 ##ADD DOUGHNUT GRAPHS HERE!!!!
                 
                 ## CALCULATIONS ##
-                item_count_total = int(df2.Item.count())
-                fully_fulfilled_items = len(df2[df2['QuantityFulfilled'] == df2['QuantityOrdered']])
-                percent_fully_fulfilled = (fully_fulfilled_items / item_count_total) * 100
-                partially_fulfilled_items = len(df2[(df2['QuantityFulfilled'] > 0) & (df2['QuantityFulfilled'] < df2['QuantityOrdered'])])
-                percent_partially_fulfilled = (partially_fulfilled_items / item_count_total) * 100
-                items_not_fulfilled = len(df2[df2['QuantityFulfilled'] == 0])
-                percent_not_fulfilled = (items_not_fulfilled / item_count_total) * 100
-                quantity_fulfill_rate = (df2['QuantityFulfilled'].sum() / df2['QuantityOrdered'].sum()) * 100
-
-                # Use the provided metrics for fulfillment status
-                item_count_total = int(df2.Item.count())
-                fully_fulfilled_items = len(df2[df2['QuantityFulfilled'] == df2['QuantityOrdered']])
-                percent_fully_fulfilled = (fully_fulfilled_items / item_count_total) * 100
-
-                partially_fulfilled_items = len(df2[(df2['QuantityFulfilled'] > 0) & (df2['QuantityFulfilled'] < df2['QuantityOrdered'])])
-                percent_partially_fulfilled = (partially_fulfilled_items / item_count_total) * 100
-
-                items_not_fulfilled = len(df2[df2['QuantityFulfilled'] == 0])
-                percent_not_fulfilled = (items_not_fulfilled / item_count_total) * 100
-
-                quantity_fulfill_rate = (df2['QuantityFulfilled'].sum() / df2['QuantityOrdered'].sum()) * 100
+                with stage("kpis"):
+                    kpis = fulfillment_kpis(df2)
+                percent_fully_fulfilled = kpis['percent_fully_fulfilled']
+                percent_partially_fulfilled = kpis['percent_partially_fulfilled']
+                percent_not_fulfilled = kpis['percent_not_fulfilled']
+                quantity_fulfill_rate = kpis['quantity_fulfill_rate']
 
                 # Function to generate the donut chart
                 def make_donut(input_response, input_text, input_color):
@@ -146,24 +235,24 @@ def dashboard():
                     return plot_bg + plot + text
 
                 # Display the Donut Charts for Fulfillment Metrics
-                
-                colA, colB = st.columns(2)
-                with colA:
-                    st.markdown("#### Fully Fulfilled")
-                    st.altair_chart(make_donut(percent_fully_fulfilled, "Fully Fulfilled", "green"))
-
-                with colB:
-                    st.markdown("#### Partially Fulfilled")
-                    st.altair_chart(make_donut(percent_partially_fulfilled, "Partially Fulfilled", "orange"))
-
-                colA1, colB1 = st.columns(2)
-                with colA1:
-                    st.markdown("#### Not Fulfilled")
-                    st.altair_chart(make_donut(percent_not_fulfilled, "Not Fulfilled", "red"))
-                        
-                with colB1:
-                    st.markdown("#### Order Fill Rate(by QTY)")
-                    st.altair_chart(make_donut(quantity_fulfill_rate, "Order Fill Rate", "green"))
+                with stage("donut charts"):
+                    colA, colB = st.columns(2)
+                    with colA:
+                        st.markdown("#### Fully Fulfilled")
+                        st.altair_chart(make_donut(percent_fully_fulfilled, "Fully Fulfilled", "green"))
+
+                    with colB:
+                        st.markdown("#### Partially Fulfilled")
+                        st.altair_chart(make_donut(percent_partially_fulfilled, "Partially Fulfilled", "orange"))
+
+                    colA1, colB1 = st.columns(2)
+                    with colA1:
+                        st.markdown("#### Not Fulfilled")
+                        st.altair_chart(make_donut(percent_not_fulfilled, "Not Fulfilled", "red"))
+
+                    with colB1:
+                        st.markdown("#### Order Fill Rate(by QTY)")
+                        st.altair_chart(make_donut(quantity_fulfill_rate, "Order Fill Rate", "green"))
                             
                             ##### SECTION END FOR FULLFILMENT METRICS######
 
@@ -172,17 +261,15 @@ def dashboard():
                 st.subheader('Order Value Metrics', divider='rainbow')
                 from streamlit_extras.metric_cards import style_metric_cards
                 col1, col2 = st.columns(2)
-                col1.metric(label="Item Count:", value=numerize(int(df2.Item.count())), delta="Number of Items Per Order")
-                col2.metric(label="Total Order Value:", value=numerize(float(df2.OrderValue.sum())), delta=numerize(float(df2.OrderValue.median())))
+                col1.metric(label="Item Count:", value=numerize.numerize(kpis['item_count_total']), delta="Number of Items Per Order")
+                col2.metric(label="Total Order Value:", value=numerize.numerize(kpis['total_order_value']), delta=numerize.numerize(float(pd.Series(line_values(df2, 'OrderValue')).median())))
                 
                 col11, col22, col33 = st.columns(3)
-                col11.metric(label="Revenue Actualized GHS:", value=numerize(float(df2.ValueActualized.sum())), delta="High Price")
-                col22.metric(label="Revenue Lost GHS:", value=numerize(float(df2.RevenueLost.sum())), delta="Low Price")
+                col11.metric(label="Revenue Actualized GHS:", value=numerize.numerize(kpis['value_actualized']), delta="High Price")
+                col22.metric(label="Revenue Lost GHS:", value=numerize.numerize(kpis['revenue_lost']), delta="Low Price")
                 
-                # Calculate % Revenue Actualized
-                total_order_value = float(df2.OrderValue.sum())  # Ensure native type
-                value_actualized = float(df2.ValueActualized.sum())  # Ensure native type
-                percent_revenue_actualized = (value_actualized / total_order_value) * 100 if total_order_value > 0 else 0
+                # % Revenue Actualized (from the shared KPI engine)
+                percent_revenue_actualized = kpis['percent_revenue_actualized']
 
                 # Update the metric to display the percentage
                 col33.metric(label="% Revenue Actualized:", value=f"{percent_revenue_actualized:.2f}%", delta="Percentage of Revenue Fulfilled")
@@ -195,96 +282,27 @@ def dashboard():
             a1, a2 = st.columns(2)
             with a1:
                 st.subheader('Pareto Analysis: By Items', divider='rainbow')
-                source = df2
-                                # Function to create Pareto Graph for Revenue Lost
-                def create_pareto_chart(source):
-                    # Group by Items and calculate total revenue lost
-                    revenue_lost_df = source.groupby('Item', as_index=False)['RevenueLost'].sum()
-
-                    # Sort by revenue lost in descending order
-                    revenue_lost_df = revenue_lost_df.sort_values('RevenueLost', ascending=False)
-
-                    # Add a cumulative percentage column
-                    revenue_lost_df['CumulativePercentage'] = revenue_lost_df['RevenueLost'].cumsum() / revenue_lost_df['RevenueLost'].sum() * 100
-
-                    # Create Pareto Chart using Altair
-                    base = alt.Chart(revenue_lost_df).encode(
-                        x=alt.X('Item:N', sort='-y', title='Item'),
-                    )
-
-                    # Bar chart for revenue lost
-                    bar_chart = base.mark_bar(color='#F39C12').encode(
-                        y=alt.Y('RevenueLost:Q', title='Revenue Lost')
-                    )
-
-                    # Line chart for cumulative percentage
-                    line_chart = base.mark_line(color='#2E86C1', interpolate='monotone').encode(
-                        y=alt.Y('CumulativePercentage:Q', title='Cumulative %'),
-                        tooltip=['Item', 'RevenueLost', 'CumulativePercentage']
-                    )
-
-                    # Overlay the two charts and add a secondary axis
-                    #threshold_line = alt.Chart(pd.DataFrame({'y': [80]})).mark_rule(color='red', strokeDash=[5, 5]).encode(y='y:Q')
-
-                    combined_chart = alt.layer(bar_chart, line_chart).resolve_scale(
-                        y='independent'
-                    ).properties(
-                        title="Pareto Chart: Products Contributing to Revenue Lost",
-                        width=800,
-                        height=400
+                # Top items plus an "Other" tail; cached per date range
+                with stage("pareto items"):
+                    table, summary = load_pareto('Item', 'RevenueLost', start_date, end_date)
+                    st.altair_chart(
+                        pareto_chart(table, 'Item', 'RevenueLost', "Pareto Chart: Products Contributing to Revenue Lost")
+                        .properties(height=400),
+                        use_container_width=True,
                     )
-                    
-                    return combined_chart
-
-                # Call the function and display the Pareto chart
-                pareto_chart = create_pareto_chart(df2)
-                st.altair_chart(pareto_chart, use_container_width=True)
+                st.caption(f"{summary['class_a']:,} of {summary['categories']:,} items make up 80% of revenue lost.")
 
             with a2:
             
                 st.subheader('By Source', divider='rainbow')
-                source = df2
-                                # Function to create Pareto Graph for Revenue Lost
-                def create_pareto_chart(source):
-                    # Group by Items and calculate total revenue lost
-                    revenue_lost_df = source.groupby('Customer', as_index=False)['RevenueLost'].sum()
-
-                    # Sort by revenue lost in descending order
-                    revenue_lost_df = revenue_lost_df.sort_values('RevenueLost', ascending=False)
-
-                    # Add a cumulative percentage column
-                    revenue_lost_df['CumulativePercentage'] = revenue_lost_df['RevenueLost'].cumsum() / revenue_lost_df['RevenueLost'].sum() * 100
-
-                    # Create Pareto Chart using Altair
-                    base = alt.Chart(revenue_lost_df).encode(
-                        x=alt.X('Customer:N', sort='-y', title='Customer'),
+                with stage("pareto customers"):
+                    table, summary = load_pareto('Customer', 'RevenueLost', start_date, end_date)
+                    st.altair_chart(
+                        pareto_chart(table, 'Customer', 'RevenueLost', "Pareto Chart: Sources Contributing to Revenue Lost")
+                        .properties(height=400),
+                        use_container_width=True,
                     )
-
-                    # Bar chart for revenue lost
-                    bar_chart = base.mark_bar(color='#F39C12').encode(
-                        y=alt.Y('RevenueLost:Q', title='Revenue Lost')
-                    )
-
-                    # Line chart for cumulative percentage
-                    line_chart = base.mark_line(color='#2E86C1', interpolate='monotone').encode(
-                        y=alt.Y('CumulativePercentage:Q', title='Cumulative %'),
-                        tooltip=['Customer', 'RevenueLost', 'CumulativePercentage']
-                    )
-
-                    # Overlay the two charts and add a secondary axis
-                    combined_chart = alt.layer(bar_chart, line_chart).resolve_scale(
-                        y='independent'
-                    ).properties(
-                        title="Pareto Chart: Sources Contributing to Revenue Lost",
-                        width=800,
-                        height=400
-                    )
-
-                    return combined_chart
-
-                # Call the function and display the Pareto chart
-                pareto_chart = create_pareto_chart(df2)
-                st.altair_chart(pareto_chart, use_container_width=True)
+                st.caption(f"{summary['class_a']:,} of {summary['categories']:,} customers make up 80% of revenue lost.")
 
 
             # Trend Analysis
@@ -292,124 +310,10 @@ def dashboard():
             p1, p2 = st.columns(2) 
             
             with p1:
-                st.subheader('Visualize Trends', divider='rainbow')
-                            
-                            # Load data
-                trend_data = pd.read_csv('app/assets/data/data_tables.csv')
-
-                # Customer selection
-                customer_options = ['All Customers'] + trend_data['Customer'].unique().tolist()
-                selected_customer = st.selectbox('Select Customer:', customer_options)
-
-                # Filter data by date and customer
-                trend_data['OrderDate'] = pd.to_datetime(trend_data['OrderDate'])
-                filtered_data = trend_data[
-                    (trend_data['OrderDate'] >= pd.to_datetime(start_date)) &
-                    (trend_data['OrderDate'] <= pd.to_datetime(end_date))
-                ]
-
-                if selected_customer != 'All Customers':
-                    filtered_data = filtered_data[filtered_data['Customer'] == selected_customer]
-
-                # Interval selection
-                interval_options = ['Daily', 'Weekly', 'Monthly', 'Quarterly']
-                selected_interval = st.selectbox('Select Interval for Analysis:', interval_options)
-
-                # Resample data based on the selected interval
-                if selected_interval == 'Daily':
-                    filtered_data['Interval'] = filtered_data['OrderDate']
-                elif selected_interval == 'Weekly':
-                    filtered_data['Interval'] = filtered_data['OrderDate'].dt.to_period('W').apply(lambda r: r.start_time)
-                elif selected_interval == 'Monthly':
-                    filtered_data['Interval'] = filtered_data['OrderDate'].dt.to_period('M').apply(lambda r: r.start_time)
-                elif selected_interval == 'Quarterly':
-                    filtered_data['Interval'] = filtered_data['OrderDate'].dt.to_period('Q').apply(lambda r: r.start_time)
-
-                # User selection for trend analysis
-                trend_options = [
-                    "ItemCount", "percentage_fully_fulfilled", "percentage_partially_fulfilled",
-                    "percentage_not_fulfilled", "quantity_fulfill_rate", "OrderValue",
-                    "RevenueActualized", "RevenueLost", "percent_revenue_actualized"
-                ]
-                selected_trend = st.selectbox('Select Trend to Analyze:', trend_options)
-
-                # Group by Interval and aggregate the selected trend
-                trend_analysis = filtered_data.groupby('Interval')[selected_trend].sum().reset_index()
-
-                # Plot bar chart using Altair
-                chart = alt.Chart(trend_analysis).mark_bar(color='#2E86C1').encode(
-                    x=alt.X('Interval:T', title=selected_interval),
-                    y=alt.Y(selected_trend, title=selected_trend),
-                    tooltip=['Interval', selected_trend]
-                ).properties(
-                    title=f'{selected_trend} Over Time ({selected_customer}, {selected_interval})',
-                    width='container',
-                    height=400
-                )
-
-                # Display the chart
-                st.altair_chart(chart, use_container_width=True)
-                
+                visualize_trends(start_date, end_date)
+
             with p2:
-                st.subheader('Compare Trends', divider='rainbow')
-                                        
-                # Load data
-                data = pd.read_csv('app/assets/data/data_tables.csv')
-                data['OrderDate'] = pd.to_datetime(data['OrderDate'])
-
-                # Customer selection (Single select instead of multi-select)
-                customer_list = ['All Customers'] + data["Customer"].unique().tolist()
-                selected_customer = st.selectbox("Select Customer:", customer_list, key="customer_selectbox")
-                
-                # Metric selection (allowing multiple selections)
-                metrics = [
-                    "ItemCount", "percentage_fully_fulfilled", "percentage_partially_fulfilled",
-                    "percentage_not_fulfilled", "quantity_fulfill_rate", "OrderValue",
-                    "RevenueActualized", "RevenueLost", "percent_revenue_actualized"
-                ]
-                selected_metrics = st.multiselect("Select Metrics to Plot:", metrics, default=["OrderValue"], key="metrics_multiselect")
-
-                # Interval selection
-                interval_options = ['Daily', 'Weekly', 'Monthly', 'Quarterly']
-                selected_interval = st.selectbox('Select Interval for Analysis:', interval_options, key="interval_selectbox")
-
-                # Filter data by customer
-                filtered_data = data.copy()
-                if selected_customer != "All Customers":
-                    filtered_data = filtered_data[filtered_data["Customer"] == selected_customer]
-                else:
-                    filtered_data["Customer"] = "All Customers"
-
-                # Resample data based on the selected interval
-                if selected_interval == 'Daily':
-                    filtered_data['Interval'] = filtered_data['OrderDate']
-                elif selected_interval == 'Weekly':
-                    filtered_data['Interval'] = filtered_data['OrderDate'].dt.to_period('W').apply(lambda r: r.start_time)
-                elif selected_interval == 'Monthly':
-                    filtered_data['Interval'] = filtered_data['OrderDate'].dt.to_period('M').apply(lambda r: r.start_time)
-                elif selected_interval == 'Quarterly':
-                    filtered_data['Interval'] = filtered_data['OrderDate'].dt.to_period('Q').apply(lambda r: r.start_time)
-
-                # Aggregate data based on Interval and selected metrics
-                trend_analysis = filtered_data.groupby(['Interval']).agg({metric: 'sum' for metric in selected_metrics}).reset_index()
-
-                # Melt data for easier visualization (long format)
-                trend_analysis_melted = trend_analysis.melt(id_vars=['Interval'], var_name='Metric', value_name='Value')
-
-                # Plotting the line chart
-                chart = alt.Chart(trend_analysis_melted).mark_line().encode(
-                    x=alt.X('Interval:T', title=selected_interval),
-                    y=alt.Y('Value:Q', title='Metric Value'),
-                    color=alt.Color('Metric:N', title="Metrics"),
-                    tooltip=['Interval:T', 'Metric:N', 'Value:Q']
-                ).properties(
-                    title=f'Trend Comparison for Selected Metrics ({selected_interval} Interval)',
-                    width='container',
-                    height=400
-                )
-
-                # Display the chart
-                st.altair_chart(chart, use_container_width=True)
+                compare_trends()
         except Exception as e:
             st.error(f"An error occurred during filtering: {e}")
     else:
@@ -421,4 +325,5 @@ def dashboard():
     UI()  
 
 # Call the dashboard function to render the app
-dashboard()
\ No newline at end of file
+dashboard()
+diagnostics_panel()
\ No newline at end of file
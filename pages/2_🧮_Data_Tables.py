@@ -1,28 +1,21 @@
 import streamlit as st
 import datetime
-import pandas as pd
-import plotly.express as px
-import seaborn as sns
-import altair as alt
-from numerize.numerize import numerize  # Import numerize for compact number formatting
 from app.assets.styles.UI import *  # Make sure this exists and contains UI()
-from matplotlib import pyplot as plt
-from streamlit_extras.dataframe_explorer import dataframe_explorer
+from app.utils.table_explorer import load_table_index, table_explorer
+from app.utils.profiler import diagnostics_panel, stage, traced
 
 st.title("🧮 Data Tables")
 
+@traced("Data Tables")
 def data_tables():
     # Load CSS Style
     with open('app/assets/styles/style.css') as f:
         st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
     
-    # Load dataset
-    df = pd.read_csv('app/assets/data/data_tables.csv')
-    
-    # Convert OrderDate to datetime if not already
-    if df['OrderDate'].dtype != 'datetime64[ns]':
-        df['OrderDate'] = pd.to_datetime(df['OrderDate'], errors='coerce')  # Handle invalid dates
+    # Load dataset and its column indexes (cached across reruns, OrderDate already parsed)
+    with stage("load order tables"):
+        index = load_table_index('order_tables')
 
     # Sidebar date range filter
     with st.sidebar:
@@ -41,14 +34,9 @@ def data_tables():
     # Validate date inputs and filter data
     if start_date and end_date:
         try:
-            # Filter dataset based on date range
-            df2 = df[(df['OrderDate'] >= pd.Timestamp(start_date)) & (df['OrderDate'] <= pd.Timestamp(end_date))]
-
-
-            # Display dataframe explorer
-            
-            filtered_df = dataframe_explorer(df2, case=False)
-            st.dataframe(filtered_df, use_container_width=True)
+            # Filter, sort and page server-side; only the visible page reaches the browser
+            with stage("table explorer"):
+                table_explorer(index, start_date, end_date, key="data_tables")
 
         except Exception as e:
             st.error(f"An error occurred during filtering: {e}")
@@ -60,4 +48,5 @@ def data_tables():
     UI()  
 
 # Call the dashboard function to render the app
-data_tables()
\ No newline at end of file
+data_tables()
+diagnostics_panel()
\ No newline at end of file
@@ -1,71 +1,92 @@
 # Import libraries
+import os
+import concurrent.futures
 import streamlit as st
 import pandas as pd
-from app.utils.preprocess import load_and_clean_inventory
+from st_keyup import st_keyup
+from app.utils.data_access import load_customers
+from app.utils.inventory_index import load_inventory_index
+from app.utils.invoice_index import load_invoice_index
+from app.utils.item_search import load_item_search_index
+from app.utils.kpis import order_metrics
+from app.utils.bulk_import import read_order_sheet, sheet_orders, validate_order_sheet
+from app.utils.commit_queue import add_commit_listener, submit_order, submit_orders
+from app.utils.forecast_store import refresh_on_commit
+from app.utils.invoice_ingest import INBOX_DIR, ingest_async, ingest_status
+from app.utils.profiler import diagnostics_panel, stage, traced
 from app.assets.styles.UI import UI
 
 
     # Styled header
 st.title("🎯 Order Fulfillment Tracker")
 
+ITEM_SEARCH_LIMIT = 50  # Candidates sent to the item picker per query
+
+# Saved line items refit the forecasts of their items in the background
+add_commit_listener(refresh_on_commit)
+
 def calculate_kpis(order_df):
     """Calculate KPIs and add columns to the DataFrame."""
     if 'QuantityOrdered' in order_df and 'QuantityFulfilled' in order_df and 'Price' in order_df:
         order_df['Expected Revenue'] = order_df['QuantityOrdered'] * order_df['Price']
         order_df['Actual Revenue'] = order_df['QuantityFulfilled'] * order_df['Price']
         order_df['Revenue Lost'] = order_df['Expected Revenue'] - order_df['Actual Revenue']
-        order_df['Percent Revenue Actualized'] = (order_df['Actual Revenue'] / order_df['Expected Revenue']) * 100
-        order_df['Percent Revenue Actualized'].fillna(0, inplace=True)  # Handle NaN
+        order_df['Percent Revenue Actualized'] = ((order_df['Actual Revenue'] / order_df['Expected Revenue']) * 100).fillna(0)  # Handle NaN
     else:
         st.warning("Required columns for KPI calculation are missing!")
     return order_df
 
-def calculate_order_metrics(order_df):
-    """Calculate and return aggregated metrics for the entire order."""
-    item_count = order_df.shape[0]
-    fully_fulfilled_items = len(order_df[order_df['QuantityFulfilled'] == order_df['QuantityOrdered']])
-    partially_fulfilled_items = len(
-        order_df[(order_df['QuantityFulfilled'] > 0) & (order_df['QuantityFulfilled'] < order_df['QuantityOrdered'])]
-    )
-    not_fulfilled_items = len(order_df[order_df['QuantityFulfilled'] == 0])
-    quantity_fulfill_rate = (order_df['QuantityFulfilled'].sum() / order_df['QuantityOrdered'].sum()) * 100
-
-    order_value = order_df['OrderValue'].sum()
-    revenue_actualized = order_df['ValueActualized'].sum()
-    revenue_lost = order_value - revenue_actualized
-    percent_revenue_actualized = (revenue_actualized / order_value) * 100 if order_value > 0 else 0
-
-    return {
-        "ItemCount": item_count,
-        "percentage_fully_fulfilled": (fully_fulfilled_items / item_count) * 100,
-        "percentage_partially_fulfilled": (partially_fulfilled_items / item_count) * 100,
-        "percentage_not_fulfilled": (not_fulfilled_items / item_count) * 100,
-        "quantity_fulfill_rate": quantity_fulfill_rate,
-        "OrderValue": order_value,
-        "RevenueActualized": revenue_actualized,
-        "RevenueLost": revenue_lost,
-        "percent_revenue_actualized": percent_revenue_actualized,
-    }
+def commit_ack(future, timeout, pending_key):
+    """Wait up to ``timeout`` seconds for a save's acknowledgement; None if it is still queued.
+
+    A save that outlives the wait has not failed: the commit queue still
+    writes it. The future is kept under ``pending_key`` so that ``pending_ack``
+    can report the outcome on a later rerun.
+    """
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        st.session_state[pending_key] = future
+        st.info("The order files are busy, so the save is still queued and will complete shortly. "
+                "Please don't submit it again.")
+        return None
+
+def pending_ack(pending_key):
+    """Acknowledgement of a save that outlived its wait, once it has arrived; None otherwise."""
+    future = st.session_state.get(pending_key)
+    if future is None:
+        return None
+    if not future.done():
+        st.info("The previous save is still queued and will complete shortly. Please don't submit it again.")
+        return None
+    del st.session_state[pending_key]
+    return future.result()
+
+def order_saved(ack):
+    """Report a single-order save and clear the form once it is committed."""
+    if ack["committed"]:
+        st.success("Order and metrics have been added successfully!")
 
-def ensure_columns_exist(df, columns):
-    """Ensure necessary columns exist in the DataFrame."""
-    for column in columns:
-        if column not in df.columns:
-            df[column] = 0  # Initialize missing columns
-    return df
+        # Clear session state after saving
+        st.session_state["order_entries"] = []
+        st.session_state["order_metadata"] = {"order_date": None, "customer_name": None, "invoice_number": None}
+    else:
+        st.warning(ack["error"])
 
+@traced("Add Data")
 def add_data():
     """Main function to add new records to the database."""
-    # Load data from CSV files
-    df = pd.read_csv("app/assets/data/data.csv")
-    df_customers = pd.read_csv("app/assets/data/data_customers.csv")
-    df_inventory = pd.read_csv("app/assets/data/inventory/inventory.csv")
-
-    # Clean Inventory
-    inventory_df = load_and_clean_inventory("app/assets/data/inventory/inventory.csv")
+    # Load data (cached across reruns and sessions; re-read only when a file changes)
+    with stage("load customers and inventory"):
+        df_customers = load_customers()
+        inventory_index = load_inventory_index()
 
     st.subheader('Add New Record to Database')
 
+    if st.radio("Entry Mode", ["Item by Item", "Bulk Upload"], horizontal=True) == "Bulk Upload":
+        bulk_upload(df_customers, inventory_index)
+        return
+
     # Initialize session state for storing multiple items for a single order
     if "order_entries" not in st.session_state:
         st.session_state["order_entries"] = []
@@ -78,8 +99,9 @@ def add_data():
             "invoice_number": None
         }
 
-    # Validate invoice number for duplicates
-    existing_invoice_numbers = set(df['InvoiceNumber'])  # Extract existing invoice numbers from the dataset
+    # Validate invoice number for duplicates (persistent index; no need to read the order history)
+    with stage("load invoice index"):
+        existing_invoice_numbers = load_invoice_index()
 
     # Auto-validate metadata input (only ask once per order)
     col1, col2, col3 = st.columns(3)
@@ -104,9 +126,14 @@ def add_data():
         st.info(f"Customer: **{st.session_state['order_metadata']['customer_name']}**")
         st.info(f"Invoice Number: **{st.session_state['order_metadata']['invoice_number']}**")
 
+    # Search the inventory server-side; the picker only receives the top matches
+    item_query = st_keyup("Search Item", key="item_query", debounce=300, placeholder="Type an item name or code")
+    with stage("item search"):
+        item_matches = load_item_search_index().search(item_query, limit=ITEM_SEARCH_LIMIT) if item_query else []
+
     # Form to add multiple items to the order
     with st.form("item_form", clear_on_submit=True):
-        item_options = ['Select Item'] + list(inventory_df['Item'])
+        item_options = ['Select Item'] + item_matches
         item_selected = st.selectbox("Select Item", item_options)
         quantity_ordered = st.number_input("Quantity Ordered", min_value=0)
         quantity_fulfilled = st.number_input("Quantity Fulfilled", min_value=0)
@@ -117,11 +144,13 @@ def add_data():
                 st.error("Order details are not yet entered. Please complete the order details!")
             elif item_selected == 'Select Item':
                 st.error("Please select a valid item.")
+            elif quantity_ordered <= 0:
+                st.error("Quantity ordered must be at least 1.")
             elif quantity_fulfilled > quantity_ordered:
                 st.error("Fulfilled quantity cannot exceed the ordered quantity.")
             else:
                 # Get the price for the selected item
-                price = inventory_df[inventory_df['Item'] == item_selected]['Price'].values[0]
+                price = inventory_index.price(item_selected)
                 order_value = quantity_ordered * price  # Calculate OrderValue
                 value_actualized = quantity_fulfilled * price  # Calculate ValueActualized
                 revenue_lost = order_value - value_actualized
@@ -146,8 +175,13 @@ def add_data():
         st.write("### Current Order Details")
         st.write(order_df)
 
-    # Save Data button
-    if st.button("Save Data"):
+    # A save that outlived its wait on an earlier rerun is reported once it is acknowledged
+    ack = pending_ack("pending_order_save")
+    if ack is not None:
+        order_saved(ack)
+
+    # Save Data button (held back while an earlier save is still queued)
+    if st.button("Save Data") and "pending_order_save" not in st.session_state:
         if not st.session_state["order_metadata"]["order_date"]:
             st.error("Order details are missing! Please complete them before saving.")
         elif not st.session_state["order_entries"]:
@@ -155,44 +189,98 @@ def add_data():
         else:
             order_df = pd.DataFrame(st.session_state["order_entries"])
 
-            # Calculate KPIs and ensure necessary columns exist in df
+            # Calculate KPIs for the new line items
             order_df = calculate_kpis(order_df)
-            df = ensure_columns_exist(df, order_df.columns)
-
-            # Concatenate new data
-            df = pd.concat([df, order_df], ignore_index=True)
 
             # Calculate aggregated metrics for the order
-            order_metrics = calculate_order_metrics(order_df)
-
-            # Add order-level KPIs to data_tables.csv
-            data_table_path = "app/assets/data/data_tables.csv"
-            try:
-                data_tables = pd.read_csv(data_table_path)
-            except FileNotFoundError:
-                data_tables = pd.DataFrame()
+            metrics = order_metrics(order_df)
 
             order_row = {
                 "OrderDate": st.session_state["order_metadata"]["order_date"],
                 "InvoiceNumber": st.session_state["order_metadata"]["invoice_number"],
                 "Customer": st.session_state["order_metadata"]["customer_name"],
-                **order_metrics
+                **metrics
             }
 
-            data_tables = pd.concat([data_tables, pd.DataFrame([order_row])], ignore_index=True)
+            # Hand the order to the shared writer and wait for its acknowledgement
+            with stage("commit order"):
+                ack = commit_ack(submit_order(order_df, order_row), 60, "pending_order_save")
+            if ack is not None:
+                order_saved(ack)
+
+def bulk_upload(df_customers, inventory_index):
+    """Validate a whole CSV/XLSX order sheet in one pass and save it as one atomic commit."""
+    ack = pending_ack("pending_bulk_save")
+    if ack is not None and ack["committed"]:
+        st.success(f"Saved the uploaded orders with {ack['lines']} line items.")
+    elif ack is not None:
+        st.warning(ack["error"])
+
+    upload = st.file_uploader("Order Sheet (CSV or XLSX)", type=["csv", "xlsx"])
+    st.caption("Columns: Item, QuantityOrdered, QuantityFulfilled, and optionally InvoiceNumber, OrderDate "
+               "and Customer. The details below fill in any order columns the sheet leaves blank.")
+    col1, col2, col3 = st.columns(3)
+    defaults = {
+        "OrderDate": col1.date_input(label="Order Date", key="bulk_order_date"),
+        "Customer": col2.selectbox("Customer", df_customers["Customer"], key="bulk_customer"),
+        "InvoiceNumber": col3.text_input(label="Invoice Number", key="bulk_invoice_number").strip() or None,
+    }
+    if upload is None:
+        return
+
+    try:
+        sheet = read_order_sheet(upload)
+    except Exception as e:
+        st.error(f"Unable to read the file. Error: {e}")
+        return
+    lines, problems = validate_order_sheet(sheet, inventory_index, load_invoice_index(), defaults)
+    if not problems.empty:
+        st.error(f"{len(problems)} problem(s) found in {len(sheet)} lines. Fix the sheet and upload it again.")
+        st.dataframe(problems, hide_index=True, use_container_width=True)
+        return
+
+    orders = sheet_orders(lines)
+    metrics = order_metrics(lines)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Orders", len(orders))
+    col2.metric("Line Items", metrics["ItemCount"])
+    col3.metric("Order Value", f"{metrics['OrderValue']:,.2f}")
+    col4.metric("Revenue Actualized", f"{metrics['percent_revenue_actualized']:.1f} %")
+    st.dataframe(calculate_kpis(lines.copy()), hide_index=True, use_container_width=True)
+
+    if st.button("Save Uploaded Orders") and "pending_bulk_save" not in st.session_state:
+        future = submit_orders([(calculate_kpis(order_lines), order_row) for order_lines, order_row in orders])
+        ack = commit_ack(future, 120, "pending_bulk_save")
+        if ack is not None and ack["committed"]:
+            st.success(f"Saved {len(orders)} order(s) with {ack['lines']} line items.")
+        elif ack is not None:
+            st.warning(ack["error"])
+
+def import_invoices():
+    """Bulk import of sales-invoice PDFs, run in the background."""
+    with st.expander("Import Invoice PDFs"):
+        uploads = st.file_uploader("Invoice PDFs", type="pdf", accept_multiple_files=True)
+        if st.button("Import Invoices", disabled=not uploads):
+            os.makedirs(INBOX_DIR, exist_ok=True)
+            for upload in uploads:
+                with open(os.path.join(INBOX_DIR, os.path.basename(upload.name)), 'wb') as f:
+                    f.write(upload.getbuffer())
+            if ingest_async(INBOX_DIR):
+                st.success(f"Importing {len(uploads)} invoices in the background.")
+            else:
+                st.warning("An import is already running; the new files will be picked up by the next one.")
 
-            try:
-                # Save updated datasets
-                df.to_csv("app/assets/data/data.csv", index=False)
-                data_tables.to_csv(data_table_path, index=False)
-                st.success("Order and metrics have been added successfully!")
+        status = ingest_status()
+        if status["files"]:
+            state = "Importing" if status["running"] else "Last import"
+            st.info(
+                f"{state}: {status['committed']} committed, {status['duplicates']} already saved, "
+                f"{status['rejected']} rejected, {status['errors']} unreadable of {status['files']} files."
+            )
 
-                # Clear session state after saving
-                st.session_state["order_entries"] = []
-                st.session_state["order_metadata"] = {"order_date": None, "customer_name": None, "invoice_number": None}
-            except Exception as e:
-                st.warning(f"Unable to write. Error: {e}")
 UI()
 
 # Execute the function to display the form
 add_data()
+import_invoices()
+diagnostics_panel()
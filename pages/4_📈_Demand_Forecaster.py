@@ -1,4 +1,70 @@
 import streamlit as st
+from st_keyup import st_keyup
+from app.utils.forecast_store import (forecast_status, item_watermarks, load_forecasts, refresh_async,
+                                      refresh_pending, stale_items)
+from app.utils.inventory_index import load_inventory_index
+from app.utils.item_search import load_item_search_index
+from app.utils.lazy import lazy_import
+
+alt = lazy_import("altair")  # loaded when a forecast chart is drawn
 
 st.title("Forecaster")
-st.subheader("Coming soon")
\ No newline at end of file
+
+ITEM_SEARCH_LIMIT = 50  # Candidates sent to the item picker per query
+
+# Forecasts are read from the store; models are only fitted by the refresh
+forecasts = load_forecasts()
+watermarks = item_watermarks()
+
+if refresh_pending():
+    st.info("Refreshing forecasts in the background. Rerun the page to see the new results.")
+
+status = forecast_status(forecasts, watermarks)
+if forecasts.empty:
+    st.info("No forecasts yet. Build them with `python -m app.utils.forecasting`, or start a refresh below.")
+else:
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Items Forecast", f"{len(status):,}")
+    col2.metric("Stale Forecasts", f"{int(status['Stale'].sum()):,}")
+    col3.metric("New Lines Since Fit", f"{int(status['NewLines'].sum()):,}")
+    col4.metric("Oldest Fit", f"{status['Age'].max().days} days ago")
+
+if st.button("Refresh stale forecasts", disabled=refresh_pending()):
+    stale = stale_items(load_inventory_index().items, forecasts, watermarks)
+    if stale:
+        refresh_async(stale)
+        st.success(f"Refitting {len(stale):,} items in the background.")
+    else:
+        st.success("All forecasts are up to date.")
+
+if not forecasts.empty:
+    item_query = st_keyup("Search Item", key="forecast_item_query", debounce=300, placeholder="Type an item name or code")
+    item_matches = load_item_search_index().search(item_query, limit=ITEM_SEARCH_LIMIT) if item_query else []
+    item_selected = st.selectbox("Select Item", ['Select Item'] + item_matches)
+
+    if item_selected != 'Select Item':
+        item_status = status[status['Item'] == item_selected]
+        if item_status.empty:
+            st.warning("No forecast for this item yet.")
+        else:
+            row = item_status.iloc[0]
+            st.caption(
+                f"Model: **{row['Model']}** · fitted {row['FittedAt']:%Y-%m-%d %H:%M} "
+                f"({row['Age'].days} days ago) · {row['NewLines']} new lines since"
+                + (" · **stale**" if row['Stale'] else "")
+            )
+            item_forecast = forecasts[forecasts['Item'] == item_selected]
+            chart = alt.Chart(item_forecast).mark_line(point=True).encode(
+                x=alt.X('Week:T', title='Week'),
+                y=alt.Y('Forecast:Q', title='Forecast Quantity'),
+                tooltip=[alt.Tooltip('Week:T'), alt.Tooltip('Forecast:Q', format='.1f')],
+            )
+            st.altair_chart(chart, use_container_width=True)
+
+    with st.expander("Forecast freshness"):
+        st.dataframe(
+            status.assign(Age=status['Age'].dt.days).rename(columns={'Age': 'Age (days)'})
+            .sort_values(['Stale', 'NewLines'], ascending=False),
+            hide_index=True,
+            use_container_width=True,
+        )
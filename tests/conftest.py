@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.utils import data_access  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Keep sidecars out of the real data directory and start every test with an empty in-memory cache."""
+    monkeypatch.chdir(ROOT)  # data paths are relative to the repo root, as when the app runs
+    monkeypatch.setattr(data_access, 'CACHE_DIR', str(tmp_path / '.cache'))
+    data_access.invalidate()
+    yield
+    data_access.invalidate()
+
+
+@pytest.fixture
+def lines():
+    """A few order lines over three invoices, in the stored data.csv columns."""
+    return pd.DataFrame({
+        'OrderDate': ['2024-01-05', '2024-01-05', '2024-02-10', '2024-03-15', '2024-03-15'],
+        'Customer': ['Acme', 'Acme', 'Bolt', 'Acme', 'Acme'],
+        'Item': ['PANADOL', 'VICKS', 'PANADOL', 'SUDOCREM', 'VICKS'],
+        'QuantityOrdered': [10, 4, 5, 2, 8],
+        'QuantityFulfilled': [10, 2, 0, 2, 8],
+        'Price': [2.5, 10.0, 2.5, 7.0, 10.0],
+        'InvoiceNumber': ['INV-1', 'INV-1', 'INV-2', 'INV-3', 'INV-3'],
+    })
+
+
+@pytest.fixture
+def inventory():
+    """Inventory rows (Item, Form, Price) for the items in ``lines``."""
+    return pd.DataFrame({
+        'Item': ['PANADOL', 'VICKS', 'SUDOCREM'],
+        'Form': ['Tab', 'Jar', 'Tub'],
+        'Price': [2.5, 10.0, 7.0],
+    })
@@ -0,0 +1,72 @@
+import io
+
+import pandas as pd
+import pytest
+
+from app.utils.bulk_import import read_order_sheet, sheet_orders, validate_order_sheet
+from app.utils.inventory_index import InventoryIndex
+from app.utils.invoice_index import InvoiceIndex
+from app.utils.order_tables import build_order_tables
+
+DEFAULTS = {'OrderDate': '2024-05-01', 'Customer': 'Acme', 'InvoiceNumber': 'NEW-1'}
+
+
+@pytest.fixture
+def indexes(tmp_path, inventory, lines):
+    orders_path = tmp_path / 'data.csv'
+    lines.to_csv(orders_path, index=False)
+    return InventoryIndex(inventory), InvoiceIndex(str(tmp_path / 'invoices.idx'), str(orders_path))
+
+
+def sheet(**columns):
+    return pd.DataFrame(columns).astype(str)
+
+
+def test_headers_are_mapped_to_schema_names():
+    upload = io.BytesIO(b"item,Quantity Ordered,quantity fulfilled\nVICKS,3,1\n")
+    assert list(read_order_sheet(upload).columns) == ['Item', 'QuantityOrdered', 'QuantityFulfilled']
+
+
+def test_valid_sheet_is_priced(indexes):
+    lines, problems = validate_order_sheet(sheet(Item=['vicks ', 'PANADOL'], QuantityOrdered=[3, 2],
+                                                 QuantityFulfilled=[1, 2]), *indexes, DEFAULTS)
+    assert problems.empty
+    assert lines['Item'].tolist() == ['VICKS', 'PANADOL']
+    assert lines['OrderValue'].tolist() == [30.0, 5.0]
+    assert lines['RevenueLost'].tolist() == [20.0, 0.0]
+
+
+def test_duplicate_invoice_is_reported_once(indexes):
+    _, problems = validate_order_sheet(sheet(Item=['VICKS'] * 6, QuantityOrdered=[1] * 6, QuantityFulfilled=[1] * 6),
+                                       *indexes, {**DEFAULTS, 'InvoiceNumber': 'INV-2'})
+    assert problems.to_dict('records') == [{'Row': 2, 'Item': '', 'Problem': "Invoice number INV-2 already exists"}]
+
+
+def test_line_checks(indexes):
+    _, problems = validate_order_sheet(sheet(
+        Item=['VICKS', '', 'VICKS', 'VICKS', 'VICKS'],
+        QuantityOrdered=['0', '1', '2.5', '2', '3'],
+        QuantityFulfilled=['0', '1', '1', '3', '-1'],
+        Customer=['', '', '', '', 'Bolt'],
+    ), *indexes, DEFAULTS)
+    assert set(zip(problems['Row'], problems['Problem'])) == {
+        (2, "Quantity ordered is not a whole number of 1 or more"),
+        (3, "No item"),
+        (4, "Quantity ordered is not a whole number of 1 or more"),
+        (5, "Fulfilled quantity exceeds the ordered quantity"),
+        (6, "Quantity fulfilled is not a whole number of 0 or more"),
+        (2, "Invoice NEW-1 has more than one order date or customer"),
+    }
+
+
+def test_orders_match_the_order_table(indexes):
+    lines, problems = validate_order_sheet(sheet(
+        Item=['VICKS', 'PANADOL', 'SUDOCREM'], QuantityOrdered=[4, 2, 1], QuantityFulfilled=[2, 2, 0],
+        InvoiceNumber=['B-2', 'A-1', 'B-2'],
+    ), *indexes, DEFAULTS)
+    assert problems.empty
+    orders = sheet_orders(lines)
+    assert [row['InvoiceNumber'] for _, row in orders] == ['A-1', 'B-2']
+    assert [len(order_lines) for order_lines, _ in orders] == [1, 2]
+    assert [row for _, row in orders] == build_order_tables(lines).to_dict('records')
+    assert orders[1][1]['RevenueLost'] == 27.0
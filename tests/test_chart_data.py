@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from app.utils.chart_data import downsample_series, lttb, sample_points, time_aggregate, top_categories
+
+
+def test_lttb_keeps_the_ends_and_the_extremes():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[333], y[777] = 50, -40
+    keep = lttb(x, y, 20)
+    assert len(keep) == 20
+    assert keep[0] == 0 and keep[-1] == 999
+    assert (np.diff(keep) > 0).all()
+    assert {333, 777} <= set(keep)
+
+
+def test_lttb_short_series_and_tiny_thresholds():
+    assert lttb(np.arange(5), np.arange(5), 10).tolist() == [0, 1, 2, 3, 4]
+    assert lttb(np.arange(5), np.arange(5), 2).tolist() == [0, 4]
+    assert lttb(np.arange(5), np.arange(5), 0).tolist() == []
+
+
+def test_downsample_series_per_group_on_dates():
+    dates = pd.date_range('2024-01-01', periods=300, freq='D')
+    df = pd.DataFrame({
+        'Date': np.tile(dates, 2),
+        'Value': np.concatenate([np.sin(np.arange(300) / 10), np.arange(300.0)]),
+        'Series': np.repeat(['a', 'b'], 300),
+    }).iloc[::-1]
+    thinned = downsample_series(df, 'Date', 'Value', by='Series', max_points=30)
+    assert thinned.groupby('Series').size().tolist() == [30, 30]
+    assert thinned.groupby('Series')['Date'].min().eq(dates[0]).all()
+    assert thinned.groupby('Series')['Date'].max().eq(dates[-1]).all()
+    assert thinned['Date'].groupby(thinned['Series']).is_monotonic_increasing.all()
+
+
+def test_sample_points_is_bounded_deterministic_and_ordered():
+    df = pd.DataFrame({'x': np.arange(2000)})
+    sample = sample_points(df, 100)
+    assert len(sample) == 100 and sample['x'].is_monotonic_increasing
+    assert sample.equals(sample_points(df, 100))
+    assert len(sample_points(df.iloc[:50], 100)) == 50
+
+
+def test_top_categories_folds_the_rest_into_other(lines):
+    top = top_categories(lines, 'Item', 'QuantityOrdered', limit=2)
+    assert top['Item'].tolist() == ['PANADOL', 'VICKS', 'Other']
+    assert top['QuantityOrdered'].tolist() == [15, 12, 2]
+    assert len(top_categories(lines, 'Item', 'QuantityOrdered', limit=3)) == 3
+
+
+def test_time_aggregate(lines):
+    lines = lines.assign(OrderDate=pd.to_datetime(lines['OrderDate']))
+    monthly = time_aggregate(lines, 'OrderDate', 'QuantityOrdered')
+    assert monthly['Interval'].tolist() == [pd.Timestamp('2024-01-01'), pd.Timestamp('2024-02-01'), pd.Timestamp('2024-03-01')]
+    assert monthly['QuantityOrdered'].tolist() == [14, 5, 10]
+
+    by_item = time_aggregate(lines, 'OrderDate', 'QuantityOrdered', interval='Quarterly', by='Item', limit=1)
+    assert by_item.to_dict('records') == [
+        {'Interval': pd.Timestamp('2024-01-01'), 'Item': 'Other', 'QuantityOrdered': 14},
+        {'Interval': pd.Timestamp('2024-01-01'), 'Item': 'PANADOL', 'QuantityOrdered': 15},
+    ]
@@ -0,0 +1,76 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from app.utils.commit_queue import CommitQueue
+
+
+@pytest.fixture
+def paths(tmp_path, lines):
+    paths = {name: str(tmp_path / name) for name in ['data.csv', 'data_tables.csv', 'orders.lock', 'invoices.idx']}
+    lines.iloc[:2].to_csv(paths['data.csv'], index=False)
+    pd.DataFrame([{'OrderDate': '2024-01-05', 'InvoiceNumber': 'INV-1', 'ItemCount': 2}]).to_csv(
+        paths['data_tables.csv'], index=False)
+    return paths
+
+
+@pytest.fixture
+def commit_queue(paths):
+    return CommitQueue(paths['data.csv'], paths['data_tables.csv'], paths['orders.lock'], paths['invoices.idx'])
+
+
+def order(lines, invoice, **columns):
+    order_lines = lines.iloc[2:4].assign(InvoiceNumber=invoice, **columns)
+    return order_lines, {'OrderDate': '2024-03-15', 'InvoiceNumber': invoice, 'ItemCount': len(order_lines)}
+
+
+def contents(paths):
+    return {name: open(paths[name], 'rb').read() for name in ['data.csv', 'data_tables.csv', 'invoices.idx']}
+
+
+def test_order_is_committed_to_every_file(commit_queue, paths, lines):
+    committed = []
+    commit_queue.add_listener(committed.append)
+    ack = commit_queue.submit(*order(lines, 'NEW-1')).result(timeout=10)
+    assert ack['committed'] and ack['invoice_number'] == 'NEW-1' and ack['lines'] == 2
+    assert pd.read_csv(paths['data.csv'])['InvoiceNumber'].tolist() == ['INV-1', 'INV-1', 'NEW-1', 'NEW-1']
+    assert pd.read_csv(paths['data_tables.csv'])['InvoiceNumber'].tolist() == ['INV-1', 'NEW-1']
+    assert 'NEW-1' in commit_queue.invoice_index
+    assert len(committed) == 1 and len(committed[0]) == 2
+
+
+def test_duplicate_invoices_are_rejected(commit_queue, paths, lines):
+    before = open(paths['data.csv']).read()
+    ack = commit_queue.submit(*order(lines, ' INV-1 ')).result(timeout=10)
+    assert not ack['committed'] and 'already exists' in ack['error']
+    # A group is saved all together or not at all
+    ack = commit_queue.submit_many([order(lines, 'NEW-1'), order(lines, 'INV-1')]).result(timeout=10)
+    assert not ack['committed'] and ack['invoice_numbers'] == ['NEW-1', 'INV-1']
+    assert open(paths['data.csv']).read() == before
+
+
+def test_concurrent_saves_are_all_written(commit_queue, paths, lines):
+    with ThreadPoolExecutor(8) as pool:
+        acks = list(pool.map(lambda i: commit_queue.submit(*order(lines, f"NEW-{i}")).result(timeout=30), range(40)))
+    assert all(ack['committed'] for ack in acks)
+    assert len(pd.read_csv(paths['data.csv'])) == 2 + 40 * 2
+    assert len(pd.read_csv(paths['data_tables.csv'])) == 1 + 40
+
+
+@pytest.mark.parametrize('columns', [{}, {'Batch': 'new column'}])
+def test_failed_commit_is_rolled_back(commit_queue, paths, lines, monkeypatch, columns):
+    commit_queue.submit(*order(lines, 'NEW-1')).result(timeout=10)
+    before = contents(paths)
+
+    def fail(invoice_numbers):
+        list(invoice_numbers)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(commit_queue.invoice_index, 'add', fail)
+    # With a new column, data.csv is rewritten rather than appended to, and restored from a copy
+    ack = commit_queue.submit(*order(lines, 'NEW-2', **columns)).result(timeout=10)
+    assert not ack['committed'] and 'disk full' in ack['error']
+    assert contents(paths) == before
+    assert not [name for name in os.listdir(os.path.dirname(paths['data.csv'])) if name.endswith('.rollback')]
@@ -0,0 +1,45 @@
+import datetime
+import json
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pages", "1_📊_Dashboard.py")
+
+
+def chart_titles(at):
+    return [json.loads(chart.proto.spec).get('title') for chart in at.get('vega_lite_chart')]
+
+
+@pytest.fixture
+def dashboard():
+    """The Dashboard over the bundled orders, with the range widened to cover them."""
+    at = AppTest.from_file(PAGE, default_timeout=60)
+    at.query_params['diagnostics'] = '1'
+    at.run()
+    at.date_input[0].set_value(datetime.date(2020, 1, 1)).run()
+    assert not at.exception
+    return at
+
+
+def sections(at):
+    latest = at.session_state['_profiler_traces'][-1]
+    return [entry['stage'] for entry in latest['stages'] if entry['depth'] == 1]
+
+
+def test_sections_render_inside_the_page_trace(dashboard):
+    assert {'Dashboard/data explorer', 'Dashboard/visualize trends', 'Dashboard/compare trends'} <= set(
+        sections(dashboard))
+    assert 'ItemCount Over Time (All Customers, Daily)' in chart_titles(dashboard)
+
+
+def test_trend_panels_follow_their_own_widgets(dashboard):
+    trend_interval = next(box for box in dashboard.selectbox if box.label == 'Select Interval for Analysis:'
+                          and box.key is None)
+    trend_interval.set_value('Monthly').run()
+    dashboard.selectbox(key='interval_selectbox').set_value('Quarterly').run()
+    assert not dashboard.exception
+    titles = chart_titles(dashboard)
+    assert 'ItemCount Over Time (All Customers, Monthly)' in titles
+    assert 'Trend Comparison for Selected Metrics (Quarterly Interval)' in titles
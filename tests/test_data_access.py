@@ -0,0 +1,156 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from app.utils import data_access
+from app.utils.data_access import (cache_stats, cached, date_bounds, filter_date_range, invalidate, load_inventory,
+                                   load_order_tables, load_orders)
+
+
+def wait_for_sidecars():
+    for thread in threading.enumerate():
+        if thread.name == "sidecar-refresh":
+            thread.join()
+
+
+@pytest.fixture
+def orders_csv(tmp_path, lines):
+    path = tmp_path / 'data.csv'
+    lines.iloc[::-1].to_csv(path, index=False)  # newest first, to check the loader sorts
+    return str(path)
+
+
+def append(path, rows):
+    with open(path, 'a') as f:
+        rows.to_csv(f, header=False, index=False)
+
+
+def test_cached_builds_once_per_file_version(tmp_path):
+    path = tmp_path / 'file.txt'
+    path.write_text('one\n')
+    builds = []
+    build = lambda p: builds.append(p) or len(builds)  # noqa: E731
+    assert cached('test', str(path), build) == 1
+    assert cached('test', str(path), build) == 1
+    path.write_text('one\ntwo\n')
+    assert cached('test', str(path), build) == 2
+
+
+def test_invalidate_and_stats(tmp_path):
+    paths = [tmp_path / 'a.txt', tmp_path / 'b.txt']
+    for path in paths:
+        path.write_text('x\n')
+    builds = []
+    build = lambda p: builds.append(p) or p  # noqa: E731
+    before = cache_stats()
+    for path in paths * 2:
+        cached('test', str(path), build)
+    after = cache_stats()
+    assert (after['hits'] - before['hits'], after['misses'] - before['misses'], after['entries']) == (2, 2, 2)
+    assert len(builds) == 2
+    invalidate(str(paths[0]))
+    assert cache_stats()['entries'] == 1
+    cached('test', str(paths[0]), build)
+    cached('test', str(paths[1]), build)
+    assert builds == [str(paths[0]), str(paths[1]), str(paths[0])]
+
+
+def test_file_changed_while_building_is_not_cached(tmp_path):
+    path = tmp_path / 'file.txt'
+    path.write_text('one\n')
+    builds = []
+
+    def build(p):
+        builds.append(p)
+        if len(builds) == 1:
+            with open(p, 'a') as f:
+                f.write('two\n')  # a save landing during the read
+        return len(builds)
+
+    assert cached('test', str(path), build) == 1
+    assert cached('test', str(path), build) == 2
+    assert cached('test', str(path), build) == 2
+
+
+def test_orders_are_typed_and_sorted_by_date(orders_csv):
+    orders = load_orders(orders_csv)
+    assert orders['OrderDate'].is_monotonic_increasing
+    assert isinstance(orders['Item'].dtype, pd.CategoricalDtype)
+    assert str(orders['QuantityOrdered'].dtype) == 'Int32'
+    assert filter_date_range(orders, '2024-02-01', '2024-02-28')['InvoiceNumber'].tolist() == ['INV-2']
+
+
+def test_append_extends_the_cached_frame(orders_csv, lines):
+    before = load_orders(orders_csv)
+    append(orders_csv, lines.iloc[[2]].assign(OrderDate='2024-01-20', InvoiceNumber='INV-4'))
+    after = load_orders(orders_csv)
+    assert len(after) == len(before) + 1
+    assert after['OrderDate'].is_monotonic_increasing
+    assert after['InvoiceNumber'].tolist().count('INV-4') == 1
+
+
+def test_rewritten_file_is_reloaded_not_extended(orders_csv, lines):
+    load_orders(orders_csv)
+    # Same-length edit of the last row plus an appended row: not an append-only change
+    head, _, last = open(orders_csv).read().rstrip('\n').rpartition('\n')
+    with open(orders_csv, 'w') as f:
+        f.write(f"{head}\n{last.replace('Acme', 'Axme')}\n")
+    append(orders_csv, lines.iloc[[2]].assign(InvoiceNumber='INV-4'))
+    orders = load_orders(orders_csv)
+    assert len(orders) == len(lines) + 1
+    assert orders['Customer'].value_counts().to_dict() == {'Acme': 3, 'Bolt': 2, 'Axme': 1}
+
+
+def test_cold_load_from_sidecar_adds_only_appended_rows(orders_csv, lines):
+    load_orders(orders_csv)
+    wait_for_sidecars()
+    append(orders_csv, lines.iloc[[0]].assign(InvoiceNumber='INV-4'))
+    data_access.invalidate()
+    orders = load_orders(orders_csv)
+    assert len(orders) == len(lines) + 1
+    assert not orders.duplicated().any()
+
+
+def test_sidecar_signature_travels_with_the_parquet_file(orders_csv):
+    load_orders(orders_csv)
+    wait_for_sidecars()
+    source, meta = data_access._open_sidecar(orders_csv)
+    assert (meta['mtime_ns'], meta['size']) == data_access.file_signature(orders_csv)
+    assert not [name for name in os.listdir(data_access.CACHE_DIR) if not name.endswith('.parquet')]
+
+
+def test_same_named_files_get_their_own_sidecar(tmp_path, lines):
+    paths = []
+    for name, rows in [('a', lines.iloc[:2]), ('b', lines.iloc[2:])]:
+        os.makedirs(tmp_path / name)
+        paths.append(str(tmp_path / name / 'data.csv'))
+        rows.to_csv(paths[-1], index=False)
+        load_orders(paths[-1])
+        wait_for_sidecars()
+    assert data_access._sidecar_path(paths[0]) != data_access._sidecar_path(paths[1])
+    data_access.invalidate()
+    assert len(load_orders(paths[0])) == 2
+    assert len(load_orders(paths[1])) == 3
+
+
+def test_date_bounds_are_inclusive_and_skip_unparseable_dates(tmp_path, lines):
+    path = tmp_path / 'data.csv'
+    lines.assign(OrderDate=['2024-01-05', 'bad date', '10-02-24', '2024-03-15', '2024-03-15']).to_csv(path, index=False)
+    orders = load_orders(str(path))
+    assert orders['OrderDate'].isna().tolist() == [False] * 4 + [True]  # unparseable dates sort last
+    assert date_bounds(orders, '2024-02-10', '2024-03-15') == (1, 4)
+    assert date_bounds(orders, '2025-01-01', '2025-12-31') == (4, 4)
+    assert filter_date_range(orders, '2024-01-01', '2024-01-31')['InvoiceNumber'].tolist() == ['INV-1']
+
+
+def test_inventory_prices_are_cleaned(tmp_path):
+    path = tmp_path / 'inventory.csv'
+    path.write_text('Item,Form,Price\nPANADOL,Tab,GHS 2.50\nOXYGEN,Btl,"GHS 1,250.00"\nSAMPLE,Pcs,\n')
+    assert load_inventory(str(path))['Price'].tolist() == [2.5, 1250.0, 0.0]
+
+
+def test_missing_order_tables_load_as_empty(tmp_path):
+    tables = load_order_tables(str(tmp_path / 'data_tables.csv'))
+    assert tables.empty and {'OrderDate', 'InvoiceNumber', 'Customer'} <= set(tables.columns)
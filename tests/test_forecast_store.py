@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+from app.utils import data_access, forecast_store, forecasting, inventory_index
+from app.utils.forecast_store import forecast_status, load_forecasts, refresh
+
+
+@pytest.fixture
+def store(tmp_path, lines, inventory, monkeypatch):
+    """Point the forecast store at a temporary order history, inventory and model directory."""
+    paths = {name: str(tmp_path / name) for name in ['data.csv', 'inventory.csv', 'forecasts.parquet', 'models']}
+    lines.to_csv(paths['data.csv'], index=False)
+    inventory.to_csv(paths['inventory.csv'], index=False)
+    monkeypatch.setattr(forecasting, 'HAVE_STATSMODELS', False)
+    monkeypatch.setattr(forecast_store, 'load_orders',
+                        lambda path=None, columns=None: data_access.load_orders(paths['data.csv'], columns))
+    monkeypatch.setattr(forecast_store, 'item_watermarks',
+                        lambda path=None: data_access.cached("forecast_watermarks", paths['data.csv'],
+                                                             forecast_store._watermarks))
+    monkeypatch.setattr(forecast_store, 'load_inventory_index',
+                        lambda: inventory_index.load_inventory_index(paths['inventory.csv']))
+    return paths
+
+
+def run(paths, items=None):
+    return refresh(items, horizon=4, model_dir=paths['models'], path=paths['forecasts.parquet'])
+
+
+def append(path, lines):
+    with open(path, 'a') as f:
+        lines.to_csv(f, header=False, index=False)
+
+
+def test_first_refresh_fits_every_item_then_nothing_is_stale(store):
+    result = run(store)
+    assert sorted(result['Item'].unique()) == ['PANADOL', 'SUDOCREM', 'VICKS']
+    assert len(result) == 12
+    assert result['Week'].min() == pd.Timestamp('2024-03-18')
+    assert result.drop_duplicates('Item').set_index('Item')['Lines'].to_dict() == {
+        'PANADOL': 2, 'VICKS': 2, 'SUDOCREM': 1}
+    assert len(load_forecasts(store['forecasts.parquet'])) == 12
+    assert run(store).empty
+
+
+def test_new_lines_refit_only_their_items(store, lines):
+    run(store)
+    # Same week as the last order, so the history window does not move
+    append(store['data.csv'], lines.iloc[[0]].assign(OrderDate='2024-03-14', InvoiceNumber='INV-4'))
+    result = run(store)
+    assert result['Item'].unique().tolist() == ['PANADOL']
+    saved = load_forecasts(store['forecasts.parquet'])
+    assert len(saved) == 12
+    assert saved.drop_duplicates('Item').set_index('Item').loc['PANADOL', 'Lines'] == 3
+
+
+def test_moving_history_window_refits_every_stored_item(store, lines):
+    run(store)
+    append(store['data.csv'], lines.iloc[[0]].assign(OrderDate='2024-04-02', InvoiceNumber='INV-4'))
+    result = run(store, ['PANADOL'])
+    assert sorted(result['Item'].unique()) == ['PANADOL', 'SUDOCREM', 'VICKS']
+    saved = load_forecasts(store['forecasts.parquet'])
+    # Every item's forecast starts the week after the new last order
+    assert (saved.groupby('Item')['Week'].min() == pd.Timestamp('2024-04-08')).all()
+
+
+def test_forecast_status_marks_old_and_moved_forecasts_stale(store, lines):
+    run(store)
+    saved = load_forecasts(store['forecasts.parquet'])
+    marks = forecast_store.item_watermarks()
+    fitted_at = saved['FittedAt'].max()
+    assert not forecast_status(saved, marks, now=fitted_at)['Stale'].any()
+    assert forecast_status(saved, marks, now=fitted_at + forecast_store.MAX_AGE + pd.Timedelta(hours=1))['Stale'].all()
+
+    append(store['data.csv'], lines.iloc[[1]].assign(OrderDate='2024-03-14', InvoiceNumber='INV-4'))
+    status = forecast_status(saved, forecast_store.item_watermarks(), now=fitted_at).set_index('Item')
+    assert status['Stale'].to_dict() == {'PANADOL': False, 'VICKS': True, 'SUDOCREM': False}
+    assert status.loc['VICKS', 'NewLines'] == 1
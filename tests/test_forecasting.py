@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils import forecasting
+from app.utils.forecasting import croston_sba, demand_matrix, dense_mask, forecast_items, holt
+
+
+@pytest.fixture
+def dated_lines(lines):
+    return lines.assign(OrderDate=pd.to_datetime(lines['OrderDate']))
+
+
+def test_demand_matrix_buckets_ordered_quantities_by_week(dated_lines):
+    matrix, weeks = demand_matrix(dated_lines, ['PANADOL', 'VICKS', 'SUDOCREM', 'NEVER ORDERED'])
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (4, 11)
+    assert weeks[0] == pd.Timestamp('2024-01-01') and weeks[-1] == pd.Timestamp('2024-03-11')
+    assert matrix[0, 0] == 10 and matrix[0, 5] == 5 and matrix[0].sum() == 15
+    assert matrix[1, 0] == 4 and matrix[1, 10] == 8
+    assert matrix[3].sum() == 0
+
+
+def test_demand_matrix_window_and_missing_quantities(dated_lines):
+    dated_lines['QuantityOrdered'] = pd.array([10, None, 5, 2, 8], dtype='Int32')
+    matrix, weeks = demand_matrix(dated_lines, ['PANADOL', 'VICKS'], start='2024-02-01', end='2024-04-01')
+    assert weeks[0] == pd.Timestamp('2024-01-29') and len(weeks) == 10
+    # Orders before the window are dropped, missing quantities add nothing
+    assert matrix[0].tolist() == [0, 5, 0, 0, 0, 0, 0, 0, 0, 0]
+    assert matrix[1].sum() == 8
+
+
+def test_empty_history():
+    matrix, weeks = demand_matrix(pd.DataFrame({'OrderDate': pd.to_datetime([]), 'Item': [], 'QuantityOrdered': []}), ['A'])
+    assert matrix.shape == (1, 0) and len(weeks) == 0
+
+
+def test_dense_mask():
+    weeks = forecasting.MIN_DENSE_WEEKS
+    matrix = np.zeros((3, weeks))
+    matrix[0] = 5
+    matrix[1, ::4] = 5
+    assert dense_mask(matrix).tolist() == [True, False, False]
+    assert not dense_mask(matrix[:, 1:]).any()  # too little history
+
+
+def test_croston_sba():
+    matrix = np.array([
+        [0, 0, 0, 0],
+        [4, 4, 4, 4],
+        [0, 6, 0, 6],
+    ], dtype=float)
+    rates = croston_sba(matrix, alpha=0.1)
+    assert rates[0] == 0
+    assert rates[1] == pytest.approx(0.95 * 4)
+    # Demand of 6 every other week
+    assert rates[2] == pytest.approx(0.95 * 6 / 2)
+
+
+def test_holt_follows_a_trend_and_never_goes_negative():
+    forecast = holt(np.array([[1, 2, 3, 4, 5], [10, 8, 6, 4, 2]], dtype=float), 3)
+    assert forecast.shape == (2, 3)
+    assert (np.diff(forecast[0]) > 0).all()
+    assert (forecast >= 0).all()
+
+
+def test_forecast_items_without_statsmodels(dated_lines, monkeypatch):
+    monkeypatch.setattr(forecasting, 'HAVE_STATSMODELS', False)
+    monkeypatch.setattr(forecasting, 'MIN_DENSE_WEEKS', 4)
+    dense = pd.DataFrame({
+        'OrderDate': pd.date_range('2024-01-01', periods=11, freq='7D'),
+        'Item': 'DENSE',
+        'QuantityOrdered': np.arange(1, 12),
+    })
+    result, params = forecast_items(pd.concat([dated_lines, dense]), ['PANADOL', 'DENSE', 'NEVER ORDERED'], horizon=4)
+    assert params == {}
+    assert len(result) == 12
+    assert result['Week'].iloc[0] == pd.Timestamp('2024-03-18')
+    models = result.drop_duplicates('Item').set_index('Item')['Model']
+    assert models.to_dict() == {'PANADOL': 'sba', 'DENSE': 'holt', 'NEVER ORDERED': 'sba'}
+    assert (result.loc[result['Item'] == 'NEVER ORDERED', 'Forecast'] == 0).all()
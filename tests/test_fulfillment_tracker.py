@@ -0,0 +1,86 @@
+import concurrent.futures
+import datetime
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from app.utils import commit_queue, invoice_index
+
+PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pages",
+                    "3_🎯_Fulfillment_Tracker.py")
+
+
+class QueuedFuture(concurrent.futures.Future):
+    """A save still waiting in the commit queue: ``result`` times out at once until it is acknowledged."""
+
+    def result(self, timeout=None):
+        if not self.done():
+            raise concurrent.futures.TimeoutError()
+        return super().result()
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    """Saves handed to the commit queue, which holds them until the test acknowledges them."""
+    futures = []
+
+    def submit_order(order_lines, order_row):
+        futures.append(QueuedFuture())
+        return futures[-1]
+
+    monkeypatch.setattr(commit_queue, 'submit_order', submit_order)
+    monkeypatch.setattr(invoice_index, 'load_invoice_index', lambda: frozenset())
+    return futures
+
+
+@pytest.fixture
+def tracker():
+    """The tracker with one order line entered."""
+    at = AppTest.from_file(PAGE, default_timeout=60)
+    at.session_state['order_metadata'] = {'order_date': datetime.date(2024, 5, 1), 'customer_name': 'Acme',
+                                          'invoice_number': 'INV-100'}
+    at.session_state['order_entries'] = [{
+        'InvoiceNumber': 'INV-100', 'OrderDate': datetime.date(2024, 5, 1), 'Customer': 'Acme', 'Item': 'PANADOL',
+        'QuantityOrdered': 2, 'QuantityFulfilled': 2, 'Price': 2.5, 'OrderValue': 5.0, 'ValueActualized': 5.0,
+        'RevenueLost': 0.0,
+    }]
+    at.run()
+    assert not at.exception
+    return at
+
+
+def messages(elements):
+    return [element.value for element in elements]
+
+
+def save(at):
+    next(button for button in at.button if button.label == 'Save Data').click().run()
+
+
+def test_slow_save_is_reported_as_queued_and_not_submitted_twice(tracker, submitted):
+    save(tracker)
+    assert not tracker.exception
+    assert len(submitted) == 1
+    assert any('still queued' in message for message in messages(tracker.info))
+    assert 'pending_order_save' in tracker.session_state
+
+    # Clicking again while the save is queued does not submit the order a second time
+    save(tracker)
+    assert len(submitted) == 1
+    assert any('previous save is still queued' in message for message in messages(tracker.info))
+
+    submitted[0].set_result({'committed': True, 'invoice_number': 'INV-100', 'lines': 1})
+    tracker.run()
+    assert 'Order and metrics have been added successfully!' in messages(tracker.success)
+    assert 'pending_order_save' not in tracker.session_state
+    assert tracker.session_state['order_entries'] == []
+
+
+def test_rejected_save_keeps_the_order(tracker, submitted):
+    save(tracker)
+    submitted[0].set_result({'committed': False, 'invoice_number': 'INV-100',
+                             'error': 'Invoice number INV-100 already exists'})
+    tracker.run()
+    assert 'Invoice number INV-100 already exists' in messages(tracker.warning)
+    assert len(tracker.session_state['order_entries']) == 1
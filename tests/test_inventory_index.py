@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.inventory_index import InventoryIndex
+
+
+@pytest.fixture
+def index(inventory):
+    # A duplicate name keeps its first row
+    return InventoryIndex(pd.concat([inventory, inventory.iloc[[0]].assign(Price=99.0)], ignore_index=True))
+
+
+def test_single_lookups(index):
+    assert len(index) == 3
+    assert 'VICKS' in index and 'ASPIRIN' not in index
+    assert index.price('PANADOL') == 2.5
+    assert index.form('SUDOCREM') == 'Tub'
+    with pytest.raises(KeyError):
+        index.price('ASPIRIN')
+
+
+def test_vectorized_lookup_and_pricing(index):
+    found = index.lookup(['VICKS', 'ASPIRIN', 'PANADOL'])
+    assert found['Known'].tolist() == [True, False, True]
+    assert found['Form'].tolist() == ['Jar', '', 'Tab']
+    assert np.isnan(found['Price'][1])
+    priced = index.price_lines(pd.DataFrame({'Item': ['VICKS', 'PANADOL'], 'QuantityOrdered': [3, 4],
+                                             'QuantityFulfilled': [1, 4]}))
+    assert priced['OrderValue'].tolist() == [30.0, 10.0]
+    assert priced['RevenueLost'].tolist() == [20.0, 0.0]
@@ -0,0 +1,53 @@
+import pytest
+
+from app.utils import invoice_index
+from app.utils.invoice_index import BloomFilter, InvoiceIndex, load_invoice_index
+
+
+@pytest.fixture
+def orders_csv(tmp_path, lines):
+    path = tmp_path / 'data.csv'
+    lines.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize('bloom_capacity', [None, 100])
+def test_membership_and_add(tmp_path, orders_csv, bloom_capacity):
+    index = InvoiceIndex(str(tmp_path / 'invoices.idx'), orders_csv, bloom_capacity=bloom_capacity)
+    assert 'INV-1' in index and ' INV-3 ' in index
+    assert 'INV-9' not in index
+    index.add(['INV-9'])
+    assert 'INV-9' in index
+    # Another process's index picks the appended number up from the file
+    assert 'INV-9' in InvoiceIndex(str(tmp_path / 'invoices.idx'), orders_csv, bloom_capacity=bloom_capacity)
+
+
+def test_truncated_file_is_reloaded(tmp_path, orders_csv):
+    path = tmp_path / 'invoices.idx'
+    index = InvoiceIndex(str(path), orders_csv)
+    index.refresh()  # builds the file from data.csv
+    size = path.stat().st_size
+    index.add(['INV-9'])
+    with open(path, 'r+') as f:
+        f.truncate(size)  # a rolled-back commit
+    assert 'INV-9' not in index
+    assert 'INV-1' in index
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000)
+    values = [f"INV-{i}" for i in range(1000)]
+    for value in values:
+        bloom.add(value)
+    assert all(value in bloom for value in values)
+    assert sum(f"OTHER-{i}" in bloom for i in range(1000)) < 50
+
+
+def test_loader_takes_the_bloom_filter_from_config(tmp_path, orders_csv, monkeypatch):
+    config = {'bloom_capacity': 500, 'bloom_error_rate': 0.001}
+    monkeypatch.setattr(invoice_index, 'setting', lambda section, key, default=None: config.get(key, default))
+    index = load_invoice_index(str(tmp_path / 'invoices.idx'), orders_csv)
+    assert isinstance(index._members, BloomFilter)
+    assert index.bloom_error_rate == 0.001
+    assert 'INV-2' in index
+    assert load_invoice_index(str(tmp_path / 'invoices.idx'), orders_csv) is index
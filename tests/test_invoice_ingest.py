@@ -0,0 +1,133 @@
+import shutil
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from app.utils import commit_queue, invoice_ingest
+from app.utils.invoice_ingest import Checkpoint, build_order, extract_page, ingest, parse_page
+from app.utils.inventory_index import InventoryIndex
+from app.utils.product_matcher import ProductMatcher
+
+SAMPLE = 'app/assets/data/SalesInvoice.pdf'
+
+PAGE = """
+Description Form Price Disc Tax Qty Total GHS
+PANADOL EXTRA TABS Pack 2.5 - - 4 10.00
+VICKS VAPO RUB 50G Unit 10 - - 0 0.00
+SMUDGED LINE
+Showing: 2 of 2
+08-Nov-2024 12:06 PM
+#INV-9
+To
+ACME PHARMACY
+"""
+
+
+def acknowledged(ack):
+    future = Future()
+    future.set_result(ack)
+    return future
+
+
+def slow_extract(path, page_number):
+    time.sleep(30)
+
+
+@pytest.fixture
+def inbox(tmp_path):
+    directory = tmp_path / 'invoices'
+    directory.mkdir()
+    shutil.copy(SAMPLE, directory / 'invoice.pdf')
+    return str(directory)
+
+
+@pytest.fixture
+def stubs(monkeypatch, inventory):
+    """Inventory lookups and a commit queue that records orders instead of writing them."""
+    submitted = []
+
+    def submit_order(order_lines, order_row):
+        submitted.append((order_lines, order_row))
+        return acknowledged({'committed': True, 'invoice_number': order_row['InvoiceNumber'], 'lines': len(order_lines)})
+
+    monkeypatch.setattr(invoice_ingest, 'load_inventory_index', lambda: InventoryIndex(inventory))
+    monkeypatch.setattr(invoice_ingest, 'load_product_matcher', lambda: ProductMatcher(['NUROFEN SUSP 100ML STRAWBERRY']))
+    monkeypatch.setattr(commit_queue, 'submit_order', submit_order)
+    return submitted
+
+
+def test_parse_page():
+    page = parse_page(PAGE)
+    assert [row['Item'] for row in page['rows']] == ['PANADOL EXTRA TABS', 'VICKS VAPO RUB 50G']
+    assert page['rows'][0] == {'Item': 'PANADOL EXTRA TABS', 'Form': 'Pack', 'ListPrice': 2.5, 'Discount': '-',
+                               'Qty': 4.0, 'Total': 10.0}
+    assert page['unparsed'] == ['SMUDGED LINE']
+    assert page['details'] == {'expected_lines': 2, 'order_date': '2024-11-08', 'invoice_number': 'INV-9',
+                               'customer': 'ACME PHARMACY'}
+
+
+def test_build_order_from_the_sample_invoice():
+    pages = [extract_page(SAMPLE, page) for page in range(3)]
+    order_lines, order_row, errors = build_order(pages)
+    assert errors == []
+    assert len(order_lines) == 44
+    assert order_row['InvoiceNumber'] == 'EST-KCY-398' and order_row['Customer'] == 'VAFY PHARMACY LTD'
+    assert (order_lines['QuantityOrdered'] == order_lines['QuantityFulfilled']).all()
+    assert order_row['OrderValue'] == pytest.approx(order_lines['OrderValue'].sum())
+
+
+def test_build_order_rejects_bad_lines():
+    page = parse_page(PAGE)
+    _, _, errors = build_order([page])
+    assert errors == ['Unreadable line: SMUDGED LINE', 'Quantity is not positive: VICKS VAPO RUB 50G']
+
+    page['unparsed'] = []
+    page['rows'] = [{**page['rows'][0], 'Total': 12.0}]
+    del page['details']['customer']
+    _, _, errors = build_order([page])
+    assert errors == ['No customer found', 'Read 1 line items, the invoice lists 2',
+                      'Total does not match price x quantity: PANADOL EXTRA TABS']
+
+
+def test_ingest_commits_once_and_resumes_from_the_checkpoint(inbox, stubs, tmp_path):
+    [result] = ingest(inbox, workers=1, checkpoint_dir=str(tmp_path / 'checkpoints'))
+    assert result['status'] == 'committed' and result['invoice_number'] == 'EST-KCY-398'
+    # The printed description is resolved to the inventory name
+    assert result['matched_items']['NUROFEN SUSP 100ML -STRAWBERRY'][0] == 'NUROFEN SUSP 100ML STRAWBERRY'
+    assert 'VERMOX SUSP 30ML' in result['unknown_items']
+    order_lines, _ = stubs[0]
+    assert 'NUROFEN SUSP 100ML STRAWBERRY' in set(order_lines['Item'])
+
+    [again] = ingest(inbox, workers=1, checkpoint_dir=str(tmp_path / 'checkpoints'))
+    assert again['status'] == 'committed'
+    assert len(stubs) == 1
+
+
+def test_hung_page_marks_its_file_as_an_error(inbox, stubs, tmp_path, monkeypatch):
+    monkeypatch.setattr(invoice_ingest, 'PAGE_TIMEOUT', 0.4)
+    monkeypatch.setattr(invoice_ingest, 'extract_page', slow_extract)
+    started = time.monotonic()
+    [result] = ingest(inbox, workers=1, checkpoint_dir=str(tmp_path / 'checkpoints'))
+    assert time.monotonic() - started < 10
+    assert result['status'] == 'error'
+    assert result['errors'] == ['Page 1: no result within 0.4s']
+    assert stubs == []
+
+
+def test_unacknowledged_commit_is_reported(inbox, stubs, inventory, tmp_path, monkeypatch):
+    monkeypatch.setattr(invoice_ingest, 'COMMIT_TIMEOUT', 0.1)
+    monkeypatch.setattr(commit_queue, 'submit_order', lambda order_lines, order_row: Future())
+    checkpoint = Checkpoint(f"{inbox}/invoice.pdf", str(tmp_path / 'checkpoints'))
+    for page in checkpoint.missing_pages():
+        checkpoint.add_page(page, extract_page(checkpoint.source, page))
+    state = invoice_ingest._commit_invoice(checkpoint, InventoryIndex(inventory), ProductMatcher(['VICKS']))
+    assert state['status'] == 'rejected'
+    assert state['errors'] == ['No acknowledgement from the commit queue within 0.1s']
+
+
+def test_duplicate_invoice_is_recorded(inbox, stubs, tmp_path, monkeypatch):
+    monkeypatch.setattr(commit_queue, 'submit_order', lambda order_lines, order_row: acknowledged(
+        {'committed': False, 'invoice_number': 'EST-KCY-398', 'error': 'Invoice number EST-KCY-398 already exists'}))
+    [result] = ingest(inbox, workers=1, checkpoint_dir=str(tmp_path / 'checkpoints'))
+    assert result['status'] == 'duplicate'
@@ -0,0 +1,47 @@
+import pytest
+
+from app.utils.item_search import ItemSearchIndex, load_item_search_index, normalize
+
+ITEMS = [
+    '00110-DR SAN VARICOSE STOCKING SHORT SMALL',
+    '00110-DR SAN VARICOSE STOCKING UNDER KNEE LARGE',
+    'VICKS VAPO RUB 50G',
+    'VICKS BABY RUB 50G',
+    'PANADOL EXTRA TABS',
+    'DALACIN C CAPS 300MG',
+]
+
+
+@pytest.fixture
+def index():
+    return ItemSearchIndex(ITEMS)
+
+
+def test_normalize():
+    assert normalize('  vicks   vapo rub ') == 'VICKS VAPO RUB'
+
+
+def test_whole_name_prefix_ranks_first(index):
+    assert index.search('vicks b')[0] == 'VICKS BABY RUB 50G'
+    assert index.search('00110')[:2] == ITEMS[:2]
+
+
+def test_word_prefix_and_limit(index):
+    assert index.search('knee')[0] == '00110-DR SAN VARICOSE STOCKING UNDER KNEE LARGE'
+    assert set(index.search('rub', limit=2)) == {'VICKS VAPO RUB 50G', 'VICKS BABY RUB 50G'}
+    assert len(index.search('v', limit=3)) == 3
+
+
+def test_typos_match_by_trigrams(index):
+    assert index.search('panadl extra')[0] == 'PANADOL EXTRA TABS'
+    assert index.search('dalacn caps')[0] == 'DALACIN C CAPS 300MG'
+
+
+def test_no_match(index):
+    assert index.search('') == []
+    assert index.search('zzzz') == []
+    assert ItemSearchIndex([]).search('vicks') == []
+
+
+def test_shared_index_over_the_inventory():
+    assert load_item_search_index().search('vicks vapo')[0].startswith('VICKS VAPO')
@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from app.utils.kpis import METRICS, fulfillment_kpis, grouped_order_metrics, order_metrics
+
+
+def test_order_metrics(lines):
+    metrics = order_metrics(lines)
+    assert list(metrics) == METRICS
+    assert metrics['ItemCount'] == 5
+    assert metrics['percentage_fully_fulfilled'] == pytest.approx(60)
+    assert metrics['percentage_partially_fulfilled'] == pytest.approx(20)
+    assert metrics['percentage_not_fulfilled'] == pytest.approx(20)
+    assert metrics['quantity_fulfill_rate'] == pytest.approx(22 / 29 * 100)
+    assert metrics['OrderValue'] == 171.5
+    assert metrics['RevenueLost'] == 32.5
+    assert metrics['percent_revenue_actualized'] == pytest.approx(139 / 171.5 * 100)
+
+
+def test_grouped_metrics_match_per_group_metrics(lines):
+    grouped = grouped_order_metrics(lines, 'InvoiceNumber')
+    assert grouped.index.tolist() == ['INV-1', 'INV-2', 'INV-3']
+    for invoice, group in lines.groupby('InvoiceNumber'):
+        assert grouped.loc[invoice].to_dict() == pytest.approx(order_metrics(group))
+    by_keys = grouped_order_metrics(lines, pd.to_datetime(lines['OrderDate']).dt.month)
+    assert by_keys['ItemCount'].tolist() == [2, 1, 2]
+    assert grouped_order_metrics(lines, ['Customer', 'InvoiceNumber']).index.tolist() == [
+        ('Acme', 'INV-1'), ('Acme', 'INV-3'), ('Bolt', 'INV-2')]
+
+
+def test_empty_and_zero_value_orders(lines):
+    assert order_metrics(lines.iloc[:0])['percent_revenue_actualized'] == 0
+    free = lines.assign(Price=0.0)
+    assert fulfillment_kpis(free)['percent_revenue_actualized'] == 0
+    assert fulfillment_kpis(lines)['revenue_lost'] == 32.5
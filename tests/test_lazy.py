@@ -0,0 +1,51 @@
+import builtins
+import importlib
+import sys
+
+import pytest
+
+from app.utils.lazy import LazyModule, lazy_import
+
+
+@pytest.fixture
+def heavy_module(tmp_path, monkeypatch):
+    """A module that counts how often it is imported."""
+    (tmp_path / 'heavy_module_for_test.py').write_text(
+        "import builtins\n"
+        "builtins.heavy_imports = getattr(builtins, 'heavy_imports', 0) + 1\n"
+        "ANSWER = 42\n"
+        "def double(x):\n"
+        "    return 2 * x\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield 'heavy_module_for_test'
+    sys.modules.pop('heavy_module_for_test', None)
+    del builtins.heavy_imports
+
+
+def imports():
+    return getattr(builtins, 'heavy_imports', 0)
+
+
+def test_import_is_deferred_until_an_attribute_is_used(heavy_module):
+    module = lazy_import(heavy_module)
+    assert isinstance(module, LazyModule)
+    assert imports() == 0 and heavy_module not in sys.modules
+    assert 'not loaded' in repr(module)
+    assert module.double(module.ANSWER) == 84
+    assert imports() == 1
+    assert module.ANSWER == 42 and 'double' in dir(module)
+    assert imports() == 1
+    assert "'heavy_module_for_test' (loaded)" in repr(module)
+
+
+def test_already_imported_module_is_returned_as_is(heavy_module):
+    real = importlib.import_module(heavy_module)
+    assert lazy_import(heavy_module) is real
+    assert lazy_import('json') is sys.modules['json']
+
+
+def test_missing_module_fails_on_first_use():
+    module = lazy_import('no_such_module_for_test')
+    with pytest.raises(ModuleNotFoundError):
+        module.anything
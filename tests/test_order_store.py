@@ -0,0 +1,39 @@
+import pandas as pd
+
+from app.utils.order_store import append_rows, read_header, save_order
+
+
+def test_append_creates_then_extends_the_file(tmp_path, lines):
+    path = str(tmp_path / 'data.csv')
+    assert read_header(path) is None
+    append_rows(path, lines.iloc[:2])
+    append_rows(path, lines.iloc[2:])
+    assert read_header(path) == list(lines.columns)
+    pd.testing.assert_frame_equal(pd.read_csv(path), lines)
+
+
+def test_append_aligns_columns_and_leaves_existing_text_alone(tmp_path, lines):
+    path = tmp_path / 'data.csv'
+    path.write_text("OrderDate,Customer,Item,QuantityOrdered,QuantityFulfilled,Price,InvoiceNumber\n"
+                    "19-11-24,Acme,VICKS,1,1,10.00,OLD-1")  # legacy date, no trailing newline
+    append_rows(str(path), lines.iloc[[0]][lines.columns[::-1]])
+    text = path.read_text().splitlines()
+    assert text[1] == "19-11-24,Acme,VICKS,1,1,10.00,OLD-1"
+    assert text[2] == "2024-01-05,Acme,PANADOL,10,10,2.5,INV-1"
+
+
+def test_new_column_widens_the_header(tmp_path, lines):
+    path = str(tmp_path / 'data.csv')
+    append_rows(path, lines.iloc[:2])
+    append_rows(path, lines.iloc[[2]].assign(OrderValue=12.5))
+    assert read_header(path) == list(lines.columns) + ['OrderValue']
+    assert pd.read_csv(path)['OrderValue'].isna().tolist() == [True, True, False]
+
+
+def test_save_order_appends_lines_and_order_row(tmp_path, lines):
+    orders_path, tables_path = str(tmp_path / 'data.csv'), str(tmp_path / 'data_tables.csv')
+    save_order(lines.iloc[:2], {'OrderDate': '2024-01-05', 'InvoiceNumber': 'INV-1', 'ItemCount': 2},
+               orders_path, tables_path)
+    assert len(pd.read_csv(orders_path)) == 2
+    assert pd.read_csv(tables_path).to_dict('records') == [{'OrderDate': '2024-01-05', 'InvoiceNumber': 'INV-1',
+                                                             'ItemCount': 2}]
@@ -0,0 +1,115 @@
+import os
+
+import pandas as pd
+import pytest
+
+from app.utils import order_tables
+from app.utils.order_tables import TABLE_COLUMNS, build_order_tables, invoice_digests, refresh
+
+
+@pytest.fixture
+def paths(tmp_path, lines):
+    paths = {name: str(tmp_path / name) for name in ['data.csv', 'data_tables.csv', 'digests.parquet', 'orders.lock']}
+    lines.to_csv(paths['data.csv'], index=False)
+    return paths
+
+
+def run(paths, full=False):
+    return refresh(full, paths['data.csv'], paths['data_tables.csv'], paths['digests.parquet'], paths['orders.lock'])
+
+
+def table(paths):
+    return pd.read_csv(paths['data_tables.csv'])
+
+
+def append(path, rows):
+    with open(path, 'a') as f:
+        rows.to_csv(f, header=False, index=False)
+
+
+def test_build_order_tables(lines):
+    built = build_order_tables(lines)
+    assert built.columns.tolist() == TABLE_COLUMNS
+    assert built['InvoiceNumber'].tolist() == ['INV-1', 'INV-2', 'INV-3']
+    assert built['ItemCount'].tolist() == [2, 1, 2]
+    assert built['OrderValue'].tolist() == [65.0, 12.5, 94.0]
+    assert str(built['OrderDate'][0]) == '2024-01-05'
+
+
+def test_digests_ignore_line_order_but_not_edits(lines):
+    digests = invoice_digests(lines)
+    assert digests.index.tolist() == ['INV-1', 'INV-2', 'INV-3']
+    pd.testing.assert_series_equal(invoice_digests(lines.iloc[::-1]).sort_index(), digests)
+
+    swapped = lines.copy()
+    swapped.loc[[0, 1], 'QuantityFulfilled'] = swapped.loc[[1, 0], 'QuantityFulfilled'].to_numpy()
+    moved = lines.assign(InvoiceNumber=['INV-1', 'INV-3', 'INV-2', 'INV-3', 'INV-3'])
+    for edited in (swapped, moved):
+        changed = invoice_digests(edited).reindex(digests.index) != digests
+        assert changed['INV-1'] and not changed['INV-2']
+
+
+def test_full_then_incremental_refresh(paths, lines):
+    counts = run(paths)
+    assert counts == {'invoices': 3, 'recomputed': 3, 'replaced': 0, 'appended': 3, 'dropped': 0, 'duplicates': 0}
+    assert table(paths)['InvoiceNumber'].tolist() == ['INV-1', 'INV-2', 'INV-3']
+
+    modified = os.stat(paths['data_tables.csv']).st_mtime_ns
+    assert run(paths)['recomputed'] == 0
+    assert os.stat(paths['data_tables.csv']).st_mtime_ns == modified
+
+    append(paths['data.csv'], lines.iloc[[0]].assign(InvoiceNumber='INV-4', OrderDate='2024-04-01'))
+    counts = run(paths)
+    assert (counts['recomputed'], counts['appended'], counts['replaced']) == (1, 1, 0)
+    assert table(paths)['InvoiceNumber'].tolist() == ['INV-1', 'INV-2', 'INV-3', 'INV-4']
+
+
+def test_edited_and_removed_invoices_are_rewritten_in_place(paths, lines):
+    run(paths)
+    edited = lines.copy()
+    edited.loc[2, 'QuantityFulfilled'] = 5  # INV-2 now fully fulfilled
+    edited[edited['InvoiceNumber'] != 'INV-3'].to_csv(paths['data.csv'], index=False)
+    counts = run(paths)
+    assert (counts['recomputed'], counts['replaced'], counts['dropped']) == (1, 1, 1)
+    rows = table(paths)
+    assert rows['InvoiceNumber'].tolist() == ['INV-1', 'INV-2']
+    assert rows.loc[1, 'RevenueLost'] == 0
+
+
+def test_matching_rows_are_kept_as_written(paths, lines):
+    pd.DataFrame([
+        {'OrderDate': '05-01-24', 'InvoiceNumber': 'INV-1', 'Customer': 'Acme',
+         **build_order_tables(lines).iloc[0][TABLE_COLUMNS[3:]].to_dict()},
+    ]).to_csv(paths['data_tables.csv'], index=False)
+    counts = run(paths)
+    assert (counts['appended'], counts['replaced']) == (2, 0)
+    # The legacy dd-mm-yy date is the same date, so the row is left alone
+    assert pd.read_csv(paths['data_tables.csv'], dtype=str)['OrderDate'].tolist() == ['05-01-24', '2024-02-10',
+                                                                                      '2024-03-15']
+
+
+def test_duplicate_rows_are_removed_and_counted(paths):
+    run(paths)
+    rows = table(paths)
+    pd.concat([rows, rows.iloc[[0]]]).to_csv(paths['data_tables.csv'], index=False)
+    counts = run(paths, full=True)
+    assert (counts['duplicates'], counts['dropped'], counts['replaced']) == (1, 0, 0)
+    assert table(paths)['InvoiceNumber'].tolist() == ['INV-1', 'INV-2', 'INV-3']
+
+
+def test_an_order_saved_while_planning_is_not_overwritten(paths, lines, monkeypatch):
+    plan = order_tables._plan
+    calls = []
+
+    def plan_then_save(*args):
+        planned = plan(*args)
+        if not calls:
+            append(paths['data.csv'], lines.iloc[[1]].assign(InvoiceNumber='INV-9', OrderDate='2024-04-01'))
+        calls.append(planned)
+        return planned
+
+    monkeypatch.setattr(order_tables, '_plan', plan_then_save)
+    counts = run(paths)
+    assert len(calls) == 2
+    assert counts['invoices'] == 4
+    assert table(paths)['InvoiceNumber'].tolist() == ['INV-1', 'INV-2', 'INV-3', 'INV-9']
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils import pareto
+from app.utils.data_access import filter_date_range, load_orders
+from app.utils.pareto import load_pareto, pareto_table
+
+
+@pytest.fixture
+def ranked():
+    """Ten items whose totals are 50, 20, 10, 5, 5, 4, 3, 1, 1 and 1 (100 in all), shuffled."""
+    totals = [50, 20, 10, 5, 5, 4, 3, 1, 1, 1]
+    items = [f'ITEM-{rank}' for rank in range(len(totals))]
+    df = pd.DataFrame({'Item': items * 2, 'QuantityOrdered': [t / 2 for t in totals] * 2})
+    return df.sample(frac=1, random_state=0)
+
+
+def test_top_n_other_row_and_classes(ranked):
+    table, summary = pareto_table(ranked, 'Item', 'QuantityOrdered', top_n=4)
+    assert table['Item'].tolist() == ['ITEM-0', 'ITEM-1', 'ITEM-2', 'ITEM-3', 'Other']
+    assert table['QuantityOrdered'].tolist() == [50, 20, 10, 5, 15]
+    assert table['Class'].tolist() == ['A', 'A', 'A', 'B', '']
+    assert table['CumulativePercentage'].iloc[-1] == pytest.approx(100)
+    # A reaches 80% with three items, A+B 95% with seven, beyond the top 4 shown
+    assert summary == {'categories': 10, 'class_a': 3, 'class_ab': 7, 'total': 100.0}
+
+
+def test_no_other_row_when_everything_fits(ranked):
+    table, _ = pareto_table(ranked, 'Item', 'QuantityOrdered', top_n=20)
+    assert len(table) == 10 and 'Other' not in set(table['Item'])
+    assert table['Class'].tolist() == ['A'] * 3 + ['B'] * 4 + ['C'] * 3
+
+
+def test_categorical_dimension_and_empty_totals():
+    df = pd.DataFrame({'Item': pd.Categorical(['B', 'A', 'B'], categories=['A', 'B', 'UNUSED']),
+                       'QuantityOrdered': [0.0, 0.0, 0.0]})
+    table, summary = pareto_table(df, 'Item', 'QuantityOrdered')
+    assert summary['categories'] == 2  # unobserved categories are left out
+    assert summary['class_a'] == 0 and (table['Share'] == 0).all()
+
+
+def test_derived_revenue_metric(lines):
+    table, summary = pareto_table(lines, 'Customer', 'RevenueLost')
+    assert dict(zip(table['Customer'], table['RevenueLost'])) == {'Acme': 20.0, 'Bolt': 12.5}
+    assert summary['total'] == 32.5
+
+
+def test_load_pareto_matches_pareto_table_and_is_cached_once_per_file_version(tmp_path, lines, monkeypatch):
+    path = str(tmp_path / 'data.csv')
+    lines.to_csv(path, index=False)
+    builds = []
+    monkeypatch.setattr(pareto, 'load_orders', lambda p: builds.append(p) or load_orders(p))
+    orders = load_orders(path)
+    for start, end in [('2024-01-01', '2024-12-31'), ('2024-02-01', '2024-03-31'), ('2024-01-05', '2024-01-05')]:
+        table, summary = load_pareto('Item', 'RevenueLost', start, end, path=path)
+        expected_table, expected_summary = pareto_table(filter_date_range(orders, start, end), 'Item', 'RevenueLost')
+        pd.testing.assert_frame_equal(table, expected_table)
+        assert summary == expected_summary
+    assert builds == [path]
+
+    with open(path, 'a') as f:
+        lines.iloc[[1]].assign(OrderDate='2024-04-01').to_csv(f, header=False, index=False)
+    table, _ = load_pareto('Item', 'RevenueLost', '2024-01-01', '2024-12-31', path=path)
+    assert len(builds) == 2
+    assert table.set_index('Item').loc['VICKS', 'RevenueLost'] == pytest.approx(40.0)
+    assert np.isclose(table['CumulativePercentage'].iloc[-1], 100)
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.price_history import apply_snapshot, historical_prices, record_snapshot, reprice
+from app.utils.schema import line_values
+
+
+def snapshot(**prices):
+    return pd.DataFrame({'Item': list(prices), 'Price': list(prices.values())})
+
+
+@pytest.fixture
+def history():
+    history = apply_snapshot(None, snapshot(PANADOL=2.0, VICKS=10.0, SUDOCREM=7.0), '2024-01-01')
+    history = apply_snapshot(history, snapshot(PANADOL=2.5, VICKS=10.0), '2024-02-01')
+    return apply_snapshot(history, snapshot(PANADOL=2.5, VICKS=12.0, SUDOCREM=8.0), '2024-03-01')
+
+
+def versions(history, item):
+    rows = history[history['Item'] == item]
+    return [(price, str(start.date()), None if pd.isna(end) else str(end.date()))
+            for price, start, end in zip(rows['Price'], rows['ValidFrom'], rows['ValidTo'])]
+
+
+def test_snapshots_open_and_close_versions(history):
+    assert versions(history, 'PANADOL') == [(2.0, '2024-01-01', '2024-02-01'), (2.5, '2024-02-01', None)]
+    assert versions(history, 'VICKS') == [(10.0, '2024-01-01', '2024-03-01'), (12.0, '2024-03-01', None)]
+    # Dropped in February, listed again in March
+    assert versions(history, 'SUDOCREM') == [(7.0, '2024-01-01', '2024-02-01'), (8.0, '2024-03-01', None)]
+
+
+def test_same_snapshot_again_changes_nothing(history):
+    again = apply_snapshot(history, snapshot(PANADOL=2.5, VICKS=12.0, SUDOCREM=8.0), '2024-03-15')
+    pd.testing.assert_frame_equal(again, history)
+
+
+def test_price_changed_twice_on_one_day_keeps_the_last(history):
+    history = apply_snapshot(history, snapshot(PANADOL=3.0, VICKS=12.0, SUDOCREM=8.0), '2024-04-01')
+    history = apply_snapshot(history, snapshot(PANADOL=3.5, VICKS=12.0, SUDOCREM=8.0), '2024-04-01')
+    assert versions(history, 'PANADOL')[-2:] == [(2.5, '2024-02-01', '2024-04-01'), (3.5, '2024-04-01', None)]
+
+
+def test_out_of_order_snapshots_are_rejected(history):
+    with pytest.raises(ValueError, match='older than the price history'):
+        apply_snapshot(history, snapshot(PANADOL=1.0), '2024-02-15')
+    # The latest snapshot may only have closed versions
+    closed = apply_snapshot(history, snapshot(PANADOL=2.5), '2024-05-01')
+    closed = closed[closed['Item'] != 'PANADOL']
+    with pytest.raises(ValueError):
+        apply_snapshot(closed, snapshot(VICKS=1.0), '2024-04-01')
+
+
+def test_delisted_item_without_a_price_is_closed():
+    history = apply_snapshot(None, snapshot(PANADOL=np.nan, VICKS=10.0), '2024-01-01')
+    history = apply_snapshot(history, snapshot(PANADOL=np.nan, VICKS=10.0), '2024-02-01')
+    assert len(history) == 2 and history['ValidTo'].isna().all()
+    history = apply_snapshot(history, snapshot(VICKS=10.0), '2024-03-01')
+    assert versions(history, 'PANADOL')[0][1:] == ('2024-01-01', '2024-03-01')
+
+
+def test_historical_prices(history):
+    lines = pd.DataFrame({
+        'Item': ['PANADOL', 'PANADOL', 'PANADOL', 'SUDOCREM', 'VICKS', 'UNKNOWN', 'VICKS'],
+        'OrderDate': pd.to_datetime(['2023-06-01', '2024-01-31', '2024-02-01', '2024-02-10', '2024-06-01',
+                                     '2024-02-01', None]),
+    })
+    prices = historical_prices(lines, history)
+    # Backfilled before the first version; SUDOCREM was out of the inventory in February
+    expected = [2.0, 2.0, 2.5, np.nan, 12.0, np.nan, np.nan]
+    np.testing.assert_array_equal(prices, expected)
+    assert np.isnan(historical_prices(lines, history, backfill=False)[0])
+
+    categorical = lines.assign(Item=lines['Item'].astype('category'))
+    np.testing.assert_array_equal(historical_prices(categorical, history), expected)
+
+
+def test_reprice_derives_revenue_from_historical_prices(lines, history):
+    lines = lines.assign(OrderDate=pd.to_datetime(lines['OrderDate']), OrderValue=0.0)
+    repriced = reprice(lines, history)
+    assert 'OrderValue' not in repriced
+    assert repriced['Price'].tolist() == [2.0, 10.0, 2.5, 8.0, 12.0]
+    assert line_values(repriced, 'OrderValue').tolist() == [20.0, 40.0, 12.5, 16.0, 96.0]
+    # A line with no known price keeps the price it was entered with
+    assert reprice(lines.assign(Item='UNKNOWN'), history)['Price'].tolist() == lines['Price'].tolist()
+
+
+def test_record_snapshot(tmp_path, inventory):
+    inventory_path, path = str(tmp_path / 'inventory.csv'), str(tmp_path / 'price_history.parquet')
+    inventory.to_csv(inventory_path, index=False)
+    assert record_snapshot(inventory_path, '2024-01-01', path) == (3, 0)
+    assert record_snapshot(inventory_path, '2024-02-01', path) == (0, 0)
+    inventory.assign(Price=[3.0, 10.0, 7.0]).iloc[:2].to_csv(inventory_path, index=False)
+    assert record_snapshot(inventory_path, '2024-03-01', path) == (1, 2)
+    assert len(pd.read_parquet(path)) == 4
@@ -0,0 +1,65 @@
+import pytest
+
+from app.utils import product_matcher
+from app.utils.product_matcher import ProductMatcher, features, load_product_matcher
+
+ITEMS = [
+    'NUROFEN SUSP 100ML STRAWBERRY',
+    'NUROFEN SUSP 100ML ORANGE',
+    'ACLOVIR TABS 400MG',
+    'ACLOVIR TABS 200MG',
+    'VICKS VAPO RUB 50G',
+]
+
+
+@pytest.fixture
+def matcher():
+    return ProductMatcher(ITEMS)
+
+
+def test_features_are_trigrams_and_words():
+    found = features('vicks  rub')
+    assert {' VI', 'UB ', 'w:VICKS', 'w:RUB'} <= found
+    assert 'w:' not in found
+
+
+def test_exact_name_scores_one(matcher):
+    found = matcher.match(['ACLOVIR TABS 200MG'], k=2)
+    assert found['Item'].tolist() == ['ACLOVIR TABS 200MG', 'ACLOVIR TABS 400MG']
+    assert found['Rank'].tolist() == [1, 2]
+    assert found['Score'][0] == pytest.approx(1.0)
+    assert found['Score'][1] < found['Score'][0]
+
+
+def test_strength_and_flavour_decide_the_match(matcher):
+    best = matcher.best(['ACLOVIR (ACICLOVIR TABS BP 400MG)', 'NUROFEN SUSP 100ML -STRAWBERRY'], min_score=0.5)
+    assert best['Item'].tolist() == ['ACLOVIR TABS 400MG', 'NUROFEN SUSP 100ML STRAWBERRY']
+
+
+def test_best_is_aligned_and_reports_weak_matches_as_missing(matcher):
+    best = matcher.best(['VICKS VAPO RUB 50G', 'WELLMAN PLUS', 'VICKS BABY BALM', 'VICKS VAPO RUB 50G'], min_score=0.8)
+    assert best['Name'].tolist() == ['VICKS VAPO RUB 50G', 'WELLMAN PLUS', 'VICKS BABY BALM', 'VICKS VAPO RUB 50G']
+    assert best['Item'].tolist()[0] == 'VICKS VAPO RUB 50G' and best['Item'].tolist()[3] == 'VICKS VAPO RUB 50G'
+    assert best['Item'].isna().tolist() == [False, True, True, False]
+    assert best['Score'][1] == 0.0
+    assert 0 < best['Score'][2] < 0.8
+
+
+def test_default_threshold_comes_from_the_config(matcher):
+    # ann.min_score is 0.8 in config/config.yaml
+    name = 'NUROFEN SUSP 100ML -STRAWBERRY'
+    score = matcher.best([name], min_score=0)['Score'][0]
+    assert score >= 0.8
+    assert matcher.best([name])['Item'][0] == 'NUROFEN SUSP 100ML STRAWBERRY'
+    assert matcher.match([name])['Rank'].tolist() == [1]  # ann.num_neighbors is 1
+
+
+def test_matches_across_batches(matcher, monkeypatch):
+    monkeypatch.setattr(product_matcher, 'BATCH_SIZE', 2)
+    assert matcher.best(ITEMS)['Item'].tolist() == ITEMS
+
+
+def test_shared_matcher_over_the_inventory():
+    matcher = load_product_matcher()
+    assert len(matcher) > 1000
+    assert matcher is load_product_matcher()
@@ -0,0 +1,94 @@
+import json
+import tracemalloc
+
+import pytest
+
+from app.utils import profiler
+from app.utils.data_access import cached
+from app.utils.profiler import stage, stage_changes, start_trace, trace_path, traced
+
+
+@pytest.fixture(autouse=True)
+def no_tracing(monkeypatch):
+    monkeypatch.delenv(profiler.TRACE_ENV, raising=False)
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    yield
+    profiler._local.trace = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+@traced("Page")
+def page(path):
+    with stage("load"):
+        cached("profiled", path, lambda p: open(p).read())
+        with stage("parse"):
+            pass
+    with stage("chart"):
+        pass
+
+
+def test_trace_path(monkeypatch):
+    assert trace_path() is None
+    for value, expected in [('0', None), ('off', None), ('1', profiler.DEFAULT_TRACE_PATH),
+                            ('yes', profiler.DEFAULT_TRACE_PATH), ('/tmp/trace.jsonl', '/tmp/trace.jsonl')]:
+        monkeypatch.setenv(profiler.TRACE_ENV, value)
+        assert trace_path() == expected
+
+
+def test_nothing_is_traced_by_default(tmp_path):
+    (tmp_path / 'data.txt').write_text('x')
+    assert page(str(tmp_path / 'data.txt')) is None
+    assert start_trace("Page") is None
+    assert not tracemalloc.is_tracing()
+
+
+def test_profile_env_appends_traces_with_memory(tmp_path, monkeypatch):
+    trace_file = tmp_path / 'logs' / 'profile.jsonl'
+    monkeypatch.setenv(profiler.TRACE_ENV, str(trace_file))
+    (tmp_path / 'data.txt').write_text('x')
+    page(str(tmp_path / 'data.txt'))
+    page(str(tmp_path / 'data.txt'))
+    first, second = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    assert first['page'] == 'Page' and first['peak_kb'] is not None
+    assert [entry['stage'] for entry in first['stages']] == [
+        'Page/load', 'Page/load/build profiled', 'Page/load/parse', 'Page/chart']
+    assert [entry['depth'] for entry in first['stages']] == [1, 2, 2, 1]
+    assert all(entry['memory_kb'] is not None for entry in first['stages'])
+    # The second rerun is served from the cache, so there is no build stage
+    assert 'Page/load/build profiled' not in [entry['stage'] for entry in second['stages']]
+
+
+def test_diagnostics_alone_records_timings_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, 'diagnostics_requested', lambda: True)
+    trace = start_trace("Page")
+    with stage("load"):
+        pass
+    record = profiler.end_trace()
+    assert trace is not None and not trace.memory
+    assert not tracemalloc.is_tracing()
+    assert record['peak_kb'] is None
+    assert record['stages'][0]['memory_kb'] is None
+
+
+def test_traced_inside_a_trace_is_a_stage(monkeypatch):
+    monkeypatch.setattr(profiler, 'diagnostics_requested', lambda: True)
+    inner = traced("fragment")(lambda: None)
+    start_trace("Page")
+    inner()
+    record = profiler.end_trace()
+    assert [entry['stage'] for entry in record['stages']] == ['Page/fragment']
+
+
+def test_stage_changes():
+    def record(page, load_ms):
+        return {'page': page, 'stages': [{'stage': f'{page}/load', 'depth': 1, 'ms': load_ms, 'memory_kb': None},
+                                         {'stage': f'{page}/load/csv', 'depth': 2, 'ms': 1.0, 'memory_kb': 4.0}]}
+
+    history = [record('Page', 10.0), record('Other', 100.0), record('Page', 30.0), record('Page', 40.0)]
+    table = stage_changes(history)
+    assert table['Stage'].tolist() == ['load', '  csv']
+    assert table['Median (ms)'].tolist() == [20.0, 1.0]
+    assert table['Change (%)'].tolist() == [100.0, 0.0]
+    assert table['Memory (KB)'].tolist()[1] == 4.0
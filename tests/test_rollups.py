@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.order_store import append_rows
+from app.utils.rollups import INTERVALS, TrendRollups, bucket_start, load_trend_rollups
+
+
+@pytest.fixture
+def order_rows():
+    rng = np.random.default_rng(0)
+    n = 300
+    return pd.DataFrame({
+        'OrderDate': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 400, n)), unit='D'),
+        'InvoiceNumber': [f"INV-{i}" for i in range(n)],
+        'Customer': rng.choice(['Acme', 'Bolt', 'Core'], n),
+        'OrderValue': rng.uniform(10, 100, n).round(2),
+        'RevenueLost': rng.uniform(0, 10, n).round(2),
+    })
+
+
+def expected(rows, interval, start, end, customer=None):
+    rows = rows[(rows['OrderDate'] >= start) & (rows['OrderDate'] <= end)]
+    if customer is not None:
+        rows = rows[rows['Customer'] == customer]
+    buckets = pd.to_datetime(bucket_start(rows['OrderDate'], interval))
+    return rows.groupby(buckets)[['OrderValue', 'RevenueLost']].sum().rename_axis('Interval').reset_index()
+
+
+def test_bucket_start():
+    dates = pd.to_datetime(['2024-05-15', '2024-05-19', '2024-02-29'])
+    assert list(bucket_start(dates, 'Daily').astype(str)) == ['2024-05-15', '2024-05-19', '2024-02-29']
+    assert list(bucket_start(dates, 'Weekly').astype(str)) == ['2024-05-13', '2024-05-13', '2024-02-26']
+    assert list(bucket_start(dates, 'Monthly').astype(str)) == ['2024-05-01', '2024-05-01', '2024-02-01']
+    assert list(bucket_start(dates, 'Quarterly').astype(str)) == ['2024-04-01', '2024-04-01', '2024-01-01']
+
+
+@pytest.mark.parametrize('interval', INTERVALS)
+@pytest.mark.parametrize('customer', [None, 'Bolt'])
+def test_series_is_clipped_to_the_range(order_rows, interval, customer):
+    # The range cuts through buckets at both ends; only the orders inside it may count
+    rollups = TrendRollups.from_frame(order_rows)
+    start, end = pd.Timestamp('2024-02-14'), pd.Timestamp('2024-11-20')
+    series = rollups.series(interval, ['OrderValue', 'RevenueLost'], customer, start, end)
+    pd.testing.assert_frame_equal(series, expected(order_rows, interval, start, end, customer), check_dtype=False)
+    assert rollups.series(interval, ['OrderValue'], customer, '2030-01-01', '2030-02-01').empty
+
+
+def test_appended_orders_are_folded_in(tmp_path, order_rows):
+    path = str(tmp_path / 'data_tables.csv')
+    order_rows.iloc[:200].to_csv(path, index=False)
+    load_trend_rollups(path)
+    append_rows(path, order_rows.iloc[200:])
+    rollups = load_trend_rollups(path)
+    assert sorted(rollups.customers) == ['Acme', 'Bolt', 'Core']
+    series = rollups.series('Monthly', ['OrderValue'])
+    assert series['OrderValue'].sum() == pytest.approx(order_rows['OrderValue'].sum())
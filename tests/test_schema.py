@@ -0,0 +1,51 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.utils.kpis import order_metrics
+from app.utils.schema import LINE_ITEMS, apply_schema, concat_typed, line_values, parse_order_dates, with_line_revenue
+
+
+def test_mixed_date_formats():
+    parsed = parse_order_dates(['2024-11-19', '19-11-24', 'not a date'])
+    assert parsed.iloc[0] == parsed.iloc[1] == pd.Timestamp('2024-11-19')
+    assert pd.isna(parsed.iloc[2])
+
+
+def test_quantities_keep_missing_and_fractional_values_as_na(caplog):
+    df = pd.DataFrame({'QuantityOrdered': ['4', '', 'x', '2.5', '3.0'], 'Price': ['1.5', '2', '', '1', '1']})
+    with caplog.at_level(logging.WARNING):
+        typed = apply_schema(df, LINE_ITEMS)
+    assert str(typed['QuantityOrdered'].dtype) == 'Int32'
+    assert typed['QuantityOrdered'].tolist()[0] == 4 and typed['QuantityOrdered'].tolist()[4] == 3
+    assert typed['QuantityOrdered'].isna().tolist() == [False, True, True, True, False]
+    assert 'QuantityOrdered: 1 non-integral' in caplog.text
+    assert typed['Price'].isna().tolist() == [False, False, True, False, False]
+
+
+def test_missing_quantities_do_not_change_the_kpis(lines):
+    typed = apply_schema(lines.copy(), LINE_ITEMS)
+    with_missing = concat_typed(typed, apply_schema(pd.DataFrame({
+        'Item': ['VICKS'], 'QuantityOrdered': [''], 'QuantityFulfilled': [''], 'Price': ['10'],
+    }), LINE_ITEMS))
+    metrics, missing = order_metrics(typed), order_metrics(with_missing)
+    assert missing['OrderValue'] == metrics['OrderValue'] == 171.5
+    assert missing['quantity_fulfill_rate'] == metrics['quantity_fulfill_rate']
+    assert missing['ItemCount'] == metrics['ItemCount'] + 1
+
+
+def test_line_values_derive_revenue_columns(lines):
+    typed = apply_schema(lines.copy(), LINE_ITEMS)
+    assert line_values(typed, 'OrderValue').tolist() == [25.0, 40.0, 12.5, 14.0, 80.0]
+    assert line_values(typed, 'RevenueLost').tolist() == [0.0, 20.0, 12.5, 0.0, 0.0]
+    assert np.allclose(line_values(typed, 'Percent Revenue Actualized'), [100, 50, 0, 100, 100])
+    assert list(with_line_revenue(typed).columns[-3:]) == ['OrderValue', 'ValueActualized', 'RevenueLost']
+
+
+def test_concat_keeps_categories(lines):
+    first = apply_schema(lines.iloc[:2].copy(), LINE_ITEMS)
+    second = apply_schema(lines.iloc[2:].copy(), LINE_ITEMS)
+    combined = concat_typed(first, second)
+    assert isinstance(combined['Item'].dtype, pd.CategoricalDtype)
+    assert combined['Item'].tolist() == lines['Item'].tolist()
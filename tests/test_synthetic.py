@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.schema import parse_order_dates
+from benchmarks.synthetic import LINE_HEADER, generate_lines, order_tables, write_history
+
+
+@pytest.fixture(scope='module')
+def history():
+    return generate_lines(20_000, seed=1)
+
+
+def test_size_columns_and_determinism(history):
+    assert len(history) == 20_000
+    assert history.columns.tolist() == LINE_HEADER
+    pd.testing.assert_frame_equal(history, generate_lines(20_000, seed=1))
+    assert not history['Item'].equals(generate_lines(20_000, seed=2)['Item'])
+
+
+def test_quantities_and_fulfilment_shares(history):
+    ordered, fulfilled = history['QuantityOrdered'], history['QuantityFulfilled']
+    assert (ordered >= 1).all() and fulfilled.between(0, ordered).all()
+    assert (fulfilled == ordered).mean() == pytest.approx(0.7, abs=0.05)
+    assert (fulfilled == 0).mean() == pytest.approx(0.1, abs=0.05)
+    assert np.allclose(history['RevenueLost'], history['OrderValue'] - history['ValueActualized'])
+
+
+def test_orders_share_date_and_customer_and_items_are_skewed(history):
+    per_invoice = history.groupby('InvoiceNumber')[['OrderDate', 'Customer']].nunique()
+    assert (per_invoice == 1).all().all()
+    assert history.groupby('InvoiceNumber').size().mean() == pytest.approx(4, rel=0.15)
+    top = history['Item'].value_counts()
+    assert top.iloc[:300].sum() / len(history) > 0.5
+    legacy = history.drop_duplicates('InvoiceNumber')['OrderDate'].str.match(r'^\d{2}-\d{2}-\d{2}$')
+    assert legacy.mean() == pytest.approx(0.3, abs=0.05)
+    assert parse_order_dates(history['OrderDate']).is_monotonic_increasing
+
+
+def test_order_tables_summarise_each_invoice(history):
+    tables = order_tables(history).set_index('InvoiceNumber')
+    per_invoice = history.groupby('InvoiceNumber').agg(
+        ItemCount=('Item', 'size'), OrderValue=('OrderValue', 'sum'), RevenueLost=('RevenueLost', 'sum'))
+    assert len(tables) == len(per_invoice)
+    assert (tables['ItemCount'] == per_invoice['ItemCount']).all()
+    assert np.allclose(tables['OrderValue'], per_invoice['OrderValue'])
+    assert np.allclose(tables['RevenueLost'], per_invoice['RevenueLost'])
+    # Dates are written in ISO form whatever format the lines use
+    assert tables['OrderDate'].astype(str).str.match(r'^\d{4}-\d{2}-\d{2}').all()
+
+
+def test_write_history_writes_once(tmp_path):
+    lines_path, tables_path = write_history(str(tmp_path), 500)
+    lines = pd.read_csv(lines_path)
+    assert len(lines) == 500 and len(pd.read_csv(tables_path)) == lines['InvoiceNumber'].nunique()
+    modified = os.path.getmtime(lines_path)
+    assert write_history(str(tmp_path), 500) == (lines_path, tables_path)
+    assert os.path.getmtime(lines_path) == modified
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.schema import LINE_ITEMS, apply_schema
+from app.utils.table_explorer import TableIndex, _filter_widget
+
+
+@pytest.fixture
+def index(lines):
+    df = apply_schema(lines.assign(OrderDate=pd.to_datetime(lines['OrderDate'])), LINE_ITEMS)
+    return TableIndex(df, derived=['RevenueLost'])
+
+
+def rows(index, selection):
+    return list(selection.page(0, len(index)))
+
+
+def test_date_filter(index):
+    low, high = index.value_range('OrderDate')
+    assert (low, high) == (pd.Timestamp('2024-01-05'), pd.Timestamp('2024-03-15'))
+    selection = index.query(filters=[('OrderDate', 'between', (pd.Timestamp('2024-02-01'), pd.Timestamp('2024-03-15')))])
+    assert rows(index, selection) == [2, 3, 4]
+
+
+def test_date_filter_widget_defaults_to_no_filter(index):
+    # value_range used to return int64 bounds here, and the widget called .date() on them
+    assert _filter_widget(index, 'OrderDate', 'test') is None
+
+
+def test_numeric_filter_and_sort(index):
+    assert index.value_range('QuantityOrdered') == (2, 10)
+    selection = index.query(filters=[('QuantityOrdered', 'between', (4, 8))], sort='QuantityOrdered', descending=True)
+    assert rows(index, selection) == [4, 2, 1]
+
+
+def test_derived_numeric_filter(index):
+    # RevenueLost is (ordered - fulfilled) * price: 0, 20, 12.5, 0, 0
+    selection = index.query(filters=[('RevenueLost', 'between', (10, 100))])
+    assert rows(index, selection) == [1, 2]
+    assert index.page(selection, 0, 10)['RevenueLost'].tolist() == [20.0, 12.5]
+
+
+def test_categorical_filters(index):
+    assert index.categories('Item') == ['PANADOL', 'SUDOCREM', 'VICKS']
+    assert rows(index, index.query(filters=[('Item', 'in', ['VICKS'])])) == [1, 4]
+    assert rows(index, index.query(filters=[('Customer', 'contains', 'bol')])) == [2]
+
+
+def test_filters_combine_within_date_range(index):
+    selection = index.query('2024-02-01', '2024-12-31', filters=[('Customer', 'in', ['Acme']),
+                                                                 ('Price', 'between', (5, 20))])
+    assert rows(index, selection) == [3, 4]
+    assert len(index.query('2025-01-01', '2025-12-31')) == 0
+    assert np.array_equal(index.query().page(1, 2), [2, 3])